@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+
+# Benchmarks never touch databases of the running bot.
+os.environ.setdefault(
+    'VACSCOLL_DB_DIR', tempfile.mkdtemp(prefix='vacscoll-bench-')
+)
@@ -0,0 +1,346 @@
+"""
+Benchmark of collectors against local mock of hh.ru API.
+Starts benchmarks.mock_hh in separate process, so its work
+isn't measured, and drives VacancyHHCollector.run, get_vacs,
+get_areas and VIDStorage at increasing concurrency.
+Mock finds more vacancies than API serves for one query,
+so collector runs split search by time windows. Incremental runs
+repeat few queries, so after first run of each query only
+vacancies published after its watermark are requested.
+Reports latency percentiles, operations and API requests
+per second and peak RSS, saves results as JSON to compare
+them between commits.
+
+Run: python -m benchmarks.bench_collectors [--levels 1 4 16 64]
+     [--rounds 3] [--rate 0] [--output bench_collectors.json]
+     [--baseline old.json] [mock options, see benchmarks.mock_hh]
+"""
+import argparse
+import asyncio
+import datetime as dt
+import json
+import platform
+import random
+import resource
+import subprocess
+import time
+from typing import Awaitable, Callable, NamedTuple
+
+import aiohttp
+
+from benchmarks.fixtures import make_areas
+from benchmarks.mock_hh import add_mock_arguments, mock_command
+from vacscoll import collectors, workers
+from vacscoll.client import http_client
+from vacscoll.collectors import VacancyHHCollector
+from vacscoll.db import run_in_storage, vid_storage
+from vacscoll.exceptions import RequestFailedException
+from vacscoll.limiters import RateLimiter
+
+
+MOCK_START_TIMEOUT: int = 10
+
+STORAGE_BATCH_SIZE: int = 100
+
+INCREMENTAL_QUERIES: int = 2
+
+
+class StoredVacancy(NamedTuple):
+    """Vacancy as seen by ids storage."""
+
+    id: int
+
+
+class Scenario(NamedTuple):
+    """Benchmarked operation, called with its unique number."""
+
+    name: str
+    operation: Callable[[int], Awaitable]
+    levels: tuple
+
+
+def percentile(latencies: list, share: float) -> float:
+    """Latency below which given share of latencies is, ms."""
+    ordered: list = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))] * 1000
+
+
+def peak_rss() -> float:
+    """Peak resident set size of benchmark process, MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def mock_stats(session: aiohttp.ClientSession, url: str) -> dict:
+    async with session.get(url + '/stats') as response:
+        return await response.json()
+
+
+async def start_mock(
+    session: aiohttp.ClientSession,
+    options: argparse.Namespace,
+    url: str
+) -> subprocess.Popen:
+    """Start mock API process and wait until it accepts requests."""
+    process = subprocess.Popen(mock_command(options))
+    deadline: float = time.monotonic() + MOCK_START_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            await mock_stats(session, url)
+            return process
+        except aiohttp.ClientError:
+            await asyncio.sleep(0.1)
+
+    process.terminate()
+    raise RuntimeError('mock API isn\'t started at %s' % url)
+
+
+async def measure(
+    session: aiohttp.ClientSession,
+    url: str,
+    scenario: Scenario,
+    concurrency: int,
+    rounds: int
+) -> dict:
+    """
+    Run operation by concurrent workers, each of them
+    makes several rounds. Return measured results.
+    """
+    latencies: list = []
+    errors: list = []
+    offset: int = random.randrange(10 ** 9)
+
+    async def worker(number: int) -> None:
+        for round_num in range(rounds):
+            started: float = time.perf_counter()
+            try:
+                await scenario.operation(
+                    offset + number * rounds + round_num
+                )
+            except RequestFailedException as error:
+                errors.append(error)
+            latencies.append(time.perf_counter() - started)
+
+    before: dict = await mock_stats(session, url)
+    started: float = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    elapsed: float = time.perf_counter() - started
+    after: dict = await mock_stats(session, url)
+
+    return {
+        'scenario': scenario.name,
+        'concurrency': concurrency,
+        'operations': len(latencies),
+        'errors': len(errors),
+        'elapsed': round(elapsed, 4),
+        'ops_per_sec': round(len(latencies) / elapsed, 2),
+        'requests_per_sec': round(
+            (after['requests'] - before['requests']) / elapsed, 2
+        ),
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p95_ms': round(percentile(latencies, 0.95), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'peak_rss_mb': round(peak_rss(), 1),
+    }
+
+
+def make_scenarios(
+    url: str,
+    options: argparse.Namespace,
+    levels: tuple
+) -> list:
+    """Operations of benchmark with their concurrency levels."""
+    limiter: RateLimiter | None = (
+        RateLimiter(options.rate, max(1, int(options.rate)))
+        if options.rate else None
+    )
+    collectors.hh_rate_limiter = limiter
+    collectors.HH_URL = url
+
+    cities: list = [
+        area['name']
+        for region in make_areas()['areas']
+        for area in (region, *region['areas'])
+    ]
+    areas_cache = workers.get_areas_cache('hh')
+
+    async def collector_run(number: int) -> list:
+        collector = VacancyHHCollector(
+            url,
+            'vacancies',
+            {
+                'text': 'python+run+%d' % number,
+                'per_page': str(options.per_page),
+                'no_magic': 'true',
+            },
+            cache=None,
+        )
+        return await collector.run()
+
+    async def incremental_run(number: int) -> list:
+        collector = VacancyHHCollector(
+            url,
+            'vacancies',
+            {
+                'text': 'python+incremental+%d' % (
+                    number % INCREMENTAL_QUERIES
+                ),
+                'per_page': str(options.per_page),
+                'no_magic': 'true',
+            },
+            cache=None,
+        )
+        return await collector.run()
+
+    async def get_vacs(number: int) -> list:
+        return await workers.get_vacs('hh', 'python get %d' % number)
+
+    async def get_areas(number: int) -> tuple | None:
+        return await workers.get_areas('hh', cities[number % len(cities)])
+
+    async def areas_refresh(number: int) -> None:
+        await areas_cache.refresh()
+
+    def sift_and_save(vacancies: list) -> set:
+        old_ids: set = vid_storage.load([vac.id for vac in vacancies])
+        vid_storage.save(vacancies)
+        return old_ids
+
+    async def storage(number: int) -> set:
+        first_id: int = number * STORAGE_BATCH_SIZE
+        return await run_in_storage(sift_and_save, [
+            StoredVacancy(vid)
+            for vid in range(first_id, first_id + STORAGE_BATCH_SIZE)
+        ])
+
+    return [
+        Scenario('collector_run', collector_run, levels),
+        Scenario('incremental_run', incremental_run, levels),
+        Scenario('get_vacs', get_vacs, levels),
+        Scenario('areas_refresh', areas_refresh, (1, )),
+        Scenario('get_areas', get_areas, levels),
+        Scenario('vid_storage', storage, levels),
+    ]
+
+
+def compare(results: list, baseline_path: str) -> None:
+    """Print changes of throughput and p95 latency against baseline."""
+    with open(baseline_path, encoding='utf-8') as baseline_file:
+        baseline: dict = {
+            (result['scenario'], result['concurrency']): result
+            for result in json.load(baseline_file)['results']
+        }
+
+    print('\nchanges against %s' % baseline_path)
+    for result in results:
+        old: dict | None = baseline.get(
+            (result['scenario'], result['concurrency'])
+        )
+        if old is None:
+            continue
+
+        print(
+            '%-15s %5d %+9.1f%% ops/s %+9.1f%% p95'
+            % (
+                result['scenario'],
+                result['concurrency'],
+                (result['ops_per_sec'] / old['ops_per_sec'] - 1) * 100,
+                (result['p95_ms'] / old['p95_ms'] - 1) * 100,
+            )
+        )
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ('git', 'rev-parse', '--short', 'HEAD'),
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return
+
+
+async def main(options: argparse.Namespace) -> None:
+    url: str = 'http://%s:%d' % (options.host, options.port)
+    results: list = []
+
+    async with aiohttp.ClientSession() as session:
+        process = await start_mock(session, options, url)
+        await http_client.start()
+        try:
+            print(
+                '%-15s %5s %7s %6s %10s %10s %9s %9s %9s %8s'
+                % (
+                    'scenario', 'conc', 'ops', 'errors', 'ops/s', 'req/s',
+                    'p50 ms', 'p95 ms', 'p99 ms', 'rss MB',
+                )
+            )
+            for scenario in make_scenarios(
+                url, options, tuple(options.levels)
+            ):
+                for concurrency in scenario.levels:
+                    result: dict = await measure(
+                        session, url, scenario, concurrency, options.rounds
+                    )
+                    results.append(result)
+                    print(
+                        '%-15s %5d %7d %6d %10.1f %10.1f %9.1f %9.1f %9.1f '
+                        '%8.1f'
+                        % (
+                            scenario.name,
+                            concurrency,
+                            result['operations'],
+                            result['errors'],
+                            result['ops_per_sec'],
+                            result['requests_per_sec'],
+                            result['p50_ms'],
+                            result['p95_ms'],
+                            result['p99_ms'],
+                            result['peak_rss_mb'],
+                        )
+                    )
+        finally:
+            await http_client.close()
+            await vid_storage.close()
+            process.terminate()
+            process.wait()
+
+    with open(options.output, 'w', encoding='utf-8') as output:
+        json.dump(
+            {
+                'commit': current_commit(),
+                'created_at': dt.datetime.now(dt.timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'options': vars(options),
+                'results': results,
+            },
+            output,
+            indent=2,
+        )
+    print('results are saved to %s' % options.output)
+
+    if options.baseline:
+        compare(results, options.baseline)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--levels', type=int, nargs='+', default=[1, 4, 16, 64],
+        help='numbers of concurrent workers'
+    )
+    parser.add_argument(
+        '--rounds', type=int, default=3,
+        help='operations made by each worker'
+    )
+    parser.add_argument(
+        '--rate', type=float, default=0,
+        help='API rate limit, requests/s, 0 is unlimited'
+    )
+    parser.add_argument('--output', default='bench_collectors.json')
+    parser.add_argument('--baseline', help='results to compare with')
+    add_mock_arguments(parser)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
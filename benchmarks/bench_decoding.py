@@ -0,0 +1,93 @@
+"""
+Benchmark of hh.ru page decoding.
+Compares previous decoding by aiohttp response.json() (body
+decoded to text, then stdlib json) with decode_json and
+selective decode_hh_page: decode time and memory allocated
+while decoding one page and retained by decoded page,
+then time of page turned into VacancyHH objects.
+
+Run: python -m benchmarks.bench_decoding [per_page]
+"""
+import json
+import sys
+import timeit
+import tracemalloc
+
+from benchmarks.fixtures import make_items, make_page
+from vacscoll.decoding import decode_hh_page, decode_json, msgspec
+from vacscoll.models import VacancyHH
+
+
+def legacy_decode(body: bytes) -> dict:
+    """Previous decoding of aiohttp response.json()."""
+    return json.loads(body.decode('utf-8'))
+
+
+def allocated_memory(decode, body: bytes) -> tuple:
+    """Return peak bytes allocated while decoding and retained by page."""
+    tracemalloc.start()
+    page: dict = decode(body)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del page
+    return peak, retained
+
+
+def main(per_page: int) -> None:
+    body: bytes = json.dumps(
+        make_page(make_items(per_page), 0, 20, 2000), ensure_ascii=False
+    ).encode()
+    print(
+        'page of %d items, %d KB, msgspec %s'
+        % (
+            per_page,
+            len(body) // 1024,
+            msgspec.__version__ if msgspec else 'isn\'t installed',
+        )
+    )
+
+    cases: dict = {
+        'legacy': legacy_decode,
+        'decode_json': decode_json,
+        'decode_hh_page': decode_hh_page,
+    }
+
+    results: dict = {}
+    for name, decode in cases.items():
+        decode_time: float = min(
+            timeit.repeat(lambda: decode(body), number=20, repeat=5)
+        ) / 20
+        vacancies_time: float = min(
+            timeit.repeat(
+                lambda: [VacancyHH(item) for item in decode(body)['items']],
+                number=5,
+                repeat=5,
+            )
+        ) / 5
+        results[name] = (
+            decode_time, vacancies_time, *allocated_memory(decode, body)
+        )
+
+    print(
+        '%-15s %10s %8s %12s %12s %14s'
+        % ('', 'decode ms', 'speedup', 'peak KB', 'retained KB',
+           'to models ms')
+    )
+    for name, (decode_time, vacancies_time, peak, retained) in (
+        results.items()
+    ):
+        print(
+            '%-15s %10.2f %7.1fx %12.0f %12.0f %14.2f'
+            % (
+                name,
+                decode_time * 1000,
+                results['legacy'][0] / decode_time,
+                peak / 1024,
+                retained / 1024,
+                vacancies_time * 1000,
+            )
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
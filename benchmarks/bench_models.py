@@ -0,0 +1,54 @@
+"""
+Memory benchmark of vacancy model.
+Compares retained memory of vacancies kept as raw hh.ru items
+(like previous VacancyHH did) with compact VacancyHH objects.
+
+Run: python -m benchmarks.bench_models [count]
+"""
+import gc
+import json
+import sys
+import tracemalloc
+
+from benchmarks.fixtures import make_items
+from vacscoll.models import VacancyHH
+
+
+class RawVacancy:
+    """Vacancy keeping the whole raw item as previous model."""
+
+    def __init__(self, item: dict) -> None:
+        self._vacancy: dict = item
+
+
+def retained_memory(model: type, raw_page: bytes) -> tuple:
+    """Return objects and bytes retained after decoding and wrapping."""
+    gc.collect()
+    tracemalloc.start()
+    vacancies: list = [model(item) for item in json.loads(raw_page)]
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return vacancies, retained
+
+
+def main(count: int) -> None:
+    raw_page: bytes = json.dumps(make_items(count)).encode()
+
+    results: dict = {}
+    for model in (RawVacancy, VacancyHH):
+        vacancies, retained = retained_memory(model, raw_page)
+        results[model.__name__] = retained / len(vacancies)
+        del vacancies
+
+    for name, per_vacancy in results.items():
+        print('%-10s %8.0f bytes per vacancy' % (name, per_vacancy))
+
+    print(
+        'compact model is %.1fx smaller'
+        % (results['RawVacancy'] / results['VacancyHH'])
+    )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark of snippets cleaning.
+Compares previous word-by-word TextProcessor.cleaning_data
+with one-pass cleaning, without snippets cache and with
+cache warmed by previous repeat (snippet seen again).
+
+Run: python -m benchmarks.bench_text [count]
+"""
+import re
+import sys
+import timeit
+
+from benchmarks.fixtures import make_items
+from vacscoll.processors import clean_html, TextProcessor
+
+
+LEGACY_TAG_PATTERN: re.Pattern = re.compile(
+    '<.*?>|&([a-z0-9]+|#[0-9]{1,6}|#x[0-9a-f]{1,6});'
+)
+
+
+def legacy_cleaning_data(strings: str) -> str:
+    """Previous cleaning: regex search and substitution word by word."""
+    if not strings:
+        return
+
+    strings: list = strings.split()
+
+    for i in range(len(strings)):
+        if re.search(LEGACY_TAG_PATTERN, strings[i]):
+            strings[i] = re.sub(LEGACY_TAG_PATTERN, '', strings[i])
+
+    return ' '.join(string for string in strings if string != '')
+
+
+def main(count: int) -> None:
+    snippets: list = [
+        text
+        for item in make_items(count)
+        for text in item['snippet'].values()
+    ]
+    text_processor = TextProcessor()
+    uncached_clean = clean_html.__wrapped__
+
+    cases: dict = {
+        'legacy': lambda: [legacy_cleaning_data(s) for s in snippets],
+        'one-pass': lambda: [uncached_clean(s) for s in snippets],
+        'one-pass warm cache': lambda: [
+            text_processor.cleaning_data(s) for s in snippets
+        ],
+    }
+
+    results: dict = {}
+    for name, case in cases.items():
+        results[name] = min(timeit.repeat(case, number=1, repeat=5))
+
+    for name, seconds in results.items():
+        print(
+            '%-20s %8.2f us per snippet, %.1fx vs legacy'
+            % (
+                name,
+                seconds / len(snippets) * 10 ** 6,
+                results['legacy'] / seconds,
+            )
+        )
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
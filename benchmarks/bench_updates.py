@@ -0,0 +1,118 @@
+"""
+Load test of incoming updates processing.
+Feeds fake updates of several chats to application with
+handler doing storage call and simulated Telegram API call.
+Compares updates processed one at a time with
+ChatOrderedUpdateProcessor and checks that updates
+of each chat are processed in order.
+
+Run: python -m benchmarks.bench_updates [updates] [api_latency_ms]
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from telegram import Update
+from telegram.ext import Application, MessageHandler, filters
+
+from benchmarks.fixtures import OfflineBot
+from benchmarks.post_updates import make_update
+from tgbot.scheduler import ChatOrderedUpdateProcessor
+from vacscoll.db import run_in_storage
+
+
+def save_update(connection: sqlite3.Connection, update_id: int) -> None:
+    """Storage call made by handler."""
+    with connection:
+        connection.execute(
+            'INSERT INTO updates (update_id) VALUES (?)', (update_id, )
+        )
+
+
+async def run_load(
+    processor: ChatOrderedUpdateProcessor | bool,
+    updates: list,
+    api_latency: float,
+    connection: sqlite3.Connection
+) -> tuple:
+    """Process updates, return elapsed seconds and order violations."""
+    processed: dict = {}
+    done = asyncio.Event()
+
+    async def handler(update: Update, context) -> None:
+        await run_in_storage(save_update, connection, update.update_id)
+        await asyncio.sleep(api_latency)
+        processed.setdefault(update.effective_chat.id, []).append(
+            update.update_id
+        )
+        if sum(map(len, processed.values())) == len(updates):
+            done.set()
+
+    application = (
+        Application.builder()
+        .bot(OfflineBot('1:offline'))
+        .concurrent_updates(processor)
+        .build()
+    )
+    application.add_handler(MessageHandler(filters.ALL, handler))
+
+    async with application:
+        await application.start()
+        started: float = time.perf_counter()
+        for update in updates:
+            await application.update_queue.put(
+                Update.de_json(update, application.bot)
+            )
+        await done.wait()
+        elapsed: float = time.perf_counter() - started
+        await application.stop()
+
+    violations: int = sum(
+        ids != sorted(ids) for ids in processed.values()
+    )
+    return elapsed, violations
+
+
+async def main(count: int, api_latency: float) -> None:
+    db_dir: str = tempfile.mkdtemp()
+    connection = sqlite3.connect(
+        os.path.join(db_dir, 'updates.sqlite3'), check_same_thread=False
+    )
+    connection.execute('CREATE TABLE updates (update_id INTEGER)')
+
+    print(
+        '%6s %12s %14s %10s'
+        % ('chats', 'sequential', 'concurrent', 'ordered')
+    )
+    for chats in (1, 4, 16, 64):
+        updates: list = [
+            make_update(i, 10 ** 6 + i % chats, 'text %d' % i)
+            for i in range(count)
+        ]
+        sequential, _ = await run_load(
+            False, updates, api_latency, connection
+        )
+        concurrent, violations = await run_load(
+            ChatOrderedUpdateProcessor(), updates, api_latency, connection
+        )
+        print(
+            '%6d %8.0f u/s %10.0f u/s %10s'
+            % (
+                chats,
+                count / sequential,
+                count / concurrent,
+                'yes' if not violations else 'no (%d)' % violations,
+            )
+        )
+
+    connection.close()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 500,
+        (int(sys.argv[2]) if len(sys.argv) > 2 else 20) / 1000,
+    ))
@@ -0,0 +1,229 @@
+import datetime as dt
+import random
+
+from telegram import User
+from telegram.ext import ExtBot
+
+from vacscoll.constants import HH_DATETIME_FORMAT
+
+
+CITIES: tuple = (
+    ('1', 'Москва'),
+    ('2', 'Санкт-Петербург'),
+    ('3', 'Екатеринбург'),
+    ('4', 'Новосибирск'),
+    ('88', 'Казань'),
+)
+
+EMPLOYMENTS: tuple = (
+    ('full', 'Полная занятость'),
+    ('part', 'Частичная занятость'),
+    ('project', 'Проектная работа'),
+)
+
+EXPERIENCES: tuple = (
+    ('noExperience', 'Нет опыта'),
+    ('between1And3', 'От 1 года до 3 лет'),
+    ('between3And6', 'От 3 до 6 лет'),
+)
+
+SCHEDULES: tuple = (
+    ('fullDay', 'Полный день'),
+    ('remote', 'Удаленная работа'),
+    ('flexible', 'Гибкий график'),
+)
+
+
+def make_item(vid: int, published_at: float, rnd: random.Random) -> dict:
+    """Synthetic vacancy item shaped like hh.ru /vacancies response item."""
+    area_id, area_name = rnd.choice(CITIES)
+    employment_id, employment_name = rnd.choice(EMPLOYMENTS)
+    experience_id, experience_name = rnd.choice(EXPERIENCES)
+    schedule_id, schedule_name = rnd.choice(SCHEDULES)
+    employer_id: int = rnd.randint(1, 50000)
+    salary_from: int = rnd.randrange(50000, 300000, 5000)
+    published: str = dt.datetime.fromtimestamp(
+        published_at, dt.timezone.utc
+    ).strftime(HH_DATETIME_FORMAT)
+
+    return {
+        'id': str(vid),
+        'premium': False,
+        'name': 'Python-разработчик (Backend) #%d' % vid,
+        'department': {'id': '%d-dep' % employer_id, 'name': 'IT'},
+        'has_test': False,
+        'response_letter_required': False,
+        'area': {
+            'id': area_id,
+            'name': area_name,
+            'url': 'https://api.hh.ru/areas/%s' % area_id,
+        },
+        'salary': {
+            'from': salary_from,
+            'to': salary_from + 50000 if rnd.random() < 0.5 else None,
+            'currency': 'RUR',
+            'gross': True,
+        } if rnd.random() < 0.6 else None,
+        'type': {'id': 'open', 'name': 'Открытая'},
+        'address': {
+            'city': area_name,
+            'street': 'улица Льва Толстого',
+            'building': str(rnd.randint(1, 100)),
+            'lat': 55.733 + rnd.random(),
+            'lng': 37.587 + rnd.random(),
+            'description': None,
+            'raw': '%s, улица Льва Толстого' % area_name,
+            'metro': {
+                'station_name': 'Парк культуры',
+                'line_name': 'Сокольническая',
+                'station_id': '1.2',
+                'line_id': '1',
+                'lat': 55.735,
+                'lng': 37.594,
+            },
+            'metro_stations': [],
+            'id': str(rnd.randint(1, 10 ** 7)),
+        },
+        'response_url': None,
+        'sort_point_distance': None,
+        'published_at': published,
+        'created_at': published,
+        'archived': False,
+        'apply_alternate_url': (
+            'https://hh.ru/applicant/vacancy_response?vacancyId=%d' % vid
+        ),
+        'insider_interview': None,
+        'url': 'https://api.hh.ru/vacancies/%d?host=hh.ru' % vid,
+        'alternate_url': 'https://hh.ru/vacancy/%d' % vid,
+        'relations': [],
+        'employer': {
+            'id': str(employer_id),
+            'name': 'ООО Компания %d' % employer_id,
+            'url': 'https://api.hh.ru/employers/%d' % employer_id,
+            'alternate_url': 'https://hh.ru/employer/%d' % employer_id,
+            'logo_urls': {
+                '90': 'https://hhcdn.ru/employer-logo/%d_90.png' % employer_id,
+                '240': (
+                    'https://hhcdn.ru/employer-logo/%d_240.png' % employer_id
+                ),
+                'original': (
+                    'https://hhcdn.ru/employer-logo-original/%d.png'
+                    % employer_id
+                ),
+            },
+            'vacancies_url': (
+                'https://api.hh.ru/vacancies?employer_id=%d' % employer_id
+            ),
+            'accredited_it_employer': False,
+            'trusted': True,
+        },
+        'snippet': {
+            'requirement': (
+                'Опыт коммерческой разработки на <highlighttext>Python'
+                '</highlighttext> от %d лет. Знание Django/FastAPI, '
+                'PostgreSQL &amp; Redis. Понимание принципов REST '
+                '&quot;и&quot; асинхронного программирования.'
+                % rnd.randint(1, 5)
+            ),
+            'responsibility': (
+                'Разработка и поддержка backend-сервисов. Участие в '
+                'проектировании архитектуры сервиса #%d. Code review '
+                '&mdash; написание тестов.' % vid
+            ),
+        },
+        'contacts': None,
+        'schedule': {'id': schedule_id, 'name': schedule_name},
+        'working_days': [],
+        'working_time_intervals': [],
+        'working_time_modes': [],
+        'accept_temporary': False,
+        'professional_roles': [{'id': '96', 'name': 'Программист'}],
+        'accept_incomplete_resumes': False,
+        'experience': {'id': experience_id, 'name': experience_name},
+        'employment': {'id': employment_id, 'name': employment_name},
+        'adv_response_url': None,
+        'is_adv_vacancy': False,
+        'adv_context': None,
+    }
+
+
+def make_items(
+    count: int,
+    first_id: int = 80000000,
+    seed: int = 0
+) -> list:
+    """Synthetic vacancy items published within last 30 days."""
+    rnd = random.Random(seed)
+    now: float = dt.datetime.now().timestamp()
+    return [
+        make_item(
+            first_id + i,
+            now - rnd.randint(0, 30 * 24 * 60 * 60),
+            rnd
+        )
+        for i in range(count)
+    ]
+
+
+def make_page(items: list, page: int, pages: int, found: int) -> dict:
+    """Synthetic hh.ru /vacancies response page."""
+    return {
+        'items': items,
+        'found': found,
+        'pages': pages,
+        'page': page,
+        'per_page': len(items),
+        'clusters': None,
+        'arguments': None,
+        'fixes': None,
+        'suggests': None,
+        'alternate_url': 'https://hh.ru/search/vacancy?page=%d' % page,
+    }
+
+
+def make_areas(regions: int = 80, cities: int = 20) -> dict:
+    """Synthetic hh.ru /areas/113 response with regions and their cities."""
+    return {
+        'id': '113',
+        'parent_id': None,
+        'name': 'Россия',
+        'areas': [
+            {
+                'id': str(area_id),
+                'parent_id': '113',
+                'name': area_name,
+                'areas': [],
+            }
+            for area_id, area_name in CITIES
+        ] + [
+            {
+                'id': str(1000 + region),
+                'parent_id': '113',
+                'name': 'Область %d' % region,
+                'areas': [
+                    {
+                        'id': str(10 ** 5 + region * 1000 + city),
+                        'parent_id': str(1000 + region),
+                        'name': 'Город %d-%d' % (region, city),
+                        'areas': [],
+                    }
+                    for city in range(cities)
+                ],
+            }
+            for region in range(regions)
+        ],
+    }
+
+
+class OfflineBot(ExtBot):
+    """Bot which doesn't connect to Telegram."""
+
+    async def get_me(self, *args, **kwargs) -> User:
+        self._bot_user = User(1, 'Bot', True, username='bot')
+        return self._bot_user
+
+    async def set_webhook(self, *args, **kwargs) -> bool:
+        return True
+
+    async def delete_webhook(self, *args, **kwargs) -> bool:
+        return True
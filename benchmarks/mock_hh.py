@@ -0,0 +1,307 @@
+"""
+Local stand-in of hh.ru API for benchmarks.
+Serves synthetic /vacancies pages and /areas directory with
+configurable number of found vacancies, latency, error rate
+and throttling. Different search texts get different vacancies ids.
+Like hh.ru, search honours date_from and date_to window, order_by,
+experience, employment, schedule, area and only_with_salary, and
+serves no more than 2000 of found vacancies, so large searches
+must be split by time windows.
+Counters of served requests are returned by /stats.
+
+Run: python -m benchmarks.mock_hh [--port 8765] [--found 5000] ...
+"""
+import argparse
+import asyncio
+import bisect
+import json
+import math
+import random
+import sys
+import zlib
+from collections import OrderedDict
+
+from aiohttp import web
+
+from benchmarks.fixtures import make_areas, make_items, make_page
+from vacscoll.models import parse_published_at
+
+
+MAX_RESULTS: int = 2000
+
+PAGES_CACHE_SIZE: int = 64
+
+SEARCH_CACHE_SIZE: int = 256
+
+ID_FILTERS: tuple = ('experience', 'employment', 'schedule', 'area')
+
+
+class MockHH:
+    """aiohttp application imitating hh.ru API."""
+
+    def __init__(
+        self,
+        found: int = 5000,
+        per_page: int = 100,
+        latency: float = 0.02,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: float = 1.0,
+        seed: int = 0,
+    ) -> None:
+        self._per_page = per_page
+        self._latency = latency
+        self._error_rate = error_rate
+        self._throttle_rate = throttle_rate
+        self._retry_after = retry_after
+        self._random = random.Random(seed)
+
+        items: list = make_items(found, 0, seed)
+        self._published: list = sorted(
+            (parse_published_at(item['published_at']), number)
+            for number, item in enumerate(items)
+        )
+        self._items: list = items
+        self._areas: bytes = json.dumps(
+            make_areas(), ensure_ascii=False
+        ).encode()
+        self._searches: OrderedDict = OrderedDict()
+        self._encoded: OrderedDict = OrderedDict()
+        self.stats: dict = {'requests': 0, 'errors': 0, 'throttled': 0}
+
+    def _match(self, item: dict, query: dict) -> bool:
+        """Check item passes filters of search query."""
+        for param in ID_FILTERS:
+            values: tuple = query[param]
+            if values and (item.get(param) or {}).get('id') not in values:
+                return False
+
+        return not query['only_with_salary'] or item.get('salary')
+
+    def _search(self, query: dict) -> list:
+        """
+        Numbers of items found by query: published within its
+        window, in order of publication if asked, else by id.
+        """
+        key: tuple = tuple(sorted(query.items()))
+        if key in self._searches:
+            self._searches.move_to_end(key)
+            return self._searches[key]
+
+        date_from, date_to = query['date_from'], query['date_to']
+        window: list = self._published[
+            bisect.bisect_left(
+                self._published, (date_from, -1)
+            ) if date_from is not None else 0:
+            bisect.bisect_right(
+                self._published, (date_to, math.inf)
+            ) if date_to is not None else len(self._published)
+        ]
+        found: list = [
+            number for _, number in window
+            if self._match(self._items[number], query)
+        ]
+        if query['order_by'] == 'publication_time':
+            found.reverse()
+        else:
+            found.sort()
+
+        self._searches[key] = found
+        if len(self._searches) > SEARCH_CACHE_SIZE:
+            self._searches.popitem(last=False)
+
+        return found
+
+    def _encode_page(self, text: str, query: dict, page: int) -> bytes:
+        """
+        Page of search text. Encoded pages are cached,
+        so mock doesn't spend time on payloads of repeated requests.
+        """
+        key: tuple = (text, tuple(sorted(query.items())), page)
+        if key in self._encoded:
+            self._encoded.move_to_end(key)
+            return self._encoded[key]
+
+        found: list = self._search(query)
+        per_page: int = query['per_page']
+        pages: int = math.ceil(min(len(found), MAX_RESULTS) / per_page)
+        first_id: int = (
+            80000000
+            + zlib.crc32(text.encode()) % 10 ** 4 * len(self._items)
+        )
+        items: list = []
+        for number in found[
+            page * per_page:min((page + 1) * per_page, MAX_RESULTS)
+        ]:
+            vid: int = first_id + number
+            items.append({
+                **self._items[number],
+                'id': str(vid),
+                'alternate_url': 'https://hh.ru/vacancy/%d' % vid,
+            })
+
+        body: bytes = json.dumps(
+            make_page(items, page, pages, len(found)),
+            ensure_ascii=False
+        ).encode()
+
+        self._encoded[key] = body
+        if len(self._encoded) > PAGES_CACHE_SIZE:
+            self._encoded.popitem(last=False)
+
+        return body
+
+    async def _imitate_api(self) -> web.Response | None:
+        """Wait for latency, return error or throttling response if drawn."""
+        self.stats['requests'] += 1
+        await asyncio.sleep(self._latency * self._random.uniform(0.5, 1.5))
+
+        draw: float = self._random.random()
+        if draw < self._throttle_rate:
+            self.stats['throttled'] += 1
+            return web.json_response(
+                {'errors': [{'type': 'too_many_requests'}]},
+                status=429,
+                headers={'Retry-After': '%g' % self._retry_after},
+            )
+
+        if draw < self._throttle_rate + self._error_rate:
+            self.stats['errors'] += 1
+            return web.json_response(
+                {'errors': [{'type': 'internal_error'}]}, status=500
+            )
+
+    def _parse_query(self, request: web.Request) -> dict | None:
+        """Search parameters of request, None if they are invalid."""
+        try:
+            return {
+                'date_from': parse_published_at(
+                    request.query.get('date_from')
+                ),
+                'date_to': parse_published_at(request.query.get('date_to')),
+                'order_by': request.query.get('order_by'),
+                'per_page': int(
+                    request.query.get('per_page', self._per_page)
+                ),
+                'only_with_salary': (
+                    request.query.get('only_with_salary') == 'true'
+                ),
+                **{
+                    param: tuple(sorted(request.query.getall(param, [])))
+                    for param in ID_FILTERS
+                },
+            }
+        except ValueError:
+            return
+
+    async def vacancies(self, request: web.Request) -> web.Response:
+        if (response := await self._imitate_api()) is not None:
+            return response
+
+        query: dict | None = self._parse_query(request)
+        if query is None or not 0 < query['per_page'] <= 100:
+            return web.json_response(
+                {'errors': [{'type': 'bad_argument'}]}, status=400
+            )
+
+        return web.Response(
+            body=self._encode_page(
+                request.query.get('text', ''),
+                query,
+                int(request.query.get('page', 0))
+            ),
+            content_type='application/json',
+        )
+
+    async def areas(self, request: web.Request) -> web.Response:
+        if (response := await self._imitate_api()) is not None:
+            return response
+
+        return web.Response(body=self._areas, content_type='application/json')
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/vacancies', self.vacancies)
+        app.router.add_get('/areas/{area_id}', self.areas)
+        app.router.add_get('/stats', self.get_stats)
+        return app
+
+
+MOCK_OPTIONS: tuple = (
+    'host',
+    'port',
+    'found',
+    'per_page',
+    'latency',
+    'error_rate',
+    'throttle_rate',
+    'retry_after',
+    'seed',
+)
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add options of mock API to command line parser."""
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument(
+        '--found', type=int, default=5000,
+        help='vacancies found by each search text'
+    )
+    parser.add_argument('--per-page', type=int, default=100)
+    parser.add_argument(
+        '--latency', type=float, default=20, help='mean latency, ms'
+    )
+    parser.add_argument(
+        '--error-rate', type=float, default=0.0,
+        help='share of requests answered with 500'
+    )
+    parser.add_argument(
+        '--throttle-rate', type=float, default=0.0,
+        help='share of requests answered with 429'
+    )
+    parser.add_argument(
+        '--retry-after', type=float, default=1.0,
+        help='Retry-After of throttled responses, s'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def mock_command(options: argparse.Namespace) -> list:
+    """Command starting mock API with given options."""
+    command: list = [sys.executable, '-m', 'benchmarks.mock_hh']
+    for option in MOCK_OPTIONS:
+        command.extend((
+            '--' + option.replace('_', '-'), str(getattr(options, option))
+        ))
+
+    return command
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    add_mock_arguments(parser)
+    options = parser.parse_args()
+    mock = MockHH(
+        options.found,
+        options.per_page,
+        options.latency / 1000,
+        options.error_rate,
+        options.throttle_rate,
+        options.retry_after,
+        options.seed,
+    )
+    web.run_app(
+        mock.make_app(),
+        host=options.host,
+        port=options.port,
+        print=None,
+        access_log=None,
+    )
+
+
+if __name__ == '__main__':
+    main()
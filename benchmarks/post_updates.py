@@ -0,0 +1,204 @@
+"""
+Local check of webhook mode.
+Starts webhook server of offline application, which doesn't
+connect to Telegram, with ChatOrderedUpdateProcessor, posts fake
+Telegram updates to it concurrently and checks that all of them
+are accepted and processed, and that update with wrong secret
+token is rejected.
+With --url updates are posted to webhook of running bot instead,
+its WEBHOOK_SECRET must be set in environment. Fake users don't
+exist, so bot replies to them fail in its log.
+
+Run: python -m benchmarks.post_updates [--count 1000]
+     [--concurrency 50] [--url http://127.0.0.1:8443/telegram]
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+import aiohttp
+from telegram import Update
+from telegram.ext import Application, MessageHandler, filters
+
+from benchmarks.fixtures import OfflineBot
+from tgbot.config import WEBHOOK_PATH, WEBHOOK_SECRET
+from tgbot.scheduler import ChatOrderedUpdateProcessor
+
+
+LOCAL_LISTEN: str = '127.0.0.1'
+
+LOCAL_PORT: int = 8787
+
+PROCESSING_TIMEOUT: int = 30
+
+
+SECRET_HEADER: str = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+def make_update(update_id: int, user_id: int, text: str) -> dict:
+    """Fake Telegram update with private text message."""
+    user: dict = {
+        'id': user_id,
+        'is_bot': False,
+        'first_name': 'User %d' % user_id,
+    }
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {**user, 'type': 'private'},
+            'from': user,
+            'text': text,
+            'entities': (
+                [{'type': 'bot_command', 'offset': 0, 'length': len(text)}]
+                if text.startswith('/') else []
+            ),
+        },
+    }
+
+
+async def post_update(
+    session: aiohttp.ClientSession,
+    url: str,
+    secret: str,
+    update: dict
+) -> tuple:
+    """Post update, return response status and latency."""
+    started: float = time.perf_counter()
+    async with session.post(
+        url, json=update, headers={SECRET_HEADER: secret}
+    ) as response:
+        await response.read()
+        return response.status, time.perf_counter() - started
+
+
+async def post_updates(
+    url: str,
+    secret: str,
+    count: int,
+    concurrency: int
+) -> tuple:
+    """
+    Post updates of several users concurrently and one more
+    with wrong secret token. Return post results, elapsed seconds
+    and status of rejected update.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited_post(update: dict) -> tuple:
+        async with semaphore:
+            return await post_update(session, url, secret, update)
+
+    async with aiohttp.ClientSession() as session:
+        started: float = time.perf_counter()
+        results: list = await asyncio.gather(*(
+            limited_post(make_update(i, 10 ** 6 + i % 100, '/start'))
+            for i in range(count)
+        ))
+        elapsed: float = time.perf_counter() - started
+
+        rejected, _ = await post_update(
+            session, url, secret + 'wrong', make_update(count, 1, '/start')
+        )
+
+    return results, elapsed, rejected
+
+
+async def post_to_local_webhook(count: int, concurrency: int) -> tuple:
+    """
+    Post updates to webhook of offline application.
+    Return post results, elapsed seconds, status of rejected
+    update and number of processed updates.
+    """
+    processed: list = []
+    done = asyncio.Event()
+
+    async def handler(update: Update, context) -> None:
+        processed.append(update.update_id)
+        if len(processed) == count:
+            done.set()
+
+    application = (
+        Application.builder()
+        .bot(OfflineBot('1:offline'))
+        .concurrent_updates(ChatOrderedUpdateProcessor())
+        .build()
+    )
+    application.add_handler(MessageHandler(filters.ALL, handler))
+
+    async with application:
+        await application.updater.start_webhook(
+            listen=LOCAL_LISTEN,
+            port=LOCAL_PORT,
+            url_path=WEBHOOK_PATH,
+            secret_token=WEBHOOK_SECRET,
+        )
+        await application.start()
+        try:
+            results, elapsed, rejected = await post_updates(
+                'http://%s:%d/%s' % (LOCAL_LISTEN, LOCAL_PORT, WEBHOOK_PATH),
+                WEBHOOK_SECRET,
+                count,
+                concurrency,
+            )
+            try:
+                await asyncio.wait_for(done.wait(), PROCESSING_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+        finally:
+            await application.updater.stop()
+            await application.stop()
+
+    return results, elapsed, rejected, len(processed)
+
+
+async def main(options: argparse.Namespace) -> None:
+    processed: int | None = None
+    if options.url:
+        results, elapsed, rejected = await post_updates(
+            options.url, WEBHOOK_SECRET, options.count, options.concurrency
+        )
+    else:
+        results, elapsed, rejected, processed = await post_to_local_webhook(
+            options.count, options.concurrency
+        )
+
+    count: int = options.count
+    statuses: list = [status for status, _ in results]
+    latencies: list = sorted(latency for _, latency in results)
+    print('accepted %d of %d updates' % (statuses.count(200), count))
+    print('%.0f updates/s' % (count / elapsed))
+    print(
+        'latency p50 %.1f ms, p95 %.1f ms'
+        % (
+            statistics.median(latencies) * 1000,
+            latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        )
+    )
+    print('wrong secret token status %d' % rejected)
+    if processed is not None:
+        print('processed %d of %d updates' % (processed, count))
+
+    if (
+        statuses.count(200) != count
+        or rejected != 403
+        or processed not in (None, count)
+    ):
+        sys.exit(1)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument(
+        '--url', help='webhook of running bot, local one by default'
+    )
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(parse_args()))
@@ -1,22 +1,129 @@
 from telegram import Update
-from telegram.ext import Application
+from telegram.ext import Application, PersistenceInput, PicklePersistence
 
-from tgbot.config import TELEGRAM_TOKEN, setup_logging
-from tgbot.handlers import create_conversation_handler
+from tgbot.config import (
+    METRICS_LISTEN,
+    METRICS_LOG_INTERVAL,
+    METRICS_PORT,
+    setup_logging,
+    TELEGRAM_TOKEN,
+    WEBHOOK_LISTEN,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+)
+from tgbot.constants import (
+    AREAS_REFRESH_INTERVAL,
+    BOT_STATE_FILE,
+    PURGE_INTERVAL,
+    WEBHOOK_MAX_CONNECTIONS,
+)
+from tgbot.handlers import (
+    create_conversation_handler,
+    create_subscription_handlers,
+)
+from tgbot.jobs import (
+    expire_sessions,
+    log_metrics,
+    purge_storage,
+    refresh_areas_directory,
+    schedule_saved_search,
+)
+from tgbot.monitoring import metrics_server
+from tgbot.scheduler import ChatOrderedUpdateProcessor, OutboundScheduler
+from tgbot.sessions import vacancy_sessions
+from tgbot.subscriptions import subscriptions
 from tgbot.utils import check_tokens
+from vacscoll.client import http_client
+from vacscoll.metrics import metrics
+from vacscoll.workers import close_storage, load_areas, warm_seen_ids
+
+
+async def post_init(application: Application) -> None:
+    """Open shared resources and schedule background jobs."""
+    if METRICS_PORT or METRICS_LOG_INTERVAL:
+        metrics.enable()
+    if METRICS_PORT:
+        await metrics_server.start(METRICS_LISTEN, METRICS_PORT)
+
+    await http_client.start()
+    await warm_seen_ids()
+    await load_areas()
+
+    application.job_queue.run_repeating(
+        purge_storage, interval=PURGE_INTERVAL
+    )
+    application.job_queue.run_repeating(
+        expire_sessions, interval=PURGE_INTERVAL
+    )
+    application.job_queue.run_repeating(
+        refresh_areas_directory, interval=AREAS_REFRESH_INTERVAL
+    )
+    if METRICS_LOG_INTERVAL:
+        application.job_queue.run_repeating(
+            log_metrics, interval=METRICS_LOG_INTERVAL
+        )
+    for query_key in await subscriptions.queries():
+        schedule_saved_search(application.job_queue, query_key)
+
+
+async def post_shutdown(application: Application) -> None:
+    """Release shared resources after bot stopped."""
+    await http_client.close()
+    await vacancy_sessions.close()
+    await subscriptions.close()
+    await close_storage()
+    await metrics_server.close()
+
+
+def run_webhook(application: Application) -> None:
+    """
+    Serve updates posted by Telegram to embedded web server.
+    Requests without secret token are rejected. On shutdown
+    server stops accepting updates and received ones are processed.
+    """
+    application.run_webhook(
+        listen=WEBHOOK_LISTEN,
+        port=WEBHOOK_PORT,
+        url_path=WEBHOOK_PATH,
+        webhook_url=WEBHOOK_URL.rstrip('/') + '/' + WEBHOOK_PATH,
+        secret_token=WEBHOOK_SECRET,
+        max_connections=WEBHOOK_MAX_CONNECTIONS,
+        allowed_updates=Update.ALL_TYPES,
+    )
 
 
 def main() -> None:
     """Run the bot."""
     check_tokens(TELEGRAM_TOKEN)
 
-    application = Application.builder().token(TELEGRAM_TOKEN).build()
+    persistence = PicklePersistence(
+        BOT_STATE_FILE,
+        store_data=PersistenceInput(
+            bot_data=False, chat_data=False, callback_data=False
+        ),
+    )
+    application = (
+        Application.builder()
+        .token(TELEGRAM_TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .persistence(persistence)
+        .rate_limiter(OutboundScheduler())
+        .concurrent_updates(ChatOrderedUpdateProcessor())
+        .build()
+    )
 
     conv_handler = create_conversation_handler()
 
     application.add_handler(conv_handler)
+    application.add_handlers(create_subscription_handlers())
 
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    if WEBHOOK_URL:
+        run_webhook(application)
+    else:
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,45 @@
+from vacscoll.bloom import BloomFilter, SeenIDFilter
+
+
+def test_added_keys_are_present():
+    bloom = BloomFilter(1000, 0.01)
+    bloom.update(range(1000))
+    assert all(key in bloom for key in range(1000))
+
+
+def test_false_positive_rate_is_near_error_rate():
+    bloom = BloomFilter(10000, 0.01)
+    bloom.update(range(10000))
+    false_positives = sum(
+        key in bloom for key in range(10000, 20000)
+    )
+    assert false_positives < 10000 * 0.02
+
+
+def test_repeated_adds_are_counted_once():
+    bloom = BloomFilter(1000, 0.01)
+    for _ in range(5):
+        bloom.update(range(100))
+    assert len(bloom) == 100
+    assert bloom.stats()['items'] == 100
+
+
+def test_repeated_ids_dont_hide_stale_share():
+    seen = SeenIDFilter(1000, 0.01, stale_share=0.2)
+    for _ in range(10):
+        seen.add(range(100))
+    seen.mark_stale(30)
+    assert seen.needs_rebuild
+
+
+def test_rebuild_drops_stale_ids():
+    seen = SeenIDFilter(1000, 0.01, stale_share=0.2)
+    seen.add(range(100))
+    seen.discard(range(50, 100))
+    assert seen.needs_rebuild
+
+    seen.rebuild(range(50))
+    assert seen.ready
+    assert not seen.needs_rebuild
+    assert seen.candidates(range(50)) == list(range(50))
+    assert len(seen.candidates(range(50, 100))) < 5
@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from vacscoll.breakers import CircuitBreaker
+from vacscoll.client import HTTPClient
+from vacscoll.exceptions import CircuitOpenException, RequestFailedException
+from vacscoll.limiters import RateLimiter
+
+
+def half_open_breaker() -> CircuitBreaker:
+    """Breaker opened by failure whose recovery timeout has passed."""
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+    breaker._opened_at -= 60
+    assert breaker.state == 'half-open'
+    return breaker
+
+
+async def serve(handler) -> tuple:
+    """Start local server answering every GET by handler."""
+    app = web.Application()
+    app.router.add_get('/', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port: int = runner.addresses[0][1]
+    return runner, 'http://127.0.0.1:%d/' % port
+
+
+async def get_json(handler, breaker: CircuitBreaker, **kwargs) -> dict:
+    runner, url = await serve(handler)
+    client = HTTPClient(retries=1)
+    try:
+        return await client.get_json(url, breaker=breaker, **kwargs)
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+
+async def throttle(request: web.Request) -> web.Response:
+    return web.Response(status=429)
+
+
+async def ok(request: web.Request) -> web.Response:
+    return web.json_response({'ok': True})
+
+
+def test_throttled_trial_opens_breaker_again():
+    breaker = half_open_breaker()
+
+    with pytest.raises(RequestFailedException):
+        asyncio.run(get_json(throttle, breaker))
+    assert breaker.state == 'open'
+    assert not breaker._trial
+
+
+def test_throttled_trial_with_limiter_isnt_stuck():
+    breaker = half_open_breaker()
+    limiter = RateLimiter(100, 1)
+
+    with pytest.raises(CircuitOpenException):
+        asyncio.run(get_json(throttle, breaker, limiter=limiter))
+    assert not breaker._trial
+
+    breaker._opened_at -= 60
+    assert asyncio.run(get_json(ok, breaker)) == {'ok': True}
+    assert breaker.state == 'closed'
+
+
+def test_cancelled_trial_is_released():
+    breaker = half_open_breaker()
+
+    async def hang(request: web.Request) -> web.Response:
+        await asyncio.sleep(1)
+        return web.json_response({})
+
+    async def cancel_trial() -> None:
+        task = asyncio.create_task(get_json(hang, breaker))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_trial())
+    assert not breaker._trial
+    assert breaker.state == 'half-open'
+
+    assert asyncio.run(get_json(ok, breaker)) == {'ok': True}
+    assert breaker.state == 'closed'
+
+
+def test_open_breaker_rejects_requests():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+    breaker.record_failure()
+
+    with pytest.raises(CircuitOpenException):
+        asyncio.run(get_json(ok, breaker))
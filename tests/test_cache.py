@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+
+from vacscoll.cache import SearchCache
+
+
+def counting_fetch(value, delay: float = 0.0) -> tuple:
+    """Fetch returning value and list counting its calls."""
+    calls: list = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value
+
+    return fetch, calls
+
+
+def test_concurrent_joins_share_one_fetch():
+    async def run() -> tuple:
+        cache = SearchCache()
+        fetch, calls = counting_fetch([1, 2], delay=0.05)
+        first, first_started = cache.join('key', fetch)
+        second, second_started = cache.join('key', fetch)
+        values = await asyncio.gather(first, second)
+        return values, calls, first_started, second_started, cache.stats()
+
+    values, calls, first_started, second_started, stats = asyncio.run(run())
+
+    assert values == [[1, 2], [1, 2]]
+    assert len(calls) == 1
+    assert first_started and not second_started
+    assert stats['coalesced'] == 1
+    assert stats['in_flight'] == 0
+
+
+def test_fetched_value_is_cached_until_ttl():
+    async def run() -> list:
+        cache = SearchCache(ttl=0.05)
+        fetch, calls = counting_fetch([1])
+        await cache.get('key', fetch)
+        await cache.get('key', fetch)
+        time.sleep(0.06)
+        await cache.get('key', fetch)
+        return calls
+
+    assert len(asyncio.run(run())) == 2
+
+
+def test_incomplete_and_failed_results_arent_cached():
+    async def failing():
+        raise RuntimeError('failed')
+
+    async def run() -> tuple:
+        cache = SearchCache()
+        fetch, calls = counting_fetch([1])
+        awaitable, _ = cache.join('key', fetch, lambda: False)
+        await awaitable
+        awaitable, _ = cache.join('key', fetch, lambda: False)
+        await awaitable
+
+        with pytest.raises(RuntimeError):
+            await cache.get('failed', failing)
+        return calls, cache.stats()
+
+    calls, stats = asyncio.run(run())
+
+    assert len(calls) == 2
+    assert stats['size'] == 0
+    assert stats['in_flight'] == 0
+
+
+def test_least_recently_used_result_is_evicted_by_size():
+    async def run() -> SearchCache:
+        cache = SearchCache(max_size=2)
+        for key in ('a', 'b'):
+            await cache.get(key, counting_fetch([key])[0])
+        await cache.get('a', counting_fetch(['new a'])[0])
+        await cache.get('c', counting_fetch(['c'])[0])
+        return cache
+
+    cache = asyncio.run(run())
+
+    assert len(cache) == 2
+    assert cache._lookup('a') == ['a']
+    assert cache._lookup('b') is None
+
+
+def test_cache_is_bounded_by_number_of_vacancies():
+    async def run() -> SearchCache:
+        cache = SearchCache(max_vacancies=10)
+        await cache.get('a', counting_fetch(list(range(6)))[0])
+        await cache.get('b', counting_fetch(list(range(6)))[0])
+        await cache.get('huge', counting_fetch(list(range(11)))[0])
+        return cache
+
+    cache = asyncio.run(run())
+
+    assert cache.stats()['vacancies'] == 6
+    assert cache._lookup('a') is None
+    assert cache._lookup('b') is not None
+    assert cache._lookup('huge') is None
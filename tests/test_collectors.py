@@ -0,0 +1,115 @@
+import asyncio
+import math
+
+import pytest
+from aiohttp import web
+
+from benchmarks.mock_hh import MockHH
+from vacscoll.bloom import SeenIDFilter
+from vacscoll.breakers import CircuitBreaker
+from vacscoll.client import http_client
+from vacscoll.collectors import VacancyHHCollector
+from vacscoll.db import VIDStorage
+from vacscoll.filters import VacancyFilters
+
+
+@pytest.fixture
+def storage(tmp_path) -> VIDStorage:
+    storage = VIDStorage(
+        SeenIDFilter(10000, 0.01), str(tmp_path / 'vacancies.sqlite3')
+    )
+    yield storage
+    asyncio.run(storage.close())
+
+
+def collector(
+    url: str,
+    storage: VIDStorage,
+    filters: VacancyFilters | None = None
+) -> VacancyHHCollector:
+    return VacancyHHCollector(
+        url,
+        'vacancies',
+        {'text': 'python', 'per_page': '100'},
+        filters,
+        limiter=None,
+        breaker=CircuitBreaker(),
+        cache=None,
+        storage=storage,
+    )
+
+
+async def with_mock(mock: MockHH, operation):
+    """Run operation with url of mock API served locally."""
+    runner = web.AppRunner(mock.make_app())
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    await http_client.start()
+    try:
+        return await operation('http://127.0.0.1:%d' % runner.addresses[0][1])
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+
+def test_search_over_results_limit_is_split_by_windows(storage):
+    mock = MockHH(found=4500, latency=0)
+
+    async def run(url: str) -> tuple:
+        vacs_collector = collector(url, storage)
+        return await vacs_collector.run(), vacs_collector.failures
+
+    vacancies, failures = asyncio.run(with_mock(mock, run))
+
+    assert failures == []
+    assert len({vac.id for vac in vacancies}) == len(vacancies) == 4500
+    assert mock.stats['requests'] > 45
+
+
+def test_search_within_results_limit_isnt_split(storage):
+    mock = MockHH(found=4500, latency=0)
+    filters = VacancyFilters(experience={'noExperience'})
+
+    async def run(url: str) -> list:
+        return await collector(url, storage, filters).run()
+
+    vacancies = asyncio.run(with_mock(mock, run))
+
+    assert 0 < len(vacancies) <= 2000
+    assert mock.stats['requests'] == math.ceil(len(vacancies) / 100)
+
+
+def test_next_run_requests_only_vacancies_after_watermark(storage):
+    mock = MockHH(found=500, latency=0)
+
+    async def run(url: str) -> tuple:
+        first: list = await collector(url, storage).run()
+        requests: int = mock.stats['requests']
+        second: list = await collector(url, storage).run()
+        return first, second, mock.stats['requests'] - requests
+
+    first, second, requests = asyncio.run(with_mock(mock, run))
+
+    assert len(first) == 500
+    assert second == []
+    assert requests == 1
+
+
+def test_abandoned_stream_doesnt_move_watermark(storage):
+    mock = MockHH(found=500, latency=0)
+
+    async def run(url: str) -> tuple:
+        vacs_collector = collector(url, storage)
+        stream = vacs_collector.stream()
+        first_page: list = await anext(stream)
+        await stream.aclose()
+        watermark = storage.load_watermark(vacs_collector.watermark_key())
+
+        rest: list = await collector(url, storage).run()
+        return first_page, watermark, rest
+
+    first_page, watermark, rest = asyncio.run(with_mock(mock, run))
+
+    assert watermark is None
+    assert len(first_page) + len(rest) == 500
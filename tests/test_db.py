@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from vacscoll.bloom import SeenIDFilter
+from vacscoll.db import run_in_storage, VIDStorage
+
+
+class StoredVacancy:
+
+    def __init__(self, vid: int) -> None:
+        self.id = vid
+
+
+@pytest.fixture
+def storage(tmp_path) -> VIDStorage:
+    storage = VIDStorage(
+        SeenIDFilter(1000, 0.01), str(tmp_path / 'vacancies.sqlite3')
+    )
+    yield storage
+    asyncio.run(storage.close())
+
+
+def test_saved_ids_are_loaded(storage):
+    storage.save([StoredVacancy(vid) for vid in range(5)])
+
+    assert storage.load([3, 4, 5, 6]) == {3, 4}
+
+
+def test_cleaned_ids_are_stale_in_seen_filter(storage):
+    storage.save([StoredVacancy(vid) for vid in range(5)])
+    storage.warm_seen_filter()
+    storage.clean([0, 1])
+
+    assert storage.load(range(5)) == {2, 3, 4}
+    assert storage._seen_filter.stats()['stale'] == 2
+
+
+def test_watermark_is_saved_and_lowered_only_back(storage):
+    assert storage.load_watermark('query') is None
+
+    storage.save_watermark('query', 200.0)
+    storage.lower_watermark('query', 300.0)
+    assert storage.load_watermark('query') == 200.0
+
+    storage.lower_watermark('query', 100.0)
+    assert storage.load_watermark('query') == 100.0
+    assert storage.load_watermark('other query') is None
+
+
+def test_expired_watermark_isnt_loaded(storage):
+    storage.save_watermark('query', 200.0)
+    storage._max_age = 0
+
+    assert storage.load_watermark('query') is None
+
+
+def test_storage_closes_in_storage_thread(storage):
+    async def run() -> None:
+        await run_in_storage(storage.prepare)
+        await storage.close()
+
+    asyncio.run(run())
+    assert storage._connection is None
@@ -0,0 +1,66 @@
+import itertools
+
+from vacscoll.collectors import VacancyHHCollector
+from vacscoll.filters import VacancyFilters
+
+
+SEARCH_FILTERS: list = [
+    None,
+    VacancyFilters(experience={'between3And6'}),
+    VacancyFilters(experience={'between3And6', 'moreThan6'}),
+    VacancyFilters(experience={'between1And3', 'moreThan6'}),
+    VacancyFilters(experience={'between1And3', 'between3And6', 'moreThan6'}),
+    VacancyFilters(schedule={'remote'}),
+]
+
+
+def item(experience: str) -> dict:
+    return {'id': '1', 'experience': {'id': experience}}
+
+
+def test_single_experience_is_query_parameter():
+    filters = VacancyFilters(experience={'moreThan6'}, salary=100000)
+    assert filters.to_params() == {
+        'experience': 'moreThan6', 'salary': '100000'
+    }
+    assert filters.predicate() is None
+    assert filters.predicate_key() == ()
+
+
+def test_several_experience_values_are_checked_by_predicate():
+    filters = VacancyFilters(experience={'between3And6', 'moreThan6'})
+    predicate = filters.predicate()
+    assert 'experience' not in filters.to_params()
+    assert predicate(item('moreThan6'))
+    assert not predicate(item('noExperience'))
+    assert not predicate({'id': '1', 'experience': None})
+
+
+def test_filters_with_different_results_have_different_keys():
+    collectors: list = [
+        VacancyHHCollector.for_query('python', '1', filters)
+        for filters in SEARCH_FILTERS
+    ]
+    for first, second in itertools.combinations(collectors, 2):
+        assert first.cache_key() != second.cache_key()
+        assert first.watermark_key() != second.watermark_key()
+
+
+def test_equal_filters_share_key():
+    first = VacancyHHCollector.for_query(
+        'Python', '1', VacancyFilters(experience={'moreThan6', 'between3And6'})
+    )
+    second = VacancyHHCollector.for_query(
+        'python', '1', VacancyFilters(experience={'between3And6', 'moreThan6'})
+    )
+    assert first.cache_key() == second.cache_key()
+
+
+def test_unfiltered_key_is_unchanged():
+    collector = VacancyHHCollector.for_query('python')
+    assert collector.cache_key() == (
+        'VacancyHHCollector',
+        collector._url,
+        'vacancies',
+        (('no_magic', 'true'), ('per_page', '100'), ('text', 'python')),
+    )
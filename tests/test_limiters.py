@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+import pytest
+
+from vacscoll.limiters import RateLimiter
+
+
+async def acquire_times(limiter: RateLimiter, count: int) -> list:
+    started: float = time.monotonic()
+    times: list = []
+    for _ in range(count):
+        await limiter.acquire()
+        times.append(time.monotonic() - started)
+    return times
+
+
+def test_burst_is_allowed_at_once_then_rate_is_kept():
+    limiter = RateLimiter(20, burst=3)
+    times = asyncio.run(acquire_times(limiter, 5))
+
+    assert times[2] < 0.02
+    assert times[4] >= 0.09
+
+
+def test_invalid_rate_and_burst_are_rejected():
+    with pytest.raises(ValueError):
+        RateLimiter(0)
+    with pytest.raises(ValueError):
+        RateLimiter(1, burst=0)
+
+
+def test_throttling_decreases_rate_multiplicatively_to_minimum():
+    limiter = RateLimiter(8, min_rate=1, decrease_factor=0.5)
+
+    limiter.slow_down()
+    assert limiter.rate == 4
+    for _ in range(5):
+        limiter.slow_down()
+    assert limiter.rate == 1
+
+
+def test_clean_responses_increase_rate_additively_to_maximum():
+    limiter = RateLimiter(2, min_rate=0.5, increase_step=0.5)
+    limiter.slow_down()
+    limiter.slow_down()
+    assert limiter.rate == 0.5
+
+    limiter.speed_up()
+    assert limiter.rate == 1
+    for _ in range(10):
+        limiter.speed_up()
+    assert limiter.rate == 2
+
+
+def test_retry_after_holds_requests():
+    limiter = RateLimiter(100, burst=10)
+    limiter.slow_down(retry_after=0.1)
+    times = asyncio.run(acquire_times(limiter, 1))
+
+    assert times[0] >= 0.09
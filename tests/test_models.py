@@ -0,0 +1,43 @@
+import datetime as dt
+import types
+
+import pytest
+
+from vacscoll import models
+from vacscoll.models import parse_published_at
+
+
+# Publication time as hh.ru API returns it.
+HH_PUBLISHED_AT: str = '2023-08-15T12:34:56+0300'
+
+HH_TIMESTAMP: float = dt.datetime(
+    2023, 8, 15, 9, 34, 56, tzinfo=dt.timezone.utc
+).timestamp()
+
+
+class Py310Datetime(dt.datetime):
+    """Datetime with ISO parser rejecting offset without colon."""
+
+    @classmethod
+    def fromisoformat(cls, date_string: str) -> dt.datetime:
+        if date_string[-5] in '+-' and ':' not in date_string[-5:]:
+            raise ValueError('Invalid isoformat string: %r' % date_string)
+        return super().fromisoformat(date_string)
+
+
+def test_hh_published_at():
+    assert parse_published_at(HH_PUBLISHED_AT) == HH_TIMESTAMP
+
+
+def test_hh_published_at_without_iso_offset_support(monkeypatch):
+    monkeypatch.setattr(
+        models, 'dt', types.SimpleNamespace(datetime=Py310Datetime)
+    )
+    assert parse_published_at(HH_PUBLISHED_AT) == HH_TIMESTAMP
+
+
+@pytest.mark.parametrize(
+    'published_at', [None, '', '2023-08-15T12:34:56', 'yesterday']
+)
+def test_invalid_published_at(published_at):
+    assert parse_published_at(published_at) is None
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+from telegram import Update
+from telegram.error import RetryAfter
+
+from benchmarks.post_updates import make_update
+from tgbot.scheduler import ChatOrderedUpdateProcessor, OutboundScheduler
+
+
+def update(update_id: int, chat_id: int) -> Update:
+    return Update.de_json(make_update(update_id, chat_id, 'text'), None)
+
+
+async def process(processor: ChatOrderedUpdateProcessor, updates: list):
+    """Process updates as application does, each in own task."""
+    await asyncio.gather(*(
+        processor.process_update(chat_update, coroutine)
+        for chat_update, coroutine in updates
+    ))
+
+
+def test_updates_of_chat_are_processed_in_order():
+    processed: list = []
+
+    async def handle(update_id: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        processed.append(update_id)
+
+    updates: list = [
+        (update(i, 1), handle(i, 0.01 * (5 - i))) for i in range(5)
+    ]
+    asyncio.run(process(ChatOrderedUpdateProcessor(4), updates))
+
+    assert processed == list(range(5))
+
+
+def test_busy_chat_doesnt_hold_other_chats():
+    processed: list = []
+
+    async def handle(update_id: int, delay: float) -> None:
+        await asyncio.sleep(delay)
+        processed.append(update_id)
+
+    updates: list = [
+        (update(i, 1), handle(i, 0.02)) for i in range(5)
+    ] + [(update(5, 2), handle(5, 0))]
+    asyncio.run(process(ChatOrderedUpdateProcessor(2), updates))
+
+    assert processed[0] == 5
+    assert processed[1:] == list(range(5))
+
+
+def test_failed_update_doesnt_stop_chat():
+    processed: list = []
+
+    async def handle(update_id: int) -> None:
+        if update_id == 1:
+            raise RuntimeError('failed')
+        processed.append(update_id)
+
+    updates: list = [(update(i, 1), handle(i)) for i in range(3)]
+    asyncio.run(process(ChatOrderedUpdateProcessor(2), updates))
+
+    assert processed == [0, 2]
+
+
+def send(scheduler: OutboundScheduler, callback, data: dict):
+    return scheduler.process_request(
+        callback, (), {}, 'sendMessage', data, None
+    )
+
+
+def test_request_is_retried_after_flood_control():
+    calls: list = []
+
+    async def callback() -> str:
+        calls.append(1)
+        if len(calls) == 1:
+            raise RetryAfter(0.01)
+        return 'sent'
+
+    scheduler = OutboundScheduler(max_retries=2)
+    result = asyncio.run(send(scheduler, callback, {'chat_id': 1}))
+
+    assert result == 'sent'
+    assert len(calls) == 2
+
+
+def test_flood_control_is_raised_after_retries():
+    async def callback() -> None:
+        raise RetryAfter(0.01)
+
+    scheduler = OutboundScheduler(max_retries=1)
+    with pytest.raises(RetryAfter):
+        asyncio.run(send(scheduler, callback, {'chat_id': 1}))
+
+
+def test_requests_to_chat_are_paced_by_chat_rate():
+    sent: list = []
+
+    async def run() -> None:
+        loop = asyncio.get_running_loop()
+        scheduler = OutboundScheduler(chat_rate=20, chat_burst=1)
+
+        async def callback() -> None:
+            sent.append(loop.time())
+
+        await asyncio.gather(*(
+            send(scheduler, callback, {'chat_id': 1}) for _ in range(3)
+        ))
+        await send(scheduler, callback, {'chat_id': 2})
+
+    asyncio.run(run())
+
+    assert sent[2] - sent[0] >= 0.09
+    assert sent[3] - sent[2] < 0.04
@@ -0,0 +1,95 @@
+import asyncio
+import socket
+
+import aiohttp
+from telegram import Update
+from telegram.ext import Application, MessageHandler, filters
+
+from benchmarks.fixtures import OfflineBot
+from benchmarks.post_updates import make_update, SECRET_HEADER
+from tgbot.scheduler import ChatOrderedUpdateProcessor
+
+
+SECRET: str = 'test-secret'
+
+PATH: str = 'telegram'
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+async def post_to_webhook(updates: list, secret: str) -> tuple:
+    """
+    Post updates to webhook of offline application one by one.
+    Return response statuses and ids of processed updates.
+    """
+    processed: list = []
+
+    async def handler(update: Update, context) -> None:
+        await asyncio.sleep(0.01)
+        processed.append(update.update_id)
+
+    application = (
+        Application.builder()
+        .bot(OfflineBot('1:offline'))
+        .concurrent_updates(ChatOrderedUpdateProcessor())
+        .build()
+    )
+    application.add_handler(MessageHandler(filters.ALL, handler))
+
+    port: int = free_port()
+    async with application:
+        await application.updater.start_webhook(
+            listen='127.0.0.1',
+            port=port,
+            url_path=PATH,
+            secret_token=SECRET,
+        )
+        await application.start()
+        try:
+            async with aiohttp.ClientSession() as session:
+                statuses: list = []
+                for update in updates:
+                    async with session.post(
+                        'http://127.0.0.1:%d/%s' % (port, PATH),
+                        json=update,
+                        headers={SECRET_HEADER: secret},
+                    ) as response:
+                        statuses.append(response.status)
+
+            for _ in range(100):
+                if len(processed) == statuses.count(200):
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            await application.updater.stop()
+            await application.stop()
+
+    return statuses, processed
+
+
+def test_updates_with_secret_are_processed_in_chat_order():
+    updates: list = [
+        make_update(i, 1000 + i % 2, '/start') for i in range(10)
+    ]
+    statuses, processed = asyncio.run(post_to_webhook(updates, SECRET))
+
+    assert statuses == [200] * 10
+    assert sorted(processed) == list(range(10))
+    for chat in (0, 1):
+        chat_updates: list = [
+            update_id for update_id in processed if update_id % 2 == chat
+        ]
+        assert chat_updates == sorted(chat_updates)
+
+
+def test_update_with_wrong_secret_is_rejected():
+    statuses, processed = asyncio.run(
+        post_to_webhook([make_update(1, 1000, '/start')], SECRET + 'wrong')
+    )
+
+    assert statuses == [403]
+    assert processed == []
@@ -1,5 +1,6 @@
 import logging
 import os
+import secrets
 from dotenv import find_dotenv, load_dotenv
 
 
@@ -8,6 +9,33 @@ load_dotenv(find_dotenv())
 
 TELEGRAM_TOKEN: str | None = os.getenv('TELEGRAM_TOKEN')
 
+# Bot receives updates by webhook if its public url is set,
+# otherwise by long polling.
+WEBHOOK_URL: str | None = os.getenv('WEBHOOK_URL')
+
+WEBHOOK_LISTEN: str = os.getenv('WEBHOOK_LISTEN', '127.0.0.1')
+
+WEBHOOK_PORT: int = int(os.getenv('WEBHOOK_PORT', '8443'))
+
+WEBHOOK_PATH: str = os.getenv('WEBHOOK_PATH', 'telegram')
+
+WEBHOOK_SECRET: str = (
+    os.getenv('WEBHOOK_SECRET') or secrets.token_urlsafe(32)
+)
+
+# Metrics of processing stages are collected only if they
+# are served on port or written to log with interval (seconds).
+METRICS_PORT: int | None = (
+    int(os.getenv('METRICS_PORT')) if os.getenv('METRICS_PORT') else None
+)
+
+METRICS_LISTEN: str = os.getenv('METRICS_LISTEN', '127.0.0.1')
+
+METRICS_LOG_INTERVAL: int | None = (
+    int(os.getenv('METRICS_LOG_INTERVAL'))
+    if os.getenv('METRICS_LOG_INTERVAL') else None
+)
+
 
 def setup_logging() -> None:
     logging.basicConfig(
@@ -1,6 +1,16 @@
-SELECT_SRC, TYPING_KEYWORDS, TYPING_AREA, DELIVERY_VACS, END_ROUTES = range(5)
+from vacscoll.constants import ALL_SOURCES, DB_DIR
 
-HH_BUTTON: str = 'hh'
+(
+    SELECT_SRC,
+    TYPING_KEYWORDS,
+    TYPING_AREA,
+    DELIVERY_VACS,
+    END_ROUTES,
+    SELECT_FILTERS,
+    TYPING_SALARY,
+) = range(7)
+
+ALL_SOURCES_BUTTON: str = ALL_SOURCES
 
 BACK_BUTTON: str = 'back'
 
@@ -8,6 +18,82 @@ NEXT_BUTTON: str = 'next'
 
 CHUNK_SIZE: int = 3
 
+RENDER_IN_THREAD_THRESHOLD: int = 200
+
+SESSIONS_DB_NAME: str = str(DB_DIR / 'sessions.sqlite3')
+
+BOT_STATE_FILE: str = str(DB_DIR / 'bot_state.pickle')
+
+SESSION_WINDOW: int = CHUNK_SIZE * 2
+
+SESSION_CACHE_SIZE: int = 1000
+
+SESSION_TTL: int = 24 * 60 * 60
+
+SUBSCRIPTIONS_DB_NAME: str = str(DB_DIR / 'subscriptions.sqlite3')
+
+SUBSCRIPTION_SCOPE: str = 'subscription'
+
+SUBSCRIPTIONS_INTERVAL: int = 60 * 60
+
+SUBSCRIPTION_MAX_MESSAGES: int = 10
+
 SKIP_BUTTON: str = 'skip'
 
 FIND_BUTTON: str = 'find'
+
+FILTERS_BUTTON: str = 'filters'
+
+APPLY_FILTERS_BUTTON: str = 'apply_filters'
+
+SALARY_BUTTON: str = 'salary'
+
+FILTER_PREFIX: str = 'filter'
+
+SUBSCRIBE_BUTTON: str = 'subscribe'
+
+UNSUBSCRIBE_PREFIX: str = 'unsubscribe'
+
+FILTER_OPTIONS: dict = {
+    'experience': (
+        ('Без опыта', 'noExperience'),
+        ('Опыт 1-3 года', 'between1And3'),
+        ('Опыт 3-6 лет', 'between3And6'),
+        ('Опыт более 6 лет', 'moreThan6'),
+    ),
+    'employment': (
+        ('Полная занятость', 'full'),
+        ('Частичная занятость', 'part'),
+        ('Проектная работа', 'project'),
+        ('Стажировка', 'probation'),
+    ),
+    'schedule': (
+        ('Полный день', 'fullDay'),
+        ('Сменный график', 'shift'),
+        ('Гибкий график', 'flexible'),
+        ('Удалённая работа', 'remote'),
+    ),
+    'only_with_salary': (
+        ('Только с зарплатой', 'true'),
+    ),
+}
+
+PURGE_INTERVAL: int = 60 * 60
+
+AREAS_REFRESH_INTERVAL: int = 60 * 60
+
+TG_OVERALL_RATE: int = 30
+
+TG_OVERALL_BURST: int = 30
+
+TG_CHAT_RATE: int = 1
+
+TG_CHAT_BURST: int = 5
+
+TG_MAX_RETRIES: int = 3
+
+TG_MAX_CHAT_LIMITERS: int = 10000
+
+WEBHOOK_MAX_CONNECTIONS: int = 100
+
+MAX_CONCURRENT_UPDATES: int = 256
@@ -1,5 +1,10 @@
+import asyncio
 import logging
-from telegram import Update
+import re
+from contextlib import aclosing
+from typing import AsyncIterator
+
+from telegram import InlineKeyboardMarkup, Update
 from telegram.ext import (
     CallbackQueryHandler,
     CommandHandler,
@@ -12,36 +17,94 @@ from telegram.warnings import PTBUserWarning
 from warnings import filterwarnings
 
 from .constants import (
+    ALL_SOURCES_BUTTON,
+    APPLY_FILTERS_BUTTON,
     BACK_BUTTON,
     CHUNK_SIZE,
     DELIVERY_VACS,
     END_ROUTES,
+    FILTER_OPTIONS,
+    FILTER_PREFIX,
+    FILTERS_BUTTON,
     FIND_BUTTON,
-    HH_BUTTON,
     NEXT_BUTTON,
+    SALARY_BUTTON,
+    SELECT_FILTERS,
     SELECT_SRC,
     SKIP_BUTTON,
+    SUBSCRIBE_BUTTON,
+    SUBSCRIPTION_SCOPE,
     TYPING_AREA,
     TYPING_KEYWORDS,
+    TYPING_SALARY,
+    UNSUBSCRIBE_PREFIX,
+)
+from .jobs import schedule_saved_search
+from .keyboards import build_keyboard, filters_keyboard, url_keyboard
+from .sessions import vacancy_sessions
+from .subscriptions import subscriptions
+from .utils import (
+    format_search_summary,
+    make_filters,
+    prerender_messages,
+)
+from vacscoll.exceptions import (
+    AreasUnavailableException,
+    RequestFailedException,
+)
+from vacscoll.metrics import metrics
+from vacscoll.registry import collector_registry
+from vacscoll.workers import (
+    get_areas,
+    query_watermark_keys,
+    remove_unrecieved,
+    stream_vacs,
+    watch_query,
 )
-from .keyboards import build_keyboard, url_keyboard
-from .utils import format_message
-from vacscoll.workers import get_areas, get_vacs, remove_unrecieved
 
 
 filterwarnings('ignore', r'.*CallbackQueryHandler', PTBUserWarning)
 
+SEARCH_BUTTONS: list = [
+    ('Найти', FIND_BUTTON),
+    ('Фильтры', FILTERS_BUTTON),
+    ('Подписаться', SUBSCRIBE_BUTTON),
+    ('Назад', BACK_BUTTON),
+]
+
 
+def build_sources_keyboard() -> InlineKeyboardMarkup:
+    """Keyboard of registered vacancy sources."""
+    buttons: list = [
+        (f'Подбор с {collector_cls.title}', collector_cls.src_name)
+        for collector_cls in collector_registry
+    ]
+    if len(buttons) > 1:
+        buttons.append(('Все источники', ALL_SOURCES_BUTTON))
+
+    return build_keyboard(buttons)
+
+
+def sources_pattern() -> str:
+    """Callback pattern of registered vacancy sources buttons."""
+    names: list = [
+        collector_cls.src_name for collector_cls in collector_registry
+    ]
+    return '^(%s)$' % '|'.join(map(re.escape, names + [ALL_SOURCES_BUTTON]))
+
+
+@metrics.timed()
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """Start bot with inline keyboard."""
     await update.message.reply_text(
         'Выберите источник вакансий',
-        reply_markup=build_keyboard([('Подбор с hh.ru', HH_BUTTON)])
+        reply_markup=build_sources_keyboard()
     )
 
     return TYPING_KEYWORDS
 
 
+@metrics.timed()
 async def menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """
     Main menu with inline keyboard.
@@ -54,18 +117,19 @@ async def menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
     await query.edit_message_text(
         'Выберите источник вакансий',
-        reply_markup=build_keyboard([('Подбор с hh.ru', HH_BUTTON)])
+        reply_markup=build_sources_keyboard()
     )
 
     return TYPING_KEYWORDS
 
 
-async def collect_from_hh(
+@metrics.timed()
+async def select_source(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE
 ) -> int:
-    """Select hh button handler."""
-    logging.info('The user is in the API HH block ')
+    """Select vacancy source button handler."""
+    logging.info('The user selects vacancy source')
 
     query = update.callback_query
     await query.answer()
@@ -81,6 +145,7 @@ async def collect_from_hh(
     return TYPING_KEYWORDS
 
 
+@metrics.timed()
 async def keywords_prompt(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE
@@ -105,6 +170,7 @@ async def keywords_prompt(
     return TYPING_AREA
 
 
+@metrics.timed()
 async def location_prompt(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE
@@ -115,9 +181,21 @@ async def location_prompt(
 
     src_name = context.user_data['src_name']
     logging.info('Checking entered location')
-    area_id = await get_areas(src_name, location)
+    try:
+        area = await get_areas(src_name, location)
+    except AreasUnavailableException:
+        logging.exception('Failed to get areas')
+        await update.message.reply_text(
+            'Сервис вакансий сейчас недоступен, попробуйте позже',
+            reply_markup=build_keyboard([
+                ('Искать по России', SKIP_BUTTON),
+                ('Назад', BACK_BUTTON),
+            ])
+        )
+
+        return TYPING_AREA
 
-    if not area_id:
+    if not area:
         logging.info('Entered location not found')
         buttons: list = [
             ('Искать по России', SKIP_BUTTON),
@@ -135,24 +213,18 @@ async def location_prompt(
         return TYPING_AREA
 
     logging.info('Location confirmed')
-    buttons: list = [
-        ('Найти', FIND_BUTTON),
-        ('Назад', BACK_BUTTON),
-    ]
+    area_id, area_name = area
     context.user_data['area'] = area_id
-    keywords = context.user_data['keywords']
-    text_message: str = (
-        f'Поиск по ключевыми словам: {keywords}\n'
-        f'Локация: {location.capitalize()}'
-    )
+    context.user_data['area_name'] = area_name
     await update.message.reply_text(
-        text_message,
-        reply_markup=build_keyboard(buttons)
+        format_search_summary(context.user_data),
+        reply_markup=build_keyboard(SEARCH_BUTTONS)
     )
 
     return DELIVERY_VACS
 
 
+@metrics.timed()
 async def skip_location(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE
@@ -162,27 +234,284 @@ async def skip_location(
     query = update.callback_query
     await query.answer()
 
-    buttons: list = [
-        ('Найти', FIND_BUTTON),
-        ('Назад', BACK_BUTTON),
-    ]
-    keywords = context.user_data['keywords']
-    text_message: str = (
-        f'Поиск по ключевыми словам: {keywords}\n'
-        f'Локация: Россия'
+    context.user_data.pop('area', None)
+    context.user_data.pop('area_name', None)
+
+    await query.edit_message_text(
+        format_search_summary(context.user_data),
+        reply_markup=build_keyboard(SEARCH_BUTTONS)
+    )
+    return DELIVERY_VACS
+
+
+def build_filters_keyboard(
+    context: ContextTypes.DEFAULT_TYPE
+) -> InlineKeyboardMarkup:
+    """Filters toggles with salary and apply buttons."""
+    user_filters: dict = context.user_data.setdefault('filters', {})
+    salary = user_filters.get('salary')
+    salary_text: str = f'ЗП от {salary}' if salary else 'Указать зарплату'
+    return filters_keyboard(
+        FILTER_OPTIONS,
+        user_filters,
+        [
+            (salary_text, SALARY_BUTTON),
+            ('Готово', APPLY_FILTERS_BUTTON),
+        ]
+    )
+
+
+@metrics.timed()
+async def show_filters(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE
+) -> int:
+    """Show vacancies filters menu."""
+    logging.info('User opens filters')
+    query = update.callback_query
+    await query.answer()
+
+    await query.edit_message_text(
+        'Выберите фильтры вакансий',
+        reply_markup=build_filters_keyboard(context)
     )
+
+    return SELECT_FILTERS
+
+
+@metrics.timed()
+async def toggle_filter(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE
+) -> int:
+    """Select or unselect filter value."""
+    query = update.callback_query
+    await query.answer()
+
+    _, name, value = query.data.split(':')
+    user_filters: dict = context.user_data.setdefault('filters', {})
+    values: set = user_filters.setdefault(name, set())
+    values.symmetric_difference_update({value})
+
+    await query.edit_message_reply_markup(
+        reply_markup=build_filters_keyboard(context)
+    )
+
+    return SELECT_FILTERS
+
+
+@metrics.timed()
+async def ask_salary(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE
+) -> int:
+    """Ask user to enter desired salary."""
+    query = update.callback_query
+    await query.answer()
+
     await query.edit_message_text(
-        text_message,
-        reply_markup=build_keyboard(buttons)
+        'Укажите желаемую зарплату в рублях.\n'
+        'Отправьте 0, чтобы не учитывать зарплату',
+        reply_markup=build_keyboard([('Назад', FILTERS_BUTTON)])
+    )
+
+    return TYPING_SALARY
+
+
+@metrics.timed()
+async def salary_prompt(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE
+) -> int:
+    """Getting salary entered from user."""
+    logging.info('User enters salary')
+    salary: str = update.message.text.replace(' ', '')
+
+    if not salary.isdigit():
+        await update.message.reply_text(
+            'Зарплата должна быть числом. Попробуйте указать ещё раз',
+            reply_markup=build_keyboard([('Назад', FILTERS_BUTTON)])
+        )
+
+        return TYPING_SALARY
+
+    user_filters: dict = context.user_data.setdefault('filters', {})
+    user_filters['salary'] = int(salary) or None
+
+    await update.message.reply_text(
+        'Выберите фильтры вакансий',
+        reply_markup=build_filters_keyboard(context)
     )
+
+    return SELECT_FILTERS
+
+
+@metrics.timed()
+async def apply_filters(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE
+) -> int:
+    """Return from filters menu to search confirmation."""
+    query = update.callback_query
+    await query.answer()
+
+    await query.edit_message_text(
+        format_search_summary(context.user_data),
+        reply_markup=build_keyboard(SEARCH_BUTTONS)
+    )
+
     return DELIVERY_VACS
 
 
+@metrics.timed()
+async def subscribe(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE
+) -> int:
+    """
+    Save search to send user new vacancies.
+    Searches with equal query are collected together.
+    """
+    logging.info('User saves search')
+    query = update.callback_query
+    if 'keywords' not in context.user_data:
+        await query.answer('Поиск уже запущен')
+        return DELIVERY_VACS
+
+    await query.answer()
+
+    user_filters: dict = context.user_data.get('filters', {})
+    search: dict = {
+        'src_name': context.user_data['src_name'],
+        'keywords': context.user_data['keywords'],
+        'area': context.user_data.get('area'),
+        'area_name': context.user_data.get('area_name', 'Россия'),
+        'filters': {
+            name: value if name == 'salary' else sorted(value)
+            for name, value in user_filters.items()
+        },
+    }
+    query_key: str = await watch_query(
+        search['src_name'],
+        search['keywords'],
+        search['area'],
+        make_filters(user_filters),
+        SUBSCRIPTION_SCOPE,
+    )
+    subscription_id: int | None = await subscriptions.add(
+        update.effective_chat.id, query_key, search
+    )
+    if subscription_id is None:
+        await query.edit_message_text(
+            format_search_summary(context.user_data)
+            + '\n\nВы уже подписаны на этот поиск.\n'
+            'Управление подписками: /subscriptions',
+            reply_markup=build_keyboard(SEARCH_BUTTONS)
+        )
+
+        return DELIVERY_VACS
+
+    schedule_saved_search(context.job_queue, query_key)
+
+    await query.edit_message_text(
+        format_search_summary(context.user_data)
+        + '\n\nПодписка сохранена, новые вакансии будут '
+        'приходить автоматически.\nУправление подписками: /subscriptions',
+        reply_markup=build_keyboard(SEARCH_BUTTONS)
+    )
+
+    return DELIVERY_VACS
+
+
+@metrics.timed()
+async def list_subscriptions(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    """Show user subscriptions with buttons to cancel them."""
+    chat_subscriptions: list = await subscriptions.by_chat(
+        update.effective_chat.id
+    )
+    if not chat_subscriptions:
+        await update.message.reply_text('У вас нет подписок')
+        return
+
+    await update.message.reply_text(
+        'Ваши подписки. Нажмите, чтобы отменить:\n\n' + '\n\n'.join(
+            f'{number}. ' + format_search_summary(subscription.search)
+            for number, subscription in enumerate(chat_subscriptions, 1)
+        ),
+        reply_markup=build_keyboard([
+            (
+                f'❌ {number}. {subscription.search["keywords"]}',
+                f'{UNSUBSCRIBE_PREFIX}:{subscription.id}'
+            )
+            for number, subscription in enumerate(chat_subscriptions, 1)
+        ])
+    )
+
+
+@metrics.timed()
+async def unsubscribe(
+    update: Update,
+    context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    """Remove selected user subscription."""
+    query = update.callback_query
+    await query.answer()
+
+    _, subscription_id = query.data.split(':')
+    if await subscriptions.remove(
+        int(subscription_id), update.effective_chat.id
+    ):
+        logging.info('User removes subscription')
+        await query.edit_message_text('Подписка отменена')
+    else:
+        await query.edit_message_text('Подписка уже отменена')
+
+
+def create_subscription_handlers() -> list:
+    """Creating handlers of subscriptions management."""
+    return [
+        CommandHandler('subscriptions', list_subscriptions),
+        CallbackQueryHandler(
+            unsubscribe, pattern='^%s:' % UNSUBSCRIBE_PREFIX
+        ),
+    ]
+
+
+async def release_session(session_id: int) -> None:
+    """
+    Drop user vacancies session, unsent vacancies
+    will be collected again.
+    """
+    pending: list = await vacancy_sessions.drop(session_id)
+    if pending:
+        await remove_unrecieved(pending)
+
+
+async def load_rest_vacancies(
+    vacancies_stream: AsyncIterator[list],
+    session_id: int
+) -> None:
+    """Spill pages loaded in background to user vacancies session."""
+    async with aclosing(vacancies_stream):
+        async for chunk in vacancies_stream:
+            messages: list = await prerender_messages(chunk)
+            if not await vacancy_sessions.extend(session_id, messages):
+                return
+
+
+@metrics.timed()
 async def recieve_vacancies(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE
 ) -> int:
-    """Recieve vacancies from vacancy collector."""
+    """
+    Recieve vacancies from vacancy collector.
+    User gets first vacancies as soon as first page is processed,
+    rest pages are loaded in background.
+    """
     query = update.callback_query
     await query.answer()
 
@@ -192,12 +521,29 @@ async def recieve_vacancies(
     keywords = context.user_data['keywords']
     del context.user_data['keywords']
 
-    area = context.user_data.get('area')
-    if area:
-        del context.user_data['area']
+    area = context.user_data.pop('area', None)
+    context.user_data.pop('area_name', None)
+    user_filters = make_filters(context.user_data.pop('filters', {}))
+
+    session_id: int = update.effective_user.id
+    await release_session(session_id)
 
     logging.info('Trying get vacancies')
-    vacancies: list = await get_vacs(src_name, keywords, area)
+    vacancies_stream: AsyncIterator[list] = stream_vacs(
+        src_name, keywords, area, user_filters
+    )
+    try:
+        vacancies: list = await prerender_messages(
+            await anext(vacancies_stream, [])
+        )
+    except RequestFailedException:
+        logging.exception('Failed to get vacancies')
+        await query.edit_message_text(
+            'Сервис вакансий сейчас недоступен, попробуйте позже',
+            reply_markup=build_keyboard([('В начало', BACK_BUTTON)])
+        )
+
+        return END_ROUTES
 
     if not vacancies:
         logging.info('Not found vacancies')
@@ -208,9 +554,22 @@ async def recieve_vacancies(
 
         return END_ROUTES
 
-    logging.info('Vacancies received successfully')
-    context.user_data['vacs'] = vacancies
-    vacs_info_message: str = f'Надено вакансий: {len(vacancies)}'
+    logging.info('First vacancies received successfully')
+    await vacancy_sessions.create(
+        session_id,
+        vacancies,
+        query_watermark_keys(src_name, keywords, area, user_filters)
+    )
+    vacancy_sessions.set_loader(
+        session_id,
+        context.application.create_task(
+            load_rest_vacancies(vacancies_stream, session_id)
+        )
+    )
+    vacs_info_message: str = (
+        f'Надено вакансий: {len(vacancies)}\n'
+        'Поиск остальных продолжается'
+    )
     vsize: int = len(vacancies)
     total_vacs: int = CHUNK_SIZE if CHUNK_SIZE < vsize else vsize
 
@@ -224,6 +583,7 @@ async def recieve_vacancies(
     return DELIVERY_VACS
 
 
+@metrics.timed()
 async def retrieve_vacancies(
     update: Update,
     context: ContextTypes.DEFAULT_TYPE
@@ -232,20 +592,29 @@ async def retrieve_vacancies(
     query = update.callback_query
     await query.answer()
 
-    vacancies = context.user_data['vacs']
-    vacs_chunk, vacancies = vacancies[:CHUNK_SIZE], vacancies[CHUNK_SIZE:]
-    context.user_data['vacs'] = vacancies
-    while vacs_chunk:
-        logging.info('Bot sending vacancy info message')
-        vacancy = vacs_chunk.pop()
+    session_id: int = update.effective_user.id
+    vacs_chunk: list = await vacancy_sessions.take(session_id, CHUNK_SIZE)
+    logging.info('Bot sending %d vacancy info messages', len(vacs_chunk))
+    await asyncio.gather(*(
+        query.message.reply_text(
+            message.text,
+            reply_markup=url_keyboard('Подробнее', message.url)
+        )
+        for message in vacs_chunk
+    ))
+
+    vsize: int = await vacancy_sessions.pending(session_id)
+    if not vsize and vacancy_sessions.loading(session_id):
         await query.message.reply_text(
-            format_message(vacancy),
-            reply_markup=url_keyboard('Подробнее', vacancy.url)
+            'Загружаю ещё вакансии',
+            reply_markup=build_keyboard([('Далее', NEXT_BUTTON)])
         )
 
-    if not vacancies:
+        return DELIVERY_VACS
+
+    if not vsize:
         logging.info('Vacancies are over. Bot offers to return to main menu')
-        del context.user_data['vacs']
+        await vacancy_sessions.drop(session_id)
         await query.message.reply_text(
             'Больше вакансий нет',
             reply_markup=build_keyboard([('В начало', BACK_BUTTON)])
@@ -253,7 +622,6 @@ async def retrieve_vacancies(
 
         return END_ROUTES
 
-    vsize: int = len(vacancies)
     total_vacs: int = CHUNK_SIZE if CHUNK_SIZE < vsize else vsize
     await query.message.reply_text(
         f'Показать ещё {total_vacs} вакансии',
@@ -263,13 +631,12 @@ async def retrieve_vacancies(
     return DELIVERY_VACS
 
 
+@metrics.timed()
 async def done(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     """End the conversation with bot."""
     logging.info('User cancel collecting')
 
-    if 'vacs' in context.user_data:
-        remove_unrecieved(context.user_data['vacs'])
-        del context.user_data['vacs']
+    await release_session(update.effective_user.id)
 
     await update.message.reply_text(
         'Подбор остановлен.\nДля запуска используйте команду /start'
@@ -291,7 +658,9 @@ def create_conversation_handler() -> ConversationHandler:
                 MessageHandler(
                     filters.TEXT & ~(filters.COMMAND), keywords_prompt
                 ),
-                CallbackQueryHandler(collect_from_hh, pattern=HH_BUTTON),
+                CallbackQueryHandler(
+                    select_source, pattern=sources_pattern()
+                ),
                 CallbackQueryHandler(menu, pattern=BACK_BUTTON),
             ],
             TYPING_AREA: [
@@ -299,16 +668,35 @@ def create_conversation_handler() -> ConversationHandler:
                     filters.TEXT & ~(filters.COMMAND), location_prompt
                 ),
                 CallbackQueryHandler(skip_location, pattern=SKIP_BUTTON),
-                CallbackQueryHandler(collect_from_hh, pattern=BACK_BUTTON),
+                CallbackQueryHandler(select_source, pattern=BACK_BUTTON),
             ],
             DELIVERY_VACS: [
                 CallbackQueryHandler(recieve_vacancies, pattern=FIND_BUTTON),
                 CallbackQueryHandler(retrieve_vacancies, pattern=NEXT_BUTTON),
-                CallbackQueryHandler(collect_from_hh, pattern=BACK_BUTTON),
+                CallbackQueryHandler(show_filters, pattern=FILTERS_BUTTON),
+                CallbackQueryHandler(subscribe, pattern=SUBSCRIBE_BUTTON),
+                CallbackQueryHandler(select_source, pattern=BACK_BUTTON),
+            ],
+            SELECT_FILTERS: [
+                CallbackQueryHandler(
+                    toggle_filter, pattern='^%s:' % FILTER_PREFIX
+                ),
+                CallbackQueryHandler(ask_salary, pattern=SALARY_BUTTON),
+                CallbackQueryHandler(
+                    apply_filters, pattern=APPLY_FILTERS_BUTTON
+                ),
+            ],
+            TYPING_SALARY: [
+                MessageHandler(
+                    filters.TEXT & ~(filters.COMMAND), salary_prompt
+                ),
+                CallbackQueryHandler(show_filters, pattern=FILTERS_BUTTON),
             ],
             END_ROUTES: [
                 CallbackQueryHandler(menu, pattern=BACK_BUTTON),
             ]
         },
         fallbacks=[CommandHandler('done', done)],
+        name='vacancies_search',
+        persistent=True,
     )
@@ -0,0 +1,154 @@
+import asyncio
+import logging
+import zlib
+
+from telegram import Bot
+from telegram.error import Forbidden
+from telegram.ext import ContextTypes, JobQueue
+
+from .constants import (
+    SUBSCRIPTION_MAX_MESSAGES,
+    SUBSCRIPTION_SCOPE,
+    SUBSCRIPTIONS_INTERVAL,
+)
+from .keyboards import url_keyboard
+from .sessions import vacancy_sessions
+from .subscriptions import Subscription, subscriptions
+from .utils import format_search_summary, make_filters, prerender_messages
+from vacscoll.cache import search_cache
+from vacscoll.db import seen_ids
+from vacscoll.metrics import metrics
+from vacscoll.workers import (
+    get_vacs,
+    purge_expired,
+    refresh_areas,
+    remove_unrecieved,
+)
+
+
+async def purge_storage(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Periodic job removing expired vacancies ids from db."""
+    removed: int = await purge_expired()
+    logging.info('Purged %d expired vacancies ids', removed)
+    logging.info(
+        'Purged %d vacancies sent by subscriptions',
+        await subscriptions.purge()
+    )
+    logging.info('Seen ids filter stats: %s', seen_ids.stats())
+    logging.info('Search cache stats: %s', search_cache.stats())
+
+
+async def log_metrics(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Periodic job writing durations of processing stages to log."""
+    for line in metrics.summary():
+        logging.info('metrics %s', line)
+
+
+async def expire_sessions(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Periodic job dropping abandoned vacancies sessions.
+    Their unsent vacancies will be collected again.
+    """
+    pending: list = await vacancy_sessions.expire()
+    if pending:
+        await remove_unrecieved(pending)
+
+    logging.info(
+        'Vacancies sessions stats: %s', await vacancy_sessions.stats()
+    )
+
+
+async def refresh_areas_directory(
+    context: ContextTypes.DEFAULT_TYPE
+) -> None:
+    """Periodic job refreshing expired areas directories."""
+    await refresh_areas()
+
+
+def schedule_saved_search(job_queue: JobQueue, query_key: str) -> None:
+    """
+    Schedule periodic collection of saved search query
+    unless it is already scheduled. Queries start at stable
+    offsets spread across interval to smooth load on API.
+    """
+    if job_queue.get_jobs_by_name(query_key):
+        return
+
+    job_queue.run_repeating(
+        collect_saved_search,
+        interval=SUBSCRIPTIONS_INTERVAL,
+        first=zlib.crc32(query_key.encode()) % SUBSCRIPTIONS_INTERVAL,
+        name=query_key,
+        data=query_key,
+    )
+
+
+async def notify_subscriber(
+    bot: Bot,
+    subscription: Subscription,
+    messages: list
+) -> None:
+    """
+    Send subscriber vacancies which weren't sent to them yet.
+    Vacancies over messages limit wait for next runs.
+    """
+    await subscriptions.enqueue(subscription, messages)
+    queued, total = await subscriptions.queued(
+        subscription, SUBSCRIPTION_MAX_MESSAGES
+    )
+    if not queued:
+        return
+
+    sent: list = []
+    try:
+        await bot.send_message(
+            subscription.chat_id,
+            f'Новые вакансии по подписке: {total}\n'
+            + format_search_summary(subscription.search)
+        )
+        for queue_id, message in queued:
+            await bot.send_message(
+                subscription.chat_id,
+                message.text,
+                reply_markup=url_keyboard('Подробнее', message.url)
+            )
+            sent.append(queue_id)
+    except Forbidden:
+        logging.info('Bot is blocked in chat, subscriptions are removed')
+        await subscriptions.remove_chat(subscription.chat_id)
+    finally:
+        if sent:
+            await subscriptions.dequeue(sent)
+
+
+async def collect_saved_search(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """
+    Periodic job collecting saved search query once
+    for all its subscribers, who also get vacancies
+    queued by previous runs. Job of query without
+    subscribers is removed.
+    """
+    query_key: str = context.job.data
+    query_subscriptions: list = await subscriptions.by_query(query_key)
+    if not query_subscriptions:
+        context.job.schedule_removal()
+        return
+
+    search: dict = query_subscriptions[0].search
+    vacancies: list = await get_vacs(
+        search['src_name'],
+        search['keywords'],
+        search.get('area'),
+        make_filters(search.get('filters', {})),
+        SUBSCRIPTION_SCOPE,
+    )
+    logging.info(
+        'Saved search collected %d vacancies for %d subscribers',
+        len(vacancies), len(query_subscriptions)
+    )
+
+    messages: list = await prerender_messages(vacancies)
+    await asyncio.gather(*(
+        notify_subscriber(context.bot, subscription, messages)
+        for subscription in query_subscriptions
+    ))
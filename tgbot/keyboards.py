@@ -1,5 +1,7 @@
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup
 
+from .constants import FILTER_PREFIX
+
 
 def url_keyboard(text: str, url: str) -> InlineKeyboardMarkup:
     """Make url button under vacancy info."""
@@ -20,3 +22,26 @@ def build_keyboard(button_rows: list[tuple]) -> InlineKeyboardMarkup:
             for text, callback_data in button_rows
         ]
     )
+
+
+def filters_keyboard(
+    options: dict,
+    selected: dict,
+    extra_rows: list[tuple]
+) -> InlineKeyboardMarkup:
+    """
+    Keyboard of filters toggles. Selected filters are marked.
+    Args:
+        options: filter name -> tuple of (label text, value)
+        selected: filter name -> set of selected values
+        extra_rows: list of tuple (label text, callback_data)
+    """
+    button_rows: list = []
+    for name, values in options.items():
+        for text, value in values:
+            mark: str = '✅ ' if value in selected.get(name, ()) else ''
+            button_rows.append(
+                (mark + text, ':'.join((FILTER_PREFIX, name, value)))
+            )
+
+    return build_keyboard(button_rows + extra_rows)
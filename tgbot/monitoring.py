@@ -0,0 +1,44 @@
+from aiohttp import web
+
+from vacscoll.metrics import metrics, MetricsRegistry
+
+
+PROMETHEUS_CONTENT_TYPE: str = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class MetricsServer:
+    """HTTP endpoint serving metrics for Prometheus scraper at /metrics."""
+
+    def __init__(self, registry: MetricsRegistry = metrics) -> None:
+        self._registry = registry
+
+        self._runner: web.AppRunner | None = None
+
+    async def _handle_metrics(self, request: web.Request) -> web.Response:
+        return web.Response(
+            body=self._registry.render_prometheus().encode(),
+            headers={'Content-Type': PROMETHEUS_CONTENT_TYPE},
+        )
+
+    async def start(self, host: str, port: int) -> None:
+        """Start serving metrics unless server is already running."""
+        if self._runner is not None:
+            return
+
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle_metrics)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        self._runner = runner
+
+    async def close(self) -> None:
+        """Stop server."""
+        if self._runner is None:
+            return
+
+        await self._runner.cleanup()
+        self._runner = None
+
+
+metrics_server: MetricsServer = MetricsServer()
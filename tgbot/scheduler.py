@@ -0,0 +1,179 @@
+import contextlib
+import logging
+from collections import deque, OrderedDict
+from typing import Any, Awaitable, Callable, Coroutine
+
+from telegram import Update
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter, BaseUpdateProcessor
+
+from .constants import (
+    MAX_CONCURRENT_UPDATES,
+    TG_CHAT_BURST,
+    TG_CHAT_RATE,
+    TG_MAX_CHAT_LIMITERS,
+    TG_MAX_RETRIES,
+    TG_OVERALL_BURST,
+    TG_OVERALL_RATE,
+)
+from vacscoll.limiters import RateLimiter
+from vacscoll.metrics import metrics
+
+
+class OutboundScheduler(BaseRateLimiter[int]):
+    """
+    Scheduler of bot requests to Telegram.
+    Requests to chats wait for their chat token bucket,
+    kept in order per chat, and then for global token bucket.
+    Requests of different chats are sent concurrently.
+    On flood control all requests to chats are held
+    for requested time and request is retried.
+    """
+
+    def __init__(
+        self,
+        overall_rate: float | int = TG_OVERALL_RATE,
+        overall_burst: int = TG_OVERALL_BURST,
+        chat_rate: float | int = TG_CHAT_RATE,
+        chat_burst: int = TG_CHAT_BURST,
+        max_retries: int = TG_MAX_RETRIES,
+        max_chat_limiters: int = TG_MAX_CHAT_LIMITERS,
+    ) -> None:
+        self._overall_limiter = RateLimiter(overall_rate, overall_burst)
+        self._chat_rate = chat_rate
+        self._chat_burst = chat_burst
+        self._max_retries = max_retries
+        self._max_chat_limiters = max_chat_limiters
+
+        self._chat_limiters: OrderedDict = OrderedDict()
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        self._chat_limiters.clear()
+
+    def _chat_limiter(self, chat_id: int | str) -> RateLimiter:
+        """Token bucket of chat. Buckets of idle chats are dropped."""
+        limiter: RateLimiter | None = self._chat_limiters.get(chat_id)
+        if limiter is None:
+            limiter = RateLimiter(self._chat_rate, self._chat_burst)
+            self._chat_limiters[chat_id] = limiter
+            if len(self._chat_limiters) > self._max_chat_limiters:
+                self._chat_limiters.popitem(last=False)
+        else:
+            self._chat_limiters.move_to_end(chat_id)
+
+        return limiter
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: dict,
+        endpoint: str,
+        data: dict,
+        rate_limit_args: int | None,
+    ) -> Any:
+        """
+        Send request when chat and global limits allow it.
+        Requests without chat aren't limited.
+        """
+        with metrics.timer('telegram.' + endpoint):
+            return await self._send(
+                callback, args, kwargs, endpoint, data, rate_limit_args
+            )
+
+    async def _send(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: dict,
+        endpoint: str,
+        data: dict,
+        rate_limit_args: int | None,
+    ) -> Any:
+        chat_id = data.get('chat_id')
+        if chat_id is None:
+            return await callback(*args, **kwargs)
+
+        with contextlib.suppress(ValueError, TypeError):
+            chat_id = int(chat_id)
+
+        max_retries: int = rate_limit_args or self._max_retries
+        for attempt in range(max_retries + 1):
+            await self._chat_limiter(chat_id).acquire()
+            await self._overall_limiter.acquire()
+            try:
+                result = await callback(*args, **kwargs)
+            except RetryAfter as error:
+                if attempt == max_retries:
+                    raise
+
+                logging.warning(
+                    'Telegram flood control on %s, retry after %s s',
+                    endpoint, error.retry_after
+                )
+                metrics.increment('telegram_retry_after')
+                self._overall_limiter.slow_down(error.retry_after)
+                continue
+
+            self._overall_limiter.speed_up()
+            return result
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Processor of incoming updates.
+    Updates of different chats are processed concurrently,
+    updates of the same chat one by one in order of arrival.
+    Update of busy chat is queued and processed by the update
+    running in that chat, so waiting updates don't hold
+    processing slots and busy chat takes only one of them.
+    """
+
+    def __init__(
+        self,
+        max_concurrent_updates: int = MAX_CONCURRENT_UPDATES
+    ) -> None:
+        super().__init__(max_concurrent_updates)
+        self._chat_queues: dict = {}
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+    async def do_process_update(
+        self,
+        update: object,
+        coroutine: Awaitable[Any],
+    ) -> None:
+        """
+        Process update of idle chat and then updates of chat
+        queued meanwhile. Update of busy chat is only queued.
+        """
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            await coroutine
+            return
+
+        queue: deque | None = self._chat_queues.get(chat.id)
+        if queue is not None:
+            queue.append(coroutine)
+            return
+
+        queue = self._chat_queues[chat.id] = deque([coroutine])
+        try:
+            while queue:
+                try:
+                    await queue.popleft()
+                except Exception:
+                    logging.exception(
+                        'Update of chat %s is failed to process', chat.id
+                    )
+        finally:
+            del self._chat_queues[chat.id]
+            for pending in queue:
+                pending.close()
@@ -0,0 +1,307 @@
+import asyncio
+import json
+import sqlite3
+import time
+from collections import deque, OrderedDict
+from functools import partial
+from typing import NamedTuple
+
+from .constants import (
+    SESSION_CACHE_SIZE,
+    SESSION_TTL,
+    SESSION_WINDOW,
+    SESSIONS_DB_NAME,
+)
+from .utils import VacancyMessage
+from vacscoll.db import run_in_storage, SQLiteStore
+
+
+class PendingVacancy(NamedTuple):
+    """Unsent vacancy of dropped session and watermarks of its query."""
+
+    id: int | str
+    published_at: float | None
+    watermark_keys: tuple
+
+
+class SessionStore(SQLiteStore):
+    """
+    Store of vacancies messages pending delivery to users.
+    Messages are spilled to SQLite as soon as they are rendered,
+    memory keeps only small window of next messages of
+    recently active sessions. Sessions idle longer than ttl
+    are expired, so abandoned searches don't pile up.
+    Db and windows are accessed only in storage thread,
+    loading tasks only in event loop.
+    """
+
+    def __init__(
+        self,
+        db_name: str = SESSIONS_DB_NAME,
+        window: int = SESSION_WINDOW,
+        max_sessions: int = SESSION_CACHE_SIZE,
+        ttl: int = SESSION_TTL,
+    ) -> None:
+        super().__init__(db_name)
+        self._window = window
+        self._max_sessions = max_sessions
+        self._ttl = ttl
+        self._windows: OrderedDict = OrderedDict()
+        self._loaders: dict = {}
+
+    def _create_tables(self, connection: sqlite3.Connection) -> None:
+        """Create tables and indexes of store if they aren't exist."""
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            'session_id INTEGER PRIMARY KEY, '
+            'next_position INTEGER NOT NULL, '
+            'updated_at REAL NOT NULL, '
+            'watermark_keys TEXT'
+            ')'
+        )
+        columns: set = {
+            row[1] for row in connection.execute(
+                'PRAGMA table_info(sessions)'
+            )
+        }
+        if 'watermark_keys' not in columns:
+            connection.execute(
+                'ALTER TABLE sessions ADD COLUMN watermark_keys TEXT'
+            )
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS sessions_updated_at '
+            'ON sessions (updated_at)'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS messages ('
+            'session_id INTEGER NOT NULL, '
+            'position INTEGER NOT NULL, '
+            'vacancy_id NOT NULL, '
+            'published_at REAL, '
+            'text TEXT NOT NULL, '
+            'url TEXT, '
+            'PRIMARY KEY (session_id, position)'
+            ') WITHOUT ROWID'
+        )
+
+    def _session_window(self, session_id: int) -> deque:
+        """Window of next session messages, least recent are evicted."""
+        window: deque | None = self._windows.get(session_id)
+        if window is None:
+            window = deque()
+            self._windows[session_id] = window
+            if len(self._windows) > self._max_sessions:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(session_id)
+
+        return window
+
+    def _create(
+        self,
+        session_id: int,
+        messages: list,
+        watermark_keys: list
+    ) -> None:
+        """Start new session with first messages."""
+        self._windows.pop(session_id, None)
+        with self._connect() as connection:
+            connection.execute(
+                'DELETE FROM messages WHERE session_id = ?', (session_id, )
+            )
+            connection.execute(
+                'INSERT OR REPLACE INTO sessions '
+                '(session_id, next_position, updated_at, watermark_keys) '
+                'VALUES (?, 0, ?, ?)',
+                (session_id, time.time(), json.dumps(watermark_keys))
+            )
+
+        self._extend(session_id, messages)
+
+    async def create(
+        self,
+        session_id: int,
+        messages: list,
+        watermark_keys: list = ()
+    ) -> None:
+        """
+        Start new session with first messages.
+        Watermark keys of session query are returned
+        with its unsent vacancies when session is dropped.
+        """
+        await run_in_storage(
+            self._create, session_id, messages, list(watermark_keys)
+        )
+
+    def _extend(self, session_id: int, messages: list) -> bool:
+        """Spill messages to the end of session if it exists."""
+        connection = self._connect()
+        with connection:
+            row = connection.execute(
+                'SELECT next_position FROM sessions WHERE session_id = ?',
+                (session_id, )
+            ).fetchone()
+            if row is None:
+                return False
+
+            first_position: int = row[0]
+            connection.executemany(
+                'INSERT INTO messages (session_id, position, vacancy_id, '
+                'published_at, text, url) VALUES (?, ?, ?, ?, ?, ?)',
+                (
+                    (
+                        session_id, position, message.id,
+                        message.published_at, message.text, message.url
+                    )
+                    for position, message in enumerate(
+                        messages, first_position
+                    )
+                )
+            )
+            connection.execute(
+                'UPDATE sessions SET next_position = ? WHERE session_id = ?',
+                (first_position + len(messages), session_id)
+            )
+
+        return True
+
+    async def extend(self, session_id: int, messages: list) -> bool:
+        """
+        Spill messages to the end of session.
+        Return False if session was dropped or expired.
+        """
+        return await run_in_storage(self._extend, session_id, messages)
+
+    def _take(self, session_id: int, count: int) -> list:
+        """Remove next messages of session from window and db."""
+        window: deque = self._session_window(session_id)
+        connection = self._connect()
+        if len(window) < count:
+            after: int = window[-1][0] if window else -1
+            rows: list = connection.execute(
+                'SELECT position, vacancy_id, published_at, text, url '
+                'FROM messages WHERE session_id = ? AND position > ? '
+                'ORDER BY position LIMIT ?',
+                (session_id, after, max(count, self._window) - len(window))
+            ).fetchall()
+            window.extend(
+                (position, VacancyMessage.restore(*fields))
+                for position, *fields in rows
+            )
+
+        taken: list = [
+            window.popleft() for _ in range(min(count, len(window)))
+        ]
+        with connection:
+            if taken:
+                connection.execute(
+                    'DELETE FROM messages '
+                    'WHERE session_id = ? AND position <= ?',
+                    (session_id, taken[-1][0])
+                )
+            connection.execute(
+                'UPDATE sessions SET updated_at = ? WHERE session_id = ?',
+                (time.time(), session_id)
+            )
+
+        return [message for _, message in taken]
+
+    async def take(self, session_id: int, count: int) -> list:
+        """Remove and return next messages of session."""
+        return await run_in_storage(self._take, session_id, count)
+
+    def _pending(self, session_id: int) -> int:
+        """Count messages of session in db."""
+        row = self._connect().execute(
+            'SELECT COUNT(*) FROM messages WHERE session_id = ?',
+            (session_id, )
+        ).fetchone()
+        return row[0]
+
+    async def pending(self, session_id: int) -> int:
+        """Number of messages not yet taken from session."""
+        return await run_in_storage(self._pending, session_id)
+
+    def set_loader(self, session_id: int, task: asyncio.Task) -> None:
+        """Keep task loading rest messages of session."""
+        self._loaders[session_id] = task
+        task.add_done_callback(partial(self._forget_loader, session_id))
+
+    def _forget_loader(self, session_id: int, task: asyncio.Task) -> None:
+        """Remove finished loading task of session."""
+        if self._loaders.get(session_id) is task:
+            del self._loaders[session_id]
+
+    def loading(self, session_id: int) -> bool:
+        """Check rest messages of session are still loading."""
+        return session_id in self._loaders
+
+    def _drop(self, session_id: int) -> list:
+        """Remove session from db, return its unsent vacancies."""
+        self._windows.pop(session_id, None)
+        with self._connect() as connection:
+            session_row = connection.execute(
+                'SELECT watermark_keys FROM sessions WHERE session_id = ?',
+                (session_id, )
+            ).fetchone()
+            rows: list = connection.execute(
+                'SELECT vacancy_id, published_at FROM messages '
+                'WHERE session_id = ?',
+                (session_id, )
+            ).fetchall()
+            connection.execute(
+                'DELETE FROM messages WHERE session_id = ?', (session_id, )
+            )
+            connection.execute(
+                'DELETE FROM sessions WHERE session_id = ?', (session_id, )
+            )
+
+        watermark_keys: tuple = tuple(
+            json.loads(session_row[0])
+            if session_row and session_row[0] else ()
+        )
+        return [PendingVacancy(*row, watermark_keys) for row in rows]
+
+    async def drop(self, session_id: int) -> list:
+        """
+        Remove session, cancel its loading.
+        Return unsent vacancies of session.
+        """
+        loader: asyncio.Task | None = self._loaders.pop(session_id, None)
+        if loader is not None:
+            loader.cancel()
+
+        return await run_in_storage(self._drop, session_id)
+
+    def _expired(self) -> list:
+        """Ids of sessions idle longer than ttl."""
+        rows = self._connect().execute(
+            'SELECT session_id FROM sessions WHERE updated_at < ?',
+            (time.time() - self._ttl, )
+        )
+        return [session_id for session_id, in rows]
+
+    async def expire(self) -> list:
+        """Drop sessions idle longer than ttl. Return unsent vacancies."""
+        pending: list = []
+        for session_id in await run_in_storage(self._expired):
+            pending.extend(await self.drop(session_id))
+
+        return pending
+
+    def _stats(self) -> dict:
+        """Sessions counters of db and windows."""
+        sessions, = self._connect().execute(
+            'SELECT COUNT(*) FROM sessions'
+        ).fetchone()
+        return {'sessions': sessions, 'in_memory': len(self._windows)}
+
+    async def stats(self) -> dict:
+        """Sessions counters."""
+        return {
+            **await run_in_storage(self._stats),
+            'loading': len(self._loaders),
+        }
+
+
+vacancy_sessions: SessionStore = SessionStore()
@@ -0,0 +1,299 @@
+import json
+import sqlite3
+import time
+from typing import NamedTuple
+
+from .constants import SUBSCRIPTIONS_DB_NAME
+from .utils import VacancyMessage
+from vacscoll.constants import MAX_AGE
+from vacscoll.db import run_in_storage, SQLiteStore
+
+
+class Subscription(NamedTuple):
+    """Saved search of chat."""
+
+    id: int
+    chat_id: int
+    query_key: str
+    search: dict
+    created_at: float
+
+
+class SubscriptionStore(SQLiteStore):
+    """
+    Saved searches of users and vacancies already sent for each of them.
+    Subscriptions with equal normalized query share query key,
+    so each query is collected once for all its subscribers.
+    New vacancies wait in queue of subscription until they are sent.
+    Db is accessed only in storage thread.
+    """
+
+    def __init__(
+        self,
+        db_name: str = SUBSCRIPTIONS_DB_NAME,
+        max_age: int = MAX_AGE,
+    ) -> None:
+        super().__init__(db_name)
+        self._max_age = max_age * 24 * 60 * 60
+
+    def _create_tables(self, connection: sqlite3.Connection) -> None:
+        """Create tables and indexes of store if they aren't exist."""
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS subscriptions ('
+            'id INTEGER PRIMARY KEY, '
+            'chat_id INTEGER NOT NULL, '
+            'query_key TEXT NOT NULL, '
+            'search TEXT NOT NULL, '
+            'created_at REAL NOT NULL'
+            ')'
+        )
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS subscriptions_query_key '
+            'ON subscriptions (query_key)'
+        )
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS subscriptions_chat_id '
+            'ON subscriptions (chat_id)'
+        )
+        connection.execute(
+            'DELETE FROM subscriptions WHERE id NOT IN ('
+            'SELECT MIN(id) FROM subscriptions '
+            'GROUP BY chat_id, query_key'
+            ')'
+        )
+        connection.execute(
+            'CREATE UNIQUE INDEX IF NOT EXISTS '
+            'subscriptions_chat_query '
+            'ON subscriptions (chat_id, query_key)'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS sent ('
+            'subscription_id INTEGER NOT NULL, '
+            'vacancy_id NOT NULL, '
+            'sent_at REAL NOT NULL, '
+            'PRIMARY KEY (subscription_id, vacancy_id)'
+            ') WITHOUT ROWID'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS queue ('
+            'id INTEGER PRIMARY KEY, '
+            'subscription_id INTEGER NOT NULL, '
+            'vacancy_id NOT NULL, '
+            'published_at REAL, '
+            'text TEXT NOT NULL, '
+            'url TEXT, '
+            'queued_at REAL NOT NULL'
+            ')'
+        )
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS queue_subscription_id '
+            'ON queue (subscription_id, id)'
+        )
+
+    def _select(self, where: str, *args) -> list:
+        """Subscriptions matching condition."""
+        rows = self._connect().execute(
+            'SELECT id, chat_id, query_key, search, created_at '
+            'FROM subscriptions WHERE ' + where + ' ORDER BY id',
+            args
+        )
+        return [
+            Subscription(sid, chat_id, query_key, json.loads(search), created)
+            for sid, chat_id, query_key, search, created in rows
+        ]
+
+    def _add(
+        self,
+        chat_id: int,
+        query_key: str,
+        search: dict
+    ) -> int | None:
+        """Save search of chat unless chat has subscription to query."""
+        with self._connect() as connection:
+            cursor = connection.execute(
+                'INSERT OR IGNORE INTO subscriptions '
+                '(chat_id, query_key, search, created_at) '
+                'VALUES (?, ?, ?, ?)',
+                (
+                    chat_id,
+                    query_key,
+                    json.dumps(search, ensure_ascii=False),
+                    time.time(),
+                )
+            )
+
+        if cursor.rowcount:
+            return cursor.lastrowid
+
+    async def add(
+        self,
+        chat_id: int,
+        query_key: str,
+        search: dict
+    ) -> int | None:
+        """
+        Save search of chat. Return subscription id,
+        or None if chat is already subscribed to query.
+        """
+        return await run_in_storage(self._add, chat_id, query_key, search)
+
+    def _remove(self, subscription_id: int, chat_id: int) -> bool:
+        """Remove subscription of chat. Return False if there is none."""
+        with self._connect() as connection:
+            cursor = connection.execute(
+                'DELETE FROM subscriptions WHERE id = ? AND chat_id = ?',
+                (subscription_id, chat_id)
+            )
+            connection.execute(
+                'DELETE FROM sent WHERE subscription_id = ?',
+                (subscription_id, )
+            )
+            connection.execute(
+                'DELETE FROM queue WHERE subscription_id = ?',
+                (subscription_id, )
+            )
+
+        return cursor.rowcount > 0
+
+    async def remove(self, subscription_id: int, chat_id: int) -> bool:
+        """Remove subscription of chat. Return False if there is none."""
+        return await run_in_storage(self._remove, subscription_id, chat_id)
+
+    def _remove_chat(self, chat_id: int) -> None:
+        """Remove all subscriptions of chat."""
+        for subscription in self._by_chat(chat_id):
+            self._remove(subscription.id, chat_id)
+
+    async def remove_chat(self, chat_id: int) -> None:
+        """Remove all subscriptions of chat."""
+        await run_in_storage(self._remove_chat, chat_id)
+
+    def _by_chat(self, chat_id: int) -> list:
+        """Subscriptions of chat."""
+        return self._select('chat_id = ?', chat_id)
+
+    async def by_chat(self, chat_id: int) -> list:
+        """Subscriptions of chat."""
+        return await run_in_storage(self._by_chat, chat_id)
+
+    def _by_query(self, query_key: str) -> list:
+        """Subscriptions of normalized query."""
+        return self._select('query_key = ?', query_key)
+
+    async def by_query(self, query_key: str) -> list:
+        """Subscriptions of normalized query."""
+        return await run_in_storage(self._by_query, query_key)
+
+    def _queries(self) -> list:
+        """Distinct query keys of all subscriptions."""
+        rows = self._connect().execute(
+            'SELECT DISTINCT query_key FROM subscriptions'
+        )
+        return [query_key for query_key, in rows]
+
+    async def queries(self) -> list:
+        """Distinct query keys of all subscriptions."""
+        return await run_in_storage(self._queries)
+
+    def _enqueue(self, subscription: Subscription, messages: list) -> None:
+        """Queue messages new for subscriber and remember them as sent."""
+        messages = [
+            message for message in messages
+            if message.published_at is None
+            or message.published_at >= subscription.created_at
+        ]
+        if not messages:
+            return
+
+        connection = self._connect()
+        current_time: float = time.time()
+        with connection:
+            for message in messages:
+                cursor = connection.execute(
+                    'INSERT OR IGNORE INTO sent '
+                    '(subscription_id, vacancy_id, sent_at) '
+                    'VALUES (?, ?, ?)',
+                    (subscription.id, message.id, current_time)
+                )
+                if cursor.rowcount:
+                    connection.execute(
+                        'INSERT INTO queue (subscription_id, vacancy_id, '
+                        'published_at, text, url, queued_at) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (
+                            subscription.id, message.id,
+                            message.published_at, message.text,
+                            message.url, current_time
+                        )
+                    )
+
+    async def enqueue(
+        self,
+        subscription: Subscription,
+        messages: list
+    ) -> None:
+        """
+        Queue vacancies messages not sent to subscriber yet
+        and published after subscription.
+        """
+        await run_in_storage(self._enqueue, subscription, messages)
+
+    def _queued(self, subscription_id: int, count: int) -> tuple:
+        """Next queued messages of subscription and size of queue."""
+        connection = self._connect()
+        rows = connection.execute(
+            'SELECT id, vacancy_id, published_at, text, url FROM queue '
+            'WHERE subscription_id = ? ORDER BY id LIMIT ?',
+            (subscription_id, count)
+        )
+        messages: list = [
+            (queue_id, VacancyMessage.restore(*fields))
+            for queue_id, *fields in rows
+        ]
+        size, = connection.execute(
+            'SELECT COUNT(*) FROM queue WHERE subscription_id = ?',
+            (subscription_id, )
+        ).fetchone()
+        return messages, size
+
+    async def queued(self, subscription: Subscription, count: int) -> tuple:
+        """
+        Return pairs of queue id and message of next queued
+        messages of subscription and number of queued messages.
+        """
+        return await run_in_storage(self._queued, subscription.id, count)
+
+    def _dequeue(self, queue_ids: list) -> None:
+        """Remove sent messages from queue."""
+        with self._connect() as connection:
+            connection.executemany(
+                'DELETE FROM queue WHERE id = ?',
+                ((queue_id, ) for queue_id in queue_ids)
+            )
+
+    async def dequeue(self, queue_ids: list) -> None:
+        """Remove sent messages from queue."""
+        await run_in_storage(self._dequeue, queue_ids)
+
+    def _purge(self) -> int:
+        """
+        Forget vacancies sent long ago and drop
+        ones queued as long. Return removed count.
+        """
+        expire_time: float = time.time() - self._max_age
+        with self._connect() as connection:
+            connection.execute(
+                'DELETE FROM queue WHERE queued_at < ?', (expire_time, )
+            )
+            cursor = connection.execute(
+                'DELETE FROM sent WHERE sent_at < ?', (expire_time, )
+            )
+
+        return cursor.rowcount
+
+    async def purge(self) -> int:
+        """Forget vacancies sent long ago. Return removed count."""
+        return await run_in_storage(self._purge)
+
+
+subscriptions: SubscriptionStore = SubscriptionStore()
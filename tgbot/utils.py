@@ -1,7 +1,10 @@
+import asyncio
 import logging
 import sys
 
-from vacscoll.models import VacancyHH
+from .constants import FILTER_OPTIONS, RENDER_IN_THREAD_THRESHOLD
+from vacscoll.filters import VacancyFilters
+from vacscoll.models import Vacancy
 
 
 def tokens_is_exists(*args) -> bool:
@@ -19,12 +22,14 @@ def check_tokens(*args) -> None:
         sys.exit()
 
 
-def format_message(vacancy: VacancyHH) -> str:
-    """Construct message with info about vacancy."""
-    vacancy_info: list = [
-        f'{vacancy.name}\n',
-        f'{vacancy.employment}\n',
-    ]
+def format_message(vacancy: Vacancy) -> str:
+    """
+    Construct message with info about vacancy of any source.
+    Fields missing in vacancy are skipped.
+    """
+    vacancy_info: list = [f'{vacancy.name}\n']
+    if vacancy.employment:
+        vacancy_info.append(f'{vacancy.employment}\n')
 
     if vacancy.salary:
         vacancy_info.append('ЗП: ')
@@ -42,7 +47,10 @@ def format_message(vacancy: VacancyHH) -> str:
     if vacancy.location:
         vacancy_info.append(f'Локация: {vacancy.location}\n')
 
-    vacancy_info.append(f'Компания: {vacancy.employer}\n\n')
+    if vacancy.employer:
+        vacancy_info.append(f'Компания: {vacancy.employer}\n')
+
+    vacancy_info.append('\n')
     if vacancy.requirements:
         vacancy_info.append(f'Требования:\n{vacancy.requirements}\n\n')
 
@@ -50,3 +58,85 @@ def format_message(vacancy: VacancyHH) -> str:
         vacancy_info.append(f'Обязанности:\n{vacancy.responsibility}\n')
 
     return ''.join(vacancy_info)
+
+
+class VacancyMessage:
+    """
+    Vacancy message rendered once when vacancies are collected.
+    Keeps only what is needed to send it and to return
+    unrecieved vacancy in search.
+    """
+
+    __slots__ = ('id', 'published_at', 'text', 'url')
+
+    def __init__(self, vacancy: Vacancy) -> None:
+        self.id = vacancy.id
+        self.published_at = vacancy.published_at
+        self.text: str = format_message(vacancy)
+        self.url: str | None = vacancy.url
+
+    @classmethod
+    def restore(
+        cls,
+        vid: int | str,
+        published_at: float | None,
+        text: str,
+        url: str | None
+    ) -> 'VacancyMessage':
+        """Restore message rendered earlier from stored fields."""
+        message = cls.__new__(cls)
+        message.id = vid
+        message.published_at = published_at
+        message.text = text
+        message.url = url
+        return message
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}(\'{self.id}\')'
+
+
+def render_messages(vacancies: list) -> list:
+    """Render vacancies messages."""
+    return [VacancyMessage(vacancy) for vacancy in vacancies]
+
+
+async def prerender_messages(vacancies: list) -> list:
+    """Render vacancies messages, large result sets in worker thread."""
+    if len(vacancies) > RENDER_IN_THREAD_THRESHOLD:
+        return await asyncio.to_thread(render_messages, vacancies)
+
+    return render_messages(vacancies)
+
+
+def make_filters(user_filters: dict) -> VacancyFilters:
+    """Convert filters selected by user to vacancy filters."""
+    return VacancyFilters(
+        experience=user_filters.get('experience'),
+        employment=user_filters.get('employment'),
+        schedule=user_filters.get('schedule'),
+        salary=user_filters.get('salary'),
+        only_with_salary='true' in user_filters.get('only_with_salary', ()),
+    )
+
+
+def format_search_summary(user_data: dict) -> str:
+    """Construct message with search query and selected filters."""
+    summary: list = [
+        f'Поиск по ключевыми словам: {user_data["keywords"]}\n',
+        f'Локация: {user_data.get("area_name", "Россия")}',
+    ]
+
+    user_filters: dict = user_data.get('filters', {})
+    labels: list = [
+        text
+        for name, values in FILTER_OPTIONS.items()
+        for text, value in values
+        if value in user_filters.get(name, ())
+    ]
+    if user_filters.get('salary'):
+        labels.append(f'ЗП от {user_filters["salary"]}')
+
+    if labels:
+        summary.append('\nФильтры: ' + ', '.join(labels))
+
+    return ''.join(summary)
@@ -0,0 +1,227 @@
+import asyncio
+import bisect
+import difflib
+import json
+import logging
+import os
+import re
+import time
+from typing import Awaitable, Callable
+
+from .constants import (
+    AREA_ALIASES,
+    AREA_FUZZY_CUTOFF,
+    AREAS_RETRY_DELAY,
+    AREAS_TTL,
+    DB_DIR,
+)
+from .exceptions import AreasUnavailableException
+
+
+SEPARATORS_PATTERN: re.Pattern = re.compile(r'[\s\-]+')
+
+
+def normalize_area_name(name: str) -> str:
+    """Casefold name, fold 'ё' to 'е' and unify separators."""
+    name = name.casefold().replace('ё', 'е')
+    return SEPARATORS_PATTERN.sub(' ', name).strip()
+
+
+class AreaIndex:
+    """
+    Index of normalized areas names for city lookup.
+    Exact match ranks before prefix match, prefix match
+    before substring match and fuzzy match is the last resort.
+    Shorter names win among equal matches.
+    """
+
+    def __init__(self, areas: dict, aliases: dict = AREA_ALIASES) -> None:
+        self._ids: dict = {}
+        self._names: dict = {}
+        for _id, name in areas.items():
+            normalized: str = normalize_area_name(name)
+            if normalized not in self._ids:
+                self._ids[normalized] = _id
+                self._names[normalized] = name
+
+        self._sorted_names: list = sorted(self._ids)
+        self._aliases: dict = {
+            normalize_area_name(alias): normalize_area_name(name)
+            for alias, name in aliases.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _prefix_matches(self, query: str) -> list:
+        """Names starting with query found by binary search."""
+        matches: list = []
+        pos: int = bisect.bisect_left(self._sorted_names, query)
+        while (
+            pos < len(self._sorted_names)
+            and self._sorted_names[pos].startswith(query)
+        ):
+            matches.append(self._sorted_names[pos])
+            pos += 1
+
+        return matches
+
+    def _substring_matches(self, query: str) -> list:
+        return [name for name in self._sorted_names if query in name]
+
+    def _match(self, query: str) -> str | None:
+        """Best matched normalized name."""
+        if query in self._ids:
+            return query
+
+        for find_matches in (
+            self._prefix_matches,
+            self._substring_matches,
+        ):
+            matches: list = find_matches(query)
+            if matches:
+                return min(matches, key=len)
+
+    def find(self, city: str) -> tuple | None:
+        """Return (area ID, area name) of best match for city."""
+        query: str = normalize_area_name(city)
+        if not query:
+            return
+
+        query = self._aliases.get(query, query)
+        name: str | None = self._match(query)
+        if name is None:
+            close_names: list = difflib.get_close_matches(
+                query, self._sorted_names, 1, AREA_FUZZY_CUTOFF
+            )
+            if not close_names:
+                return
+            name = close_names[0]
+
+        return self._ids[name], self._names[name]
+
+
+class AreasCache:
+    """
+    Areas directory of aggregator held in memory and persisted on disk.
+    Expired directory is refreshed in background, users get
+    the current one meanwhile. If aggregator API is unreachable
+    directory from disk snapshot is used.
+    """
+
+    def __init__(
+        self,
+        src_name: str,
+        fetcher: Callable[[], Awaitable[dict]],
+        ttl: float | int = AREAS_TTL,
+    ) -> None:
+        self._src_name = src_name
+        self._fetcher = fetcher
+        self._ttl = ttl
+        self._snapshot_path = str(DB_DIR / ('areas_%s.json' % src_name))
+
+        self._areas: dict = {}
+        self._index: AreaIndex = AreaIndex({})
+        self._loaded_at: float = 0.0
+        self._failed_at: float = 0.0
+        self._refresh_task: asyncio.Task | None = None
+
+    @property
+    def expired(self) -> bool:
+        return time.time() - self._loaded_at > self._ttl
+
+    @property
+    def _refresh_allowed(self) -> bool:
+        """Don't ask unreachable API again right after failure."""
+        return time.time() - self._failed_at > AREAS_RETRY_DELAY
+
+    def _read_snapshot(self) -> dict | None:
+        """Read areas snapshot from disk if it's exists."""
+        if not os.path.exists(self._snapshot_path):
+            return
+
+        with open(self._snapshot_path, encoding='utf-8') as snapshot:
+            return json.load(snapshot)
+
+    def _write_snapshot(self, snapshot: dict) -> None:
+        """Atomically replace areas snapshot on disk."""
+        os.makedirs(DB_DIR, exist_ok=True)
+        tmp_path: str = self._snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as tmp_snapshot:
+            json.dump(snapshot, tmp_snapshot, ensure_ascii=False)
+        os.replace(tmp_path, self._snapshot_path)
+
+    def _update(self, areas: dict, loaded_at: float) -> None:
+        self._index = AreaIndex(areas)
+        self._areas = areas
+        self._loaded_at = loaded_at
+
+    async def load(self) -> None:
+        """Load areas from disk snapshot."""
+        try:
+            snapshot = await asyncio.to_thread(self._read_snapshot)
+        except (OSError, ValueError):
+            logging.exception('Broken %s areas snapshot', self._src_name)
+            return
+
+        if snapshot:
+            self._update(snapshot['areas'], snapshot['loaded_at'])
+
+    async def refresh(self) -> None:
+        """Recieve areas from aggregator API and save snapshot on disk."""
+        try:
+            areas: dict = await self._fetcher()
+        except Exception:
+            self._failed_at = time.time()
+            logging.exception(
+                'Failed to refresh %s areas, using snapshot', self._src_name
+            )
+            return
+
+        if not areas:
+            return
+
+        loaded_at: float = time.time()
+        self._update(areas, loaded_at)
+        try:
+            await asyncio.to_thread(
+                self._write_snapshot,
+                {'loaded_at': loaded_at, 'areas': areas}
+            )
+        except OSError:
+            logging.exception('Failed to save %s areas', self._src_name)
+
+    def refresh_in_background(self) -> asyncio.Task:
+        """Start refreshing areas unless it's already running."""
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+        return self._refresh_task
+
+    async def get(self) -> dict:
+        """
+        Return areas dict. Waits for aggregator API only
+        if there are no areas neither in memory nor on disk.
+        Raise AreasUnavailableException if there are no areas
+        and API has failed, it isn't asked again until retry delay.
+        Cancelled caller doesn't cancel refresh shared by others.
+        """
+        if not self._areas:
+            await self.load()
+
+        if not self._areas and self._refresh_allowed:
+            await asyncio.shield(self.refresh_in_background())
+        elif self.expired and self._refresh_allowed:
+            self.refresh_in_background()
+
+        if not self._areas:
+            raise AreasUnavailableException(
+                '%s areas are unavailable' % self._src_name
+            )
+
+        return self._areas
+
+    async def get_index(self) -> AreaIndex:
+        """Return lookup index for current areas."""
+        await self.get()
+        return self._index
@@ -1,20 +1,69 @@
 import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Awaitable, Callable, NamedTuple
 
-from .db import VIDStorage
-from .exceptions import URLValueException
+from .breakers import CircuitBreaker
+from .cache import SearchCache
+from .client import backoff_delay
+from .constants import HTTP_BREAKER_RETRIES, HTTP_QUERY_CONCURRENCY
+from .db import run_in_storage, vid_storage, VIDStorage
+from .decoding import decode_json
+from .exceptions import (
+    CircuitOpenException,
+    RequestFailedException,
+    URLValueException,
+)
+from .filters import VacancyFilters
+from .limiters import RateLimiter
+from .metrics import metrics
 from .processors import TextProcessor
 from .utils import make_request
 
 
-class BaseVacancyCollector:
-    """Base model for vacancy collectors."""
+class FetchFailure(NamedTuple):
+    """Request which failed after all retries."""
+
+    url: str
+    error: Exception
+
+
+class CollectedVacancies(list):
+    """
+    Vacancy objects collected by query. Watermark is publication time
+    of the newest collected item, None if it must not be moved.
+    """
+
+    watermark: float | None = None
+
+
+class BaseVacancyCollector(ABC):
+    """
+    Base model for vacancy collectors.
+    Collectors of scoped runs (e.g. saved searches) keep own
+    query state and don't share seen ids with interactive searches.
+    Collector of source declares source name and title, and
+    maps source items to its model, which implements common
+    Vacancy model of vacscoll.models. Ids of different sources
+    must not collide. Source collector implements query creation,
+    areas directory and streaming of its result pages.
+    """
+
+    src_name: str | None = None
+    title: str | None = None
+    model: type | None = None
 
     def __init__(
         self,
         url: str,
         endpoint: str | None = None,
         params: dict | None = None,
-        filters: set | None = None
+        filters: VacancyFilters | None = None,
+        limiter: RateLimiter | None = None,
+        breaker: CircuitBreaker | None = None,
+        cache: SearchCache | None = None,
+        scope: str | None = None,
+        storage: VIDStorage = vid_storage,
+        concurrency: int = HTTP_QUERY_CONCURRENCY
     ) -> None:
         if not TextProcessor.is_correct_url(url):
             raise URLValueException(
@@ -24,19 +73,183 @@ class BaseVacancyCollector:
         self._url = url
         self._endpoint = endpoint
         self._params = params or {}
-        self._filters = filters or set()
+        self._filters = filters or VacancyFilters()
+        self._limiter = limiter
+        self._breaker = breaker
+        self._cache = cache
+        self._scope = scope
+
+        self._storage = storage
+        self._failures: list = []
+        self._newest: float | None = None
+        self._request_slots: asyncio.Semaphore = asyncio.Semaphore(
+            concurrency
+        )
 
-        self._storage = VIDStorage()
+    @property
+    def failures(self) -> list:
+        """Report of requests failed during collecting."""
+        return list(self._failures)
 
-    def _sift_vacancies(self, vacancies: list) -> list:
-        """Sift vacancies to leave new ones. New vacancies save in database."""
-        old_vacancies: set = self._storage.load()
+    @classmethod
+    @abstractmethod
+    def for_query(
+        cls,
+        keywords: str,
+        area: str | None = None,
+        filters: VacancyFilters | None = None,
+        scope: str | None = None
+    ) -> 'BaseVacancyCollector':
+        """Create collector of search query with source API parameters."""
+
+    @classmethod
+    @abstractmethod
+    async def fetch_areas(cls) -> dict:
+        """Recieve areas directory of source: names by area ids."""
+
+    def _sift_and_save(self, vacancies: list) -> list:
+        """Leave vacancies not saved in database and save all of them."""
+        old_vacancies: set = self._storage.load(
+            [vac.id for vac in vacancies]
+        )
         new_vacancies: list = [
             vac for vac in vacancies if vac.id not in old_vacancies
         ]
         self._storage.save(vacancies)
         return new_vacancies
 
+    @metrics.timed('sift')
+    async def _sift_vacancies(self, vacancies: list) -> list:
+        """
+        Sift vacancies to leave new ones. New vacancies save in database.
+        Scoped runs sift vacancies by themselves.
+        """
+        if self._scope is not None or not vacancies:
+            return vacancies
+
+        new_vacancies: list = await run_in_storage(
+            self._sift_and_save, vacancies
+        )
+        metrics.increment('vacancies_new', len(new_vacancies))
+        return new_vacancies
+
+    def cache_key(self) -> tuple:
+        """
+        Key of collector query for results cache.
+        Filters checked on collected items are part of the key.
+        """
+        key: tuple = (
+            type(self).__name__,
+            self._url,
+            self._endpoint,
+            tuple(sorted(self._params.items())),
+        )
+        predicate_key: tuple = self._filters.predicate_key()
+        if predicate_key:
+            key += (predicate_key, )
+
+        if self._scope is not None:
+            key += (self._scope, )
+
+        return key
+
+    def watermark_key(self) -> str:
+        """Query key for watermark of the newest collected vacancy."""
+        return repr(self.cache_key())
+
+    def _start_collecting(self, fetch: Callable[[], Awaitable]) -> tuple:
+        """
+        Return awaitable with all collected vacancies and flag whether
+        fetch was started. With cache, identical queries running
+        concurrently share one fetch and cached results aren't fetched.
+        Results collected with failed requests aren't cached,
+        so next identical query tries to collect them again.
+        """
+        if self._cache is None:
+            return asyncio.create_task(fetch()), True
+
+        return self._cache.join(
+            self.cache_key(), fetch, lambda: not self._failures
+        )
+
+    @abstractmethod
+    def _stream_pages(self, url: str) -> AsyncIterator[list]:
+        """Yield vacancy objects page by page."""
+
+    @metrics.timed('collect')
+    async def _collect(
+        self, url: str, queue: asyncio.Queue
+    ) -> CollectedVacancies:
+        """
+        Put vacancy objects in queue page by page as they are received.
+        End of pages is marked with None. Return all vacancy objects.
+        """
+        collected: CollectedVacancies = CollectedVacancies()
+        try:
+            async for vacancies in self._stream_pages(url):
+                collected.extend(vacancies)
+                metrics.increment('vacancies_collected', len(vacancies))
+                queue.put_nowait(vacancies)
+        finally:
+            queue.put_nowait(None)
+
+        if not self._failures:
+            collected.watermark = self._newest
+        return collected
+
+    async def _advance_watermark(self, collected: CollectedVacancies) -> None:
+        """
+        Save watermark of collected vacancies. It is called only
+        after consumer received all of them, so vacancies of abandoned
+        stream are requested again by next identical query.
+        """
+        if collected.watermark is not None:
+            await run_in_storage(
+                self._storage.save_watermark,
+                self.watermark_key(),
+                collected.watermark
+            )
+
+    async def stream(self) -> AsyncIterator[list]:
+        """
+        Yield sift vacancy objects page by page.
+        Results of cache or of identical running query
+        are yielded at once when they are ready.
+        Watermark is moved only if consumer received all pages.
+        """
+        request_url: str = self.make_request_url_with_params()
+        queue: asyncio.Queue = asyncio.Queue()
+        collecting, started = self._start_collecting(
+            lambda: self._collect(request_url, queue)
+        )
+
+        if not started:
+            collected: CollectedVacancies = await asyncio.shield(collecting)
+            new_vacancies: list = await self._sift_vacancies(collected)
+            if new_vacancies:
+                yield new_vacancies
+            await self._advance_watermark(collected)
+            return
+
+        try:
+            while (vacancies := await queue.get()) is not None:
+                new_vacancies: list = await self._sift_vacancies(vacancies)
+                if new_vacancies:
+                    yield new_vacancies
+        finally:
+            if self._cache is None and not collecting.done():
+                collecting.cancel()
+
+        await self._advance_watermark(await asyncio.shield(collecting))
+
+    async def run(self) -> list:
+        """Collecting vacancies and return sift vacancy objects."""
+        return [
+            vacancy
+            async for vacancies in self.stream()
+            for vacancy in vacancies
+        ]
+
     def make_request_url_with_params(
         self,
         endpoint: str = None,
@@ -44,7 +257,8 @@ class BaseVacancyCollector:
     ) -> str:
         """
         With url, endpoint and parameters making
-        request url.
+        request url. Parameter with tuple of values
+        is repeated for each value.
         """
         request_url: str = self._url
         if not endpoint:
@@ -61,30 +275,109 @@ class BaseVacancyCollector:
 
         request_url += endpoint
 
-        params_string: list = [
-            k + '=' + params[k]
-            for k in params
-        ]
+        params_string: list = []
+        for k in params:
+            values = params[k]
+            if isinstance(values, str):
+                values = (values, )
+            params_string.extend(k + '=' + value for value in values)
 
         if params_string:
             request_url += '?'
 
         return request_url + '&'.join(params_string)
 
+    async def _request(
+        self,
+        url: str,
+        decode: Callable[[bytes], Any] = decode_json,
+        retries: int = 0
+    ) -> Any:
+        """
+        Make request when collector has free request slot, so one
+        query doesn't take all connections of shared pool.
+        Request rejected by open circuit breaker is made again
+        up to retries times, when breaker lets requests through.
+        """
+        for attempt in range(retries + 1):
+            try:
+                async with self._request_slots:
+                    return await make_request(
+                        url, self._limiter, self._breaker, decode
+                    )
+            except CircuitOpenException:
+                if attempt == retries:
+                    raise
+
+            await asyncio.sleep(
+                backoff_delay(attempt, self._breaker.retry_after)
+            )
+
+    def create_request_tasks(
+        self,
+        urls: list,
+        decode: Callable[[bytes], Any] = decode_json,
+        retries: int = 0
+    ) -> list:
+        """
+        Create tasks to make requests paced by collector rate limiter
+        and guarded by its circuit breaker. No more than concurrency
+        requests of collector are running at once.
+        """
+        return [
+            asyncio.create_task(self._request(url, decode, retries))
+            for url in urls
+        ]
+
     async def get_response_data(
         self,
         urls: list,
-        delay: float | int = 0
+        decode: Callable[[bytes], Any] = decode_json,
+        retries: int = 0
     ) -> list:
         """
-        Create tasks with delay to make requests.
+        Make requests concurrently.
         Return list of decode JSON response data.
         """
-        tasks: list = []
-        for url in urls:
-            tasks.append(
-                asyncio.create_task(make_request(url))
-            )
-            await asyncio.sleep(delay)
+        return await asyncio.gather(
+            *self.create_request_tasks(urls, decode, retries)
+        )
 
-        return await asyncio.gather(*tasks)
+    async def iter_response_data(
+        self,
+        urls: list,
+        decode: Callable[[bytes], Any] = decode_json
+    ) -> AsyncIterator[dict]:
+        """
+        Make requests concurrently.
+        Yield decode JSON response data as soon as each request
+        succeeds, so slow request doesn't hold the others.
+        Failed requests are skipped and reported in failures,
+        requests rejected by open circuit breaker are made again
+        when it lets requests through.
+        """
+        pending: dict = dict(
+            zip(
+                self.create_request_tasks(
+                    urls, decode, HTTP_BREAKER_RETRIES
+                ),
+                urls
+            )
+        )
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    url: str = pending.pop(task)
+                    error: BaseException | None = task.exception()
+                    if isinstance(error, RequestFailedException):
+                        self._failures.append(FetchFailure(url, error))
+                    elif error is not None:
+                        raise error
+                    else:
+                        yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,201 @@
+import math
+import threading
+from typing import Iterable, Iterator
+
+from .constants import SEEN_FILTER_STALE_SHARE
+
+
+class BloomFilter:
+    """
+    Probabilistic set of keys.
+    May answer that key is present when it isn't (with error rate),
+    never answers that present key is absent.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError(
+                'capacity must be positive and error rate between 0 and 1'
+            )
+
+        self._capacity = capacity
+        self._error_rate = error_rate
+
+        bits: int = math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        )
+        self._size: int = max(8, bits)
+        self._hashes: int = max(1, round(self._size / capacity * math.log(2)))
+        self._bits = bytearray((self._size + 7) // 8)
+        self._count: int = 0
+
+    def _positions(self, key) -> Iterator[int]:
+        """
+        Bit positions of key made by double hashing over one
+        64-bit hash of key string. Builtin str hash is salted
+        per process, it's fine for filter living only in memory.
+        """
+        digest: int = hash(str(key)) & 0xFFFFFFFFFFFFFFFF
+        size: int = self._size
+        pos: int = digest % size
+        step: int = ((digest >> 32) | 1) % size
+        for _ in range(self._hashes):
+            yield pos
+            pos += step
+            if pos >= size:
+                pos -= size
+
+    def add(self, key) -> None:
+        """
+        Add key in filter. Key is counted only if it set some bit,
+        so repeated keys don't inflate number of items.
+        """
+        bits: bytearray = self._bits
+        added: bool = False
+        for pos in self._positions(key):
+            mask: int = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                bits[pos >> 3] |= mask
+                added = True
+        if added:
+            self._count += 1
+
+    def update(self, keys: Iterable) -> None:
+        """Add all keys in filter."""
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key) -> bool:
+        bits: bytearray = self._bits
+        for pos in self._positions(key):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._bits)
+
+    @property
+    def estimated_error_rate(self) -> float:
+        """False positive rate for current number of added keys."""
+        fill: float = 1 - math.exp(-self._hashes * self._count / self._size)
+        return fill ** self._hashes
+
+    def stats(self) -> dict:
+        return {
+            'capacity': self._capacity,
+            'error_rate': self._error_rate,
+            'size_bytes': self.size_bytes,
+            'hashes': self._hashes,
+            'items': self._count,
+            'estimated_error_rate': self.estimated_error_rate,
+        }
+
+
+class SeenIDFilter:
+    """
+    Memory-resident layer in front of vacancies ID database.
+    Filter negatives are exact, so only positives need db check.
+    Removed ids can't be dropped from bloom filter, they make
+    filter stale until it's rebuilt from db. Filter is rebuilt
+    when stale share of its ids is over stale_share.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        stale_share: float = SEEN_FILTER_STALE_SHARE
+    ) -> None:
+        self._capacity = capacity
+        self._error_rate = error_rate
+        self._stale_share = stale_share
+
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._pending: list | None = None
+        self._ready: bool = False
+
+        self._stale: int = 0
+        self._checks: int = 0
+        self._positives: int = 0
+        self._false_positives: int = 0
+
+    @property
+    def ready(self) -> bool:
+        """Filter is warmed with ids from db."""
+        return self._ready
+
+    @property
+    def needs_rebuild(self) -> bool:
+        return (
+            self._stale > len(self._bloom) * self._stale_share
+            or len(self._bloom) > self._capacity
+        )
+
+    def add(self, ids: Iterable) -> None:
+        """Write-through saved ids."""
+        with self._lock:
+            ids = list(ids)
+            self._bloom.update(ids)
+            if self._pending is not None:
+                self._pending.extend(ids)
+
+    def discard(self, ids: Iterable) -> None:
+        """Write-through removed ids. They stay in filter until rebuild."""
+        self.mark_stale(len(list(ids)))
+
+    def mark_stale(self, count: int) -> None:
+        """Count ids removed from db, e.g. purged expired ones."""
+        with self._lock:
+            self._stale += count
+
+    def candidates(self, ids: Iterable) -> list:
+        """Return ids that may be saved in db."""
+        bloom: BloomFilter = self._bloom
+        found: list = [vid for vid in ids if vid in bloom]
+        self._checks += 1
+        self._positives += len(found)
+        return found
+
+    def report_false_positives(self, count: int) -> None:
+        """Count positives which db check didn't confirm."""
+        self._false_positives += count
+
+    def rebuild(self, ids: Iterable) -> None:
+        """
+        Replace filter with new one built from ids.
+        Ids added while building are replayed in new filter,
+        ids removed while building are still counted as stale.
+        Old filter serves checks until new one is swapped in.
+        """
+        with self._rebuild_lock:
+            with self._lock:
+                self._pending = []
+                stale: int = self._stale
+
+            bloom = BloomFilter(self._capacity, self._error_rate)
+            bloom.update(ids)
+
+            with self._lock:
+                bloom.update(self._pending)
+                self._bloom = bloom
+                self._pending = None
+                self._stale -= stale
+                self._ready = True
+
+    def stats(self) -> dict:
+        stats: dict = self._bloom.stats()
+        stats.update(
+            ready=self._ready,
+            stale=self._stale,
+            checks=self._checks,
+            positives=self._positives,
+            false_positives=self._false_positives,
+        )
+        return stats
@@ -0,0 +1,103 @@
+import time
+
+from .constants import HH_BREAKER_FAILURES, HH_BREAKER_RECOVERY
+from .exceptions import CircuitOpenException
+
+
+class CircuitBreaker:
+    """
+    Process-wide circuit breaker of API requests.
+    Opens after several failed requests in a row and then
+    rejects requests at once. After recovery timeout one trial
+    request is let through, its success closes breaker.
+    Throttled trial opens breaker again, trial finished without
+    outcome (e.g. cancelled) lets next request through as trial.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = HH_BREAKER_FAILURES,
+        recovery_timeout: float | int = HH_BREAKER_RECOVERY,
+    ) -> None:
+        if failure_threshold < 1:
+            raise ValueError('failure threshold must be at least 1')
+
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+
+        self._failures: int = 0
+        self._opened_at: float | None = None
+        self._trial: bool = False
+
+    @property
+    def state(self) -> str:
+        """Breaker state: closed, open or half-open."""
+        if self._opened_at is None:
+            return 'closed'
+
+        if self._trial or self._recovered():
+            return 'half-open'
+
+        return 'open'
+
+    @property
+    def retry_after(self) -> float:
+        """
+        Seconds until breaker may let request through. While trial
+        request is running it's recovery timeout, which failed
+        trial starts again.
+        """
+        if self._opened_at is None:
+            return 0.0
+
+        if self._trial:
+            return float(self._recovery_timeout)
+
+        return max(
+            0.0, self._opened_at + self._recovery_timeout - time.monotonic()
+        )
+
+    def _recovered(self) -> bool:
+        """Check recovery timeout has passed since breaker opened."""
+        return time.monotonic() - self._opened_at >= self._recovery_timeout
+
+    def before_request(self) -> None:
+        """
+        Let request through or raise CircuitOpenException.
+        While breaker is half-open only one trial request is allowed.
+        """
+        if self._opened_at is None:
+            return
+
+        if self._trial or not self._recovered():
+            raise CircuitOpenException(
+                'API is unavailable, retry in %.0f s' % self.retry_after
+            )
+
+        self._trial = True
+
+    def record_success(self) -> None:
+        """Close breaker after successful request."""
+        self._failures = 0
+        self._opened_at = None
+        self._trial = False
+
+    def record_throttled(self) -> None:
+        """Open breaker again if trial request was throttled."""
+        if self._trial:
+            self._opened_at = time.monotonic()
+            self._trial = False
+
+    def release_trial(self) -> None:
+        """Finish trial request which outcome isn't recorded."""
+        self._trial = False
+
+    def record_failure(self) -> None:
+        """Count failed request, open breaker if there are too many."""
+        self._failures += 1
+        if self._trial or self._failures >= self._failure_threshold:
+            self._opened_at = time.monotonic()
+            self._trial = False
+
+
+hh_circuit_breaker: CircuitBreaker = CircuitBreaker()
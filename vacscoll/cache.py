@@ -0,0 +1,149 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable
+
+from .constants import (
+    SEARCH_CACHE_MAX_VACANCIES,
+    SEARCH_CACHE_SIZE,
+    SEARCH_CACHE_TTL,
+)
+
+
+class SearchCache:
+    """
+    TTL-bounded LRU cache of collectors results.
+    Cache is bounded by number of results and by total
+    number of vacancies in them, result larger than
+    the whole bound isn't cached.
+    Concurrent requests of the same key share one fetch.
+    """
+
+    def __init__(
+        self,
+        ttl: float | int = SEARCH_CACHE_TTL,
+        max_size: int = SEARCH_CACHE_SIZE,
+        max_vacancies: int = SEARCH_CACHE_MAX_VACANCIES,
+    ) -> None:
+        self._ttl = ttl
+        self._max_size = max_size
+        self._max_vacancies = max_vacancies
+
+        self._entries: OrderedDict = OrderedDict()
+        self._in_flight: dict = {}
+        self._vacancies: int = 0
+
+        self._hits: int = 0
+        self._misses: int = 0
+        self._coalesced: int = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable):
+        """Return not expired cached value or None."""
+        entry: tuple | None = self._entries.get(key)
+        if entry is None:
+            return
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return
+
+        self._entries.move_to_end(key)
+        return value
+
+    def _remove(self, key: Hashable) -> None:
+        _, value = self._entries.pop(key)
+        self._vacancies -= len(value)
+
+    def _store(self, key: Hashable, value) -> None:
+        if key in self._entries:
+            self._remove(key)
+
+        if len(value) > self._max_vacancies:
+            return
+
+        self._entries[key] = (time.monotonic() + self._ttl, value)
+        self._vacancies += len(value)
+        while (
+            len(self._entries) > self._max_size
+            or self._vacancies > self._max_vacancies
+        ):
+            self._remove(next(iter(self._entries)))
+
+    async def _fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable],
+        cacheable: Callable[[], bool] | None
+    ):
+        """
+        Run fetch and cache its result unless cacheable says
+        result is incomplete. Failures aren't cached.
+        """
+        try:
+            value = await fetch()
+            if cacheable is None or cacheable():
+                self._store(key, value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    def join(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable],
+        cacheable: Callable[[], bool] | None = None
+    ) -> tuple:
+        """
+        Return awaitable with value of key and flag
+        whether fetch was started by this call. On hit awaitable
+        is already done, on miss fetch is started, otherwise
+        it's already running fetch of the same key.
+        Fetched value is cached if cacheable returns True after fetch.
+        """
+        value = self._lookup(key)
+        if value is not None:
+            self._hits += 1
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            return future, False
+
+        task: asyncio.Task | None = self._in_flight.get(key)
+        if task is not None:
+            self._coalesced += 1
+            return task, False
+
+        self._misses += 1
+        task = asyncio.create_task(self._fetch(key, fetch, cacheable))
+        self._in_flight[key] = task
+        return task, True
+
+    async def get(self, key: Hashable, fetch: Callable[[], Awaitable]):
+        """
+        Return cached value of key. On miss run fetch,
+        or join already running fetch of the same key.
+        """
+        awaitable, _ = self.join(key, fetch)
+        return await asyncio.shield(awaitable)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._vacancies = 0
+
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'max_size': self._max_size,
+            'vacancies': self._vacancies,
+            'max_vacancies': self._max_vacancies,
+            'in_flight': len(self._in_flight),
+            'hits': self._hits,
+            'misses': self._misses,
+            'coalesced': self._coalesced,
+        }
+
+
+search_cache: SearchCache = SearchCache()
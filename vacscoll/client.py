@@ -0,0 +1,242 @@
+import asyncio
+import datetime as dt
+import random
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .breakers import CircuitBreaker
+from .constants import (
+    HTTP_BACKOFF_BASE,
+    HTTP_BACKOFF_MAX,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_CONNECTIONS_LIMIT,
+    HTTP_CONNECTIONS_PER_HOST,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_RETRIES,
+    HTTP_TOTAL_TIMEOUT,
+)
+from .decoding import decode_json, DECODE_ERRORS
+from .exceptions import RequestFailedException, TooManyRequestsException
+from .limiters import RateLimiter
+from .metrics import metrics
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Seconds to wait from Retry-After header (delay or HTTP date)."""
+    if not value:
+        return
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return
+
+    now = dt.datetime.now(retry_date.tzinfo)
+    return max(0.0, (retry_date - now).total_seconds())
+
+
+def backoff_delay(
+    attempt: int,
+    retry_after: float | None = None,
+    base: float | int = HTTP_BACKOFF_BASE,
+    max_delay: float | int = HTTP_BACKOFF_MAX,
+) -> float:
+    """
+    Exponential backoff with full jitter before next attempt,
+    not shorter than delay asked by server.
+    """
+    delay: float = random.uniform(0, min(max_delay, base * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class HTTPClient:
+    """
+    Long-lived HTTP client shared by all collectors.
+    Keeps connections to aggregator APIs alive between requests.
+    """
+
+    def __init__(
+        self,
+        limit: int = HTTP_CONNECTIONS_LIMIT,
+        limit_per_host: int = HTTP_CONNECTIONS_PER_HOST,
+        dns_cache_ttl: int = HTTP_DNS_CACHE_TTL,
+        keepalive_timeout: float | int = HTTP_KEEPALIVE_TIMEOUT,
+        total_timeout: float | int = HTTP_TOTAL_TIMEOUT,
+        connect_timeout: float | int = HTTP_CONNECT_TIMEOUT,
+        read_timeout: float | int = HTTP_READ_TIMEOUT,
+        retries: int = HTTP_RETRIES,
+    ) -> None:
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._dns_cache_ttl = dns_cache_ttl
+        self._keepalive_timeout = keepalive_timeout
+        self._timeout = aiohttp.ClientTimeout(
+            total=total_timeout,
+            connect=connect_timeout,
+            sock_read=read_timeout,
+        )
+        self._retries = retries
+
+        self._session: aiohttp.ClientSession | None = None
+        self._host_slots: dict = {}
+
+    @property
+    def closed(self) -> bool:
+        return self._session is None or self._session.closed
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Opened session. Client must be started before."""
+        if self.closed:
+            raise RuntimeError('HTTP client is not started')
+
+        return self._session
+
+    async def start(self) -> None:
+        """Open pooled session if it isn't opened yet."""
+        if not self.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=self._limit,
+            limit_per_host=self._limit_per_host,
+            ttl_dns_cache=self._dns_cache_ttl,
+            keepalive_timeout=self._keepalive_timeout,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self._timeout,
+        )
+
+    async def close(self) -> None:
+        """Close session and release all pooled connections."""
+        if self.closed:
+            return
+
+        await self._session.close()
+        self._session = None
+        self._host_slots.clear()
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        """
+        Pooled connections to host of url. Request waits for free
+        connection before its timeouts start, so waiting for busy pool
+        isn't taken for failed connection.
+        """
+        host: str = urlsplit(url).netloc
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self._limit_per_host)
+
+        return self._host_slots[host]
+
+    async def get_json(
+        self,
+        url: str,
+        limiter: RateLimiter | None = None,
+        breaker: CircuitBreaker | None = None,
+        decode: Callable[[bytes], Any] = decode_json
+    ) -> dict:
+        """
+        Making GET request with shared session.
+        Throttled (429), failed (5xx), timed out and broken requests
+        are retried with exponential backoff and jitter.
+        Attempt waits for free pooled connection to host first,
+        so timeouts count only the request itself.
+        If limiter passed, wait for it before every attempt
+        and report to it whether API throttles requests.
+        If breaker passed, it rejects requests while API is degraded.
+        Return JSON response decoded from body bytes by decode.
+        """
+        if self.closed:
+            await self.start()
+
+        for attempt in range(self._retries + 1):
+            if breaker:
+                breaker.before_request()
+
+            retry_after: float | None = None
+            throttled: bool = False
+            try:
+                async with self._host_slot(url):
+                    if limiter:
+                        await limiter.acquire()
+
+                    async with self._session.get(url) as response:
+                        retry_after = parse_retry_after(
+                            response.headers.get('Retry-After')
+                        )
+                        throttled = response.status == 429
+
+                        if limiter and (
+                            throttled or retry_after is not None
+                        ):
+                            limiter.slow_down(retry_after)
+                        elif limiter:
+                            limiter.speed_up()
+
+                        if throttled:
+                            error = TooManyRequestsException(
+                                'API rate limit exceeded for \'%s\'' % url
+                            )
+                        elif response.status >= 500:
+                            error = RequestFailedException(
+                                'API responded %d for \'%s\''
+                                % (response.status, url)
+                            )
+                        elif response.status >= 400:
+                            if breaker:
+                                breaker.record_success()
+                            raise RequestFailedException(
+                                'API responded %d for \'%s\''
+                                % (response.status, url)
+                            )
+                        else:
+                            body: bytes = await response.read()
+                            with metrics.timer('json_decode'):
+                                data: dict = decode(body)
+                            if breaker:
+                                breaker.record_success()
+                            return data
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                error = RequestFailedException(
+                    'request to \'%s\' failed: %r' % (url, exc)
+                )
+            except DECODE_ERRORS as exc:
+                error = RequestFailedException(
+                    'invalid JSON response for \'%s\': %r' % (url, exc)
+                )
+            except BaseException:
+                if breaker:
+                    breaker.release_trial()
+                raise
+
+            metrics.increment(
+                'http_throttled' if throttled else 'http_failed_attempts'
+            )
+            if breaker and throttled:
+                breaker.record_throttled()
+            elif breaker:
+                breaker.record_failure()
+
+            if attempt == self._retries:
+                break
+
+            if throttled and limiter:
+                continue
+
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+
+        raise error
+
+
+http_client: HTTPClient = HTTPClient()
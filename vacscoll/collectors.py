@@ -1,86 +1,267 @@
-import asyncio
+import datetime as dt
+import logging
+import time
+from typing import AsyncIterator
+from urllib.parse import quote
 
-from .bases import BaseVacancyCollector
-from .constants import HH_REQUEST_DELAY
-from .models import VacancyHH
+from .bases import BaseVacancyCollector, FetchFailure
+from .breakers import hh_circuit_breaker
+from .cache import search_cache
+from .constants import (
+    HH_DATETIME_FORMAT,
+    HH_MAX_RESULTS,
+    HH_MIN_SPLIT_WINDOW,
+    HH_REGION_RU,
+    HH_SEARCH_PERIOD,
+    HH_URL,
+    HTTP_BREAKER_RETRIES,
+)
+from .db import run_in_storage
+from .decoding import decode_hh_page
+from .exceptions import RequestFailedException
+from .filters import VacancyFilters
+from .limiters import hh_rate_limiter
+from .metrics import metrics
+from .models import parse_published_at, VacancyHH
+from .registry import collector_registry
+from .utils import merge_async_iterators
 
 
+def unpacking(areas: list) -> dict:
+    """Get nested cities from regions."""
+    def dfs(regions: list) -> None:
+        for region in regions:
+            _id = region.get('id')
+            _name = region.get('name')
+            total_regions[_id] = _name
+            areas = region.get('areas')
+            if areas:
+                dfs(areas)
+
+    total_regions: dict = {}
+    dfs(areas)
+    return total_regions
+
+
+@collector_registry.register
 class VacancyHHCollector(BaseVacancyCollector):
     """
     Model collecting vacancies, select by filters
     and returns a list of VacancyHH objects
     """
 
+    src_name: str = 'hh'
+    title: str = 'hh.ru'
+    model: type = VacancyHH
+
     def __init__(self, *args, **kwargs) -> None:
+        kwargs.setdefault('limiter', hh_rate_limiter)
+        kwargs.setdefault('breaker', hh_circuit_breaker)
+        kwargs.setdefault('cache', search_cache)
         super().__init__(*args, **kwargs)
 
-        self._delay: float | int = HH_REQUEST_DELAY
+        self._params = {**self._params, **self._filters.to_params()}
+        self._predicate = self._filters.predicate()
 
+    @classmethod
+    def for_query(
+        cls,
+        keywords: str,
+        area: str | None = None,
+        filters: VacancyFilters | None = None,
+        scope: str | None = None
+    ) -> 'VacancyHHCollector':
+        """Create collector of search query with hh API parameters."""
+        params: dict = {
+            'text': '+'.join(keywords.casefold().split()),
+            'per_page': '100',
+            'no_magic': 'true',
+        }
+        if area:
+            params.update({'area': area})
+
+        return cls(HH_URL, 'vacancies', params, filters, scope=scope)
+
+    @classmethod
+    async def fetch_areas(cls) -> dict:
+        """Recieve areas dict from HH API."""
+        vacscoll = cls(HH_URL)
+        url = vacscoll.make_request_url_with_params('areas/' + HH_REGION_RU)
+        dataset = await vacscoll.get_response_data([url])
+        return unpacking(dict(*dataset).get('areas'))
+
+    @metrics.timed('apply_filters')
     def _apply_filters(self, items: list) -> list:
-        """Filtering vacancies."""
-        processed_items: list = []
+        """Filtering vacancies in one pass with precompiled predicate."""
+        return [item for item in items if self._predicate(item)]
 
-        for item in items:
-            experience: str = item.get('experience').get('id')
-            employment: str = item.get('employment').get('id')
+    @metrics.timed('process_items')
+    def _process_items(self, items: list) -> list:
+        """Filter page items and wrap them in vacancy objects."""
+        if self._predicate:
+            items: list = self._apply_filters(items)
 
-            if (
-                    experience not in self._filters
-                    and employment not in self._filters
-            ):
-                processed_items.append(item)
+        return [self.model(item) for item in items]
 
-        return processed_items
+    def _start_watermark(self, published_at: float) -> None:
+        """Save watermark unless query already has one."""
+        watermark_key: str = self.watermark_key()
+        if self._storage.load_watermark(watermark_key) is None:
+            self._storage.save_watermark(watermark_key, published_at)
 
-    async def _extract_rest_vacancies(
+    async def start_watermark(self, published_at: float) -> None:
+        """
+        Save watermark unless query already has one,
+        so next run collects only vacancies published later.
+        """
+        await run_in_storage(self._start_watermark, published_at)
+
+    def _window_url(
         self,
         url: str,
-        total_pages: int
-    ) -> list:
-        """Extract vacancies from rest pages."""
-        urls: list = [
-            url + '&page=%d' % page_num
-            for page_num in range(1, total_pages)
-        ]
-
-        dataset = await self.get_response_data(urls, self._delay)
-
-        return [
-            item for data in dataset
-            for item in data.get('items')
-        ]
-
-    async def _recieve_vacancies(self, url: str) -> list:
+        date_from: float | None,
+        date_to: float | None
+    ) -> str:
+        """Request only vacancies published within time window."""
+        for param, timestamp in (
+            ('date_from', date_from),
+            ('date_to', date_to),
+        ):
+            if timestamp is None:
+                continue
+
+            date: str = dt.datetime.fromtimestamp(
+                int(timestamp), dt.timezone.utc
+            ).strftime(HH_DATETIME_FORMAT)
+            url += '&%s=%s' % (param, quote(date, safe=''))
+
+        return url
+
+    def _split_window(
+        self,
+        date_from: float | None,
+        date_to: float | None
+    ) -> list | None:
         """
-        Collecting vacancy objects in list
-        from all vacancies with specified parameters.
-        If response contains more than one page,
-        then make async requests for remaining pages.
+        Split time window in two disjoint halves.
+        Return None if window is too short to split.
         """
-        dataset: list = await self.get_response_data([url])
+        date_to = int(date_to or time.time())
+        date_from = int(date_from or date_to - HH_SEARCH_PERIOD)
+        if date_to - date_from <= HH_MIN_SPLIT_WINDOW:
+            return
 
-        data: dict = dict(*dataset)
+        middle: int = (date_from + date_to) // 2
+        return [(date_from, middle), (middle + 1, date_to)]
 
-        vacancies_items: list = data.get('items')
+    async def _iter_pages(
+        self,
+        url: str,
+        date_from: float | None = None,
+        date_to: float | None = None,
+        required: bool = True
+    ) -> AsyncIterator[dict]:
+        """
+        Yield decoded pages of query within time window.
+        First page tells the number of pages, then remaining pages
+        are requested concurrently and yielded as soon as each is ready.
+        API returns no more than HH_MAX_RESULTS vacancies for query,
+        so if more were found, window is split in halves which are
+        collected concurrently. Failed pages, and failed split windows,
+        are reported in failures, the rest are still collected.
+        Split windows and pages rejected by open circuit breaker
+        are requested again when it lets requests through.
+        """
+        window_url: str = self._window_url(url, date_from, date_to)
+        try:
+            first_page, = await self.get_response_data(
+                [window_url],
+                decode_hh_page,
+                0 if required else HTTP_BREAKER_RETRIES
+            )
+        except RequestFailedException as error:
+            if required:
+                raise
 
-        current_page: int = data.get('page', 0)
-        total_pages: int = data.get('pages', 0)
+            self._failures.append(FetchFailure(window_url, error))
+            return
 
-        if current_page < total_pages:
-            items: list = await asyncio.gather(
-                asyncio.create_task(
-                    self._extract_rest_vacancies(url, total_pages)
-                )
-            )
-            vacancies_items.extend(*items)
+        if first_page.get('found', 0) > HH_MAX_RESULTS:
+            windows: list | None = self._split_window(date_from, date_to)
+            if windows:
+                async for page in merge_async_iterators([
+                    self._iter_pages(url, *window, required=False)
+                    for window in windows
+                ]):
+                    yield page
+                return
+
+        yield first_page
 
-        if self._filters:
-            vacancies_items: list = self._apply_filters(vacancies_items)
+        current_page: int = first_page.get('page', 0)
+        total_pages: int = first_page.get('pages', 0)
+        pages: AsyncIterator[dict] = self.iter_response_data(
+            [
+                window_url + '&page=%d' % page_num
+                for page_num in range(current_page + 1, total_pages)
+            ],
+            decode_hh_page
+        )
+        try:
+            async for page in pages:
+                yield page
+        finally:
+            await pages.aclose()
 
-        return [VacancyHH(item) for item in vacancies_items]
+    async def _stream_pages(self, url: str) -> AsyncIterator[list]:
+        """
+        Yield vacancy objects page by page as soon as each is ready.
+        Vacancies found by several split queries are yielded once.
+        If query was collected before, only vacancies published
+        after the newest collected one are requested.
+        Publication time of the newest item is kept as watermark,
+        which stream saves unless some pages failed,
+        so next run collects missed vacancies.
+        """
+        watermark: float | None = await run_in_storage(
+            self._storage.load_watermark, self.watermark_key()
+        )
+        if watermark is not None:
+            url += '&order_by=publication_time'
 
-    async def run(self) -> list:
-        """Collecting vacancies and return sift vacancy objects."""
-        request_url: str = self.make_request_url_with_params()
-        vacancies: list = await self._recieve_vacancies(request_url)
-        return self._sift_vacancies(vacancies)
+        newest: float | None = watermark
+        collected_ids: set = set()
+        pages: AsyncIterator[dict] = self._iter_pages(url, watermark)
+        try:
+            async for data in pages:
+                items: list = [
+                    item for item in data.get('items', [])
+                    if item.get('id') not in collected_ids
+                ]
+                collected_ids.update(item.get('id') for item in items)
+
+                published: list = [
+                    parse_published_at(item.get('published_at'))
+                    for item in items
+                ]
+                newest = max(
+                    (ts for ts in (newest, *published) if ts is not None),
+                    default=None
+                )
+                self._newest = newest
+
+                if watermark is not None:
+                    items = [
+                        item for item, ts in zip(items, published)
+                        if ts is None or ts > watermark
+                    ]
+                yield self._process_items(items)
+        finally:
+            await pages.aclose()
+
+        if self._failures:
+            logging.warning(
+                '%d requests failed, vacancies are collected partially: %s',
+                len(self._failures),
+                '; '.join(str(failure.error) for failure in self._failures)
+            )
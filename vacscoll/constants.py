@@ -1,20 +1,114 @@
+import os
 from pathlib import Path
 
 
 BASE_DIR: Path = Path(__file__).resolve().parent.parent
 
-DB_DIR: Path = BASE_DIR / 'database'
+DB_DIR: Path = Path(os.getenv('VACSCOLL_DB_DIR', BASE_DIR / 'database'))
 
-DB_NAME: str = str(DB_DIR / 'db.vacancies')
+DB_NAME: str = str(DB_DIR / 'vacancies.sqlite3')
+
+SHELVE_DB_NAME: str = str(DB_DIR / 'db.vacancies')
+
+DB_BATCH_SIZE: int = 500
+
+SEEN_FILTER_CAPACITY: int = 1_000_000
+
+SEEN_FILTER_ERROR_RATE: float = 0.001
+
+SEEN_FILTER_STALE_SHARE: float = 0.2
 
 MAX_AGE: int = 7
 
-HH_REQUEST_DELAY: float | int = 0.16
+HH_RATE_LIMIT: float | int = 6
+
+HH_RATE_BURST: int = 6
+
+HH_RATE_MIN: float | int = 0.5
+
+HH_RATE_DECREASE_FACTOR: float = 0.5
+
+HH_RATE_INCREASE_STEP: float | int = 0.2
 
 HH_REGION_RU: str = '113'
 
+SEARCH_CACHE_TTL: int = 5 * 60
+
+SEARCH_CACHE_SIZE: int = 128
+
+SEARCH_CACHE_MAX_VACANCIES: int = 50_000
+
+AREAS_TTL: int = 24 * 60 * 60
+
+AREAS_RETRY_DELAY: int = 5 * 60
+
+AREA_FUZZY_CUTOFF: float = 0.75
+
+AREA_ALIASES: dict = {
+    'мск': 'москва',
+    'спб': 'санкт-петербург',
+    'питер': 'санкт-петербург',
+    'петербург': 'санкт-петербург',
+    'екб': 'екатеринбург',
+    'нск': 'новосибирск',
+    'нн': 'нижний новгород',
+    'нижний': 'нижний новгород',
+    'мо': 'московская область',
+    'подмосковье': 'московская область',
+    'ло': 'ленинградская область',
+}
+
+ALL_SOURCES: str = 'all'
+
 HH_URL: str = 'https://api.hh.ru'
 
-TAG_PATTERN: str = '<.*?>|&([a-z0-9]+|#[0-9]{1,6}|#x[0-9a-f]{1,6});'
+HH_VACANCY_URL: str = 'https://hh.ru/vacancy/%s'
+
+HH_DATETIME_FORMAT: str = '%Y-%m-%dT%H:%M:%S%z'
+
+HH_MAX_RESULTS: int = 2000
+
+HH_SEARCH_PERIOD: int = 30 * 24 * 60 * 60
+
+HH_MIN_SPLIT_WINDOW: int = 10 * 60
+
+HTTP_CONNECTIONS_LIMIT: int = 100
+
+HTTP_CONNECTIONS_PER_HOST: int = 20
+
+HTTP_QUERY_CONCURRENCY: int = 10
+
+HTTP_DNS_CACHE_TTL: int = 300
+
+HTTP_KEEPALIVE_TIMEOUT: float | int = 30
+
+HTTP_TOTAL_TIMEOUT: float | int = 30
+
+HTTP_CONNECT_TIMEOUT: float | int = 5
+
+HTTP_READ_TIMEOUT: float | int = 15
+
+HTTP_RETRIES: int = 3
+
+HTTP_BACKOFF_BASE: float | int = 0.5
+
+HTTP_BACKOFF_MAX: float | int = 10
+
+HTTP_BREAKER_RETRIES: int = 2
+
+HH_BREAKER_FAILURES: int = 5
+
+HH_BREAKER_RECOVERY: float | int = 30
+
+METRICS_PREFIX: str = 'vacscoll'
+
+METRICS_BUCKETS: tuple = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30,
+)
+
+TAG_PATTERN: str = '<[^>]*>'
+
+CLEANING_CACHE_SIZE: int = 4096
 
 URL_PATTERN: str = r"(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'\".,<>?«»“”‘’]))"
@@ -1,73 +1,329 @@
+import asyncio
 import datetime as dt
+import dbm
+import glob
 import os
 import shelve
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterator
 
-from .constants import DB_DIR, DB_NAME, MAX_AGE
+from .bloom import SeenIDFilter
+from .constants import (
+    DB_BATCH_SIZE,
+    DB_NAME,
+    MAX_AGE,
+    SEEN_FILTER_CAPACITY,
+    SEEN_FILTER_ERROR_RATE,
+    SHELVE_DB_NAME,
+)
+from .metrics import metrics
 
 
-class VIDStorage:
+seen_ids: SeenIDFilter = SeenIDFilter(
+    SEEN_FILTER_CAPACITY, SEEN_FILTER_ERROR_RATE
+)
+
+storage_executor: ThreadPoolExecutor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix='storage'
+)
+
+
+async def run_in_storage(func: Callable, *args) -> Any:
+    """
+    Run blocking storage call in storage thread, so event loop
+    isn't blocked by disk I/O. Calls of all stores run there
+    one at a time in order of submission, so db connections
+    are never used by two threads at once.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(storage_executor, func, *args)
+
+
+class SQLiteStore:
+    """
+    Base of stores keeping their data in own SQLite db.
+    Connection is opened on first use in WAL mode and
+    tables are created by _create_tables of store.
+    Db is accessed only in storage thread.
+    """
+
+    def __init__(self, db_name: str) -> None:
+        self._db_name = db_name
+
+        self._connection: sqlite3.Connection | None = None
+
+    def _create_tables(self, connection: sqlite3.Connection) -> None:
+        """Create tables and indexes of store if they aren't exist."""
+        raise NotImplementedError
+
+    def _connect(self) -> sqlite3.Connection:
+        """Return opened connection to db, create tables on first use."""
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self._db_name), exist_ok=True)
+            connection = sqlite3.connect(
+                self._db_name, timeout=30, check_same_thread=False
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            with connection:
+                self._create_tables(connection)
+            self._connection = connection
+
+        return self._connection
+
+    def _close(self) -> None:
+        """Close connection to db."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    async def close(self) -> None:
+        """Close connection to db."""
+        await run_in_storage(self._close)
+
+
+class VIDStorage(SQLiteStore):
     """Vacancies ID database."""
 
-    def __init__(self) -> None:
-        self._db_path = DB_DIR
-        self._db_name = DB_NAME
+    def __init__(
+        self,
+        seen_filter: SeenIDFilter = seen_ids,
+        db_name: str = DB_NAME,
+    ) -> None:
+        super().__init__(db_name)
         self._max_age = MAX_AGE
+        self._batch_size = DB_BATCH_SIZE
+        self._seen_filter = seen_filter
 
-        self._prepare_database()
+    def _create_tables(self, connection: sqlite3.Connection) -> None:
+        """
+        Create tables with indexes if they aren't exist.
+        New database imports ids of old shelve database.
+        """
+        is_new_db: bool = connection.execute(
+            'SELECT 1 FROM sqlite_master '
+            'WHERE type = \'table\' AND name = \'vacancies\''
+        ).fetchone() is None
 
-    def _create_db(self) -> None:
-        """Create db dir and file in that dir."""
-        if not self._dir_is_exists():
-            os.mkdir(self._db_path)
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS vacancies ('
+            'id TEXT PRIMARY KEY, '
+            'saved_at REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        connection.execute(
+            'CREATE INDEX IF NOT EXISTS vacancies_saved_at '
+            'ON vacancies (saved_at)'
+        )
+        connection.execute(
+            'CREATE TABLE IF NOT EXISTS watermarks ('
+            'query TEXT PRIMARY KEY, '
+            'published_at REAL NOT NULL, '
+            'updated_at REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        if is_new_db:
+            self._migrate_shelve(connection)
 
-        with shelve.open(self._db_name):
-            pass
+    def _migrate_shelve(self, connection: sqlite3.Connection) -> None:
+        """
+        One-shot import of ids from old shelve database.
+        Shelve files are renamed after import to not be imported again.
+        """
+        if not dbm.whichdb(SHELVE_DB_NAME):
+            return
 
-    def _dir_is_exists(self) -> bool:
-        """Check db catalog is exists"""
-        return os.path.isdir(self._db_path)
+        with shelve.open(SHELVE_DB_NAME, flag='r') as vdb:
+            rows: list = [(vid, vdb[vid]) for vid in vdb]
 
-    def _file_is_exists(self) -> bool:
-        """Check db file is exists."""
-        return os.path.exists(self._db_path)
+        connection.executemany(
+            'INSERT OR IGNORE INTO vacancies (id, saved_at) '
+            'VALUES (?, ?)',
+            rows
+        )
 
-    def _prepare_database(self) -> None:
-        """Creating database if it isn't exists."""
-        if not self._file_is_exists():
-            self._create_db()
+        for path in glob.glob(glob.escape(SHELVE_DB_NAME) + '*'):
+            os.rename(path, path + '.migrated')
+
+    def _batches(self, items: list) -> list:
+        """Split items for queries with limited number of variables."""
+        return [
+            items[i:i + self._batch_size]
+            for i in range(0, len(items), self._batch_size)
+        ]
+
+    def _expire_time(self) -> float:
+        """Timestamp before which saved ids are expired."""
+        time_delta = dt.timedelta(self._max_age)
+        return dt.datetime.timestamp(dt.datetime.now() - time_delta)
 
     def clean(self, vacancies_ids: list) -> None:
         """Remove vacancies id from db."""
-        with shelve.open(self._db_name) as vdb:
-            for vid in vacancies_ids:
-                if vid in vdb:
-                    vdb.pop(vid)
+        with self._connect() as connection:
+            connection.executemany(
+                'DELETE FROM vacancies WHERE id = ?',
+                ((vid, ) for vid in vacancies_ids)
+            )
+
+        self._seen_filter.discard(vacancies_ids)
 
+    @metrics.timed('storage_save')
     def save(self, vacancies: list) -> None:
-        """Save vacancies id in db with timestamp."""
-        with shelve.open(self._db_name) as vdb:
-            for vac in vacancies:
-                vid = vac.id
-                if vid not in vdb:
-                    current_time = dt.datetime.now()
-                    vdb[vid] = dt.datetime.timestamp(current_time)
-
-    def load(self) -> set:
-        """Loading set of vacancies id. Remove id if expired."""
-        vacancies_id: set = {}
-        time_delta = dt.timedelta(self._max_age)
-        expired_ids: list = []
+        """
+        Save vacancies id in db with timestamp.
+        Timestamp of already saved id is renewed only if expired.
+        """
+        current_time = dt.datetime.timestamp(dt.datetime.now())
+        expire_time = self._expire_time()
+        with self._connect() as connection:
+            connection.executemany(
+                'INSERT INTO vacancies (id, saved_at) VALUES (?, ?) '
+                'ON CONFLICT (id) DO UPDATE SET saved_at = excluded.saved_at '
+                'WHERE saved_at < ?',
+                ((vac.id, current_time, expire_time) for vac in vacancies)
+            )
+
+        self._seen_filter.add(vac.id for vac in vacancies)
+
+    @metrics.timed('storage_load')
+    def load(self, vacancies_ids: list) -> set:
+        """
+        Return ids from given batch that are already saved in db.
+        Ids are stored as text, returned ids have the type of given ones.
+        Expired ids aren't counted even if they aren't purged yet.
+        If seen filter is warmed, db is asked only about its positives.
+        """
+        vacancies_ids = list(vacancies_ids)
+        if self._seen_filter.ready:
+            candidates: list = self._seen_filter.candidates(vacancies_ids)
+        else:
+            candidates: list = vacancies_ids
+
+        if not candidates:
+            return set()
+
+        found_ids: set = set()
+        expire_time = self._expire_time()
+        connection = self._connect()
+        ids_by_text: dict = {str(vid): vid for vid in candidates}
+
+        for batch in self._batches(candidates):
+            placeholders: str = ', '.join('?' * len(batch))
+            rows = connection.execute(
+                'SELECT id FROM vacancies '
+                'WHERE saved_at >= ? AND id IN (%s)' % placeholders,
+                (expire_time, *batch)
+            )
+            found_ids.update(ids_by_text[vid] for vid, in rows)
+
+        if self._seen_filter.ready:
+            self._seen_filter.report_false_positives(
+                len(candidates) - len(found_ids)
+            )
+
+        return found_ids
+
+    def prepare(self) -> None:
+        """Open db, it's created with tables on first start."""
+        self._connect()
+
+    def iter_ids(
+        self,
+        connection: sqlite3.Connection | None = None
+    ) -> Iterator:
+        """Iterate over all not expired ids saved in db."""
+        rows = (connection or self._connect()).execute(
+            'SELECT id FROM vacancies WHERE saved_at >= ?',
+            (self._expire_time(), )
+        )
+        for vid, in rows:
+            yield vid
+
+    def warm_seen_filter(self) -> None:
+        """
+        Rebuild seen filter with ids saved in db.
+        Ids are read by own connection, so filter is built
+        in separate thread while storage thread serves other
+        calls. Db must be prepared before.
+        """
+        connection = sqlite3.connect(self._db_name, timeout=30)
+        try:
+            self._seen_filter.rebuild(self.iter_ids(connection))
+        finally:
+            connection.close()
+
+    def purge(self) -> int:
+        """
+        Remove expired ids walking saved_at index from the oldest.
+        Delete by small batches to not hold write lock for long.
+        Return number of removed ids.
+        """
+        expire_time = self._expire_time()
+        total_removed: int = 0
+        connection = self._connect()
+
+        while True:
+            with connection:
+                cursor = connection.execute(
+                    'DELETE FROM vacancies WHERE id IN ('
+                    'SELECT id FROM vacancies WHERE saved_at < ? '
+                    'ORDER BY saved_at LIMIT ?'
+                    ')',
+                    (expire_time, self._batch_size)
+                )
+
+            total_removed += cursor.rowcount
+            if cursor.rowcount < self._batch_size:
+                break
+
+        self._seen_filter.mark_stale(total_removed)
+
+        with connection:
+            connection.execute(
+                'DELETE FROM watermarks WHERE updated_at < ?',
+                (expire_time, )
+            )
+
+        return total_removed
+
+    def load_watermark(self, query: str) -> float | None:
+        """
+        Return publication timestamp of the newest vacancy
+        collected by query. Expired watermark isn't returned.
+        """
+        row: tuple | None = self._connect().execute(
+            'SELECT published_at FROM watermarks '
+            'WHERE query = ? AND updated_at >= ?',
+            (query, self._expire_time())
+        ).fetchone()
+        if row:
+            return row[0]
 
-        with shelve.open(self._db_name) as vdb:
-            vacancies_id = set(vdb.keys())
+    def save_watermark(self, query: str, published_at: float) -> None:
+        """Save publication timestamp of the newest collected vacancy."""
+        current_time = dt.datetime.timestamp(dt.datetime.now())
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT INTO watermarks (query, published_at, updated_at) '
+                'VALUES (?, ?, ?) '
+                'ON CONFLICT (query) DO UPDATE SET '
+                'published_at = excluded.published_at, '
+                'updated_at = excluded.updated_at',
+                (query, published_at, current_time)
+            )
 
-            for vid in vdb:
-                pub_date = dt.datetime.fromtimestamp(vdb[vid])
-                current_date = dt.datetime.now()
-                if pub_date + time_delta < current_date:
-                    expired_ids.append(vid)
+    def lower_watermark(self, query: str, published_at: float) -> None:
+        """
+        Move watermark of query back to timestamp, so vacancies
+        published later are collected again by this query.
+        """
+        with self._connect() as connection:
+            connection.execute(
+                'UPDATE watermarks SET published_at = ? '
+                'WHERE query = ? AND published_at > ?',
+                (published_at, query, published_at)
+            )
 
-        if expired_ids:
-            self.clean(expired_ids)
 
-        return vacancies_id
+vid_storage: VIDStorage = VIDStorage()
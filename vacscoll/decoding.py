@@ -0,0 +1,82 @@
+import json
+from typing import Any, TypedDict
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+class NamedInfoHH(TypedDict, total=False):
+    """Nested info object of hh vacancy, e.g. employer or area."""
+
+    id: Any
+    name: Any
+
+
+SalaryHH = TypedDict(
+    'SalaryHH', {'from': Any, 'to': Any, 'currency': Any}, total=False
+)
+
+
+class SnippetHH(TypedDict, total=False):
+    requirement: Any
+    responsibility: Any
+
+
+class ItemHH(TypedDict, total=False):
+    """
+    Fields of hh vacancy item used by VacancyHH, filters and collector.
+    Field used by them must be declared here, other ones are skipped.
+    """
+
+    id: Any
+    name: Any
+    published_at: Any
+    alternate_url: Any
+    area: NamedInfoHH | None
+    employer: NamedInfoHH | None
+    employment: NamedInfoHH | None
+    experience: NamedInfoHH | None
+    schedule: NamedInfoHH | None
+    salary: SalaryHH | None
+    snippet: SnippetHH | None
+
+
+class PageHH(TypedDict, total=False):
+    """Page of hh /vacancies response."""
+
+    items: list[ItemHH]
+    found: Any
+    pages: Any
+    page: Any
+    per_page: Any
+
+
+if msgspec is not None:
+    _json_decoder = msgspec.json.Decoder()
+    _page_decoder = msgspec.json.Decoder(PageHH)
+    DECODE_ERRORS: tuple = (ValueError, msgspec.DecodeError)
+else:
+    DECODE_ERRORS: tuple = (ValueError, )
+
+
+def decode_json(body: bytes) -> Any:
+    """Decode JSON response body, with msgspec if it's installed."""
+    if msgspec is None:
+        return json.loads(body)
+
+    return _json_decoder.decode(body)
+
+
+def decode_hh_page(body: bytes) -> dict:
+    """
+    Decode hh /vacancies response body.
+    With msgspec only fields of PageHH and ItemHH are decoded,
+    the rest of item (logos, address, contacts...) is skipped
+    without creating its objects. Otherwise the whole page is decoded.
+    """
+    if msgspec is None:
+        return json.loads(body)
+
+    return _page_decoder.decode(body)
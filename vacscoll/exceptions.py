@@ -22,3 +22,68 @@ class VacancyNoneTypeException(ValueError):
             return 'Vacancy instance didn\'t reach source'
 
         return super().__str__()
+
+
+class RequestFailedException(RuntimeError):
+    """Exception for API request failed."""
+
+    def __init__(self, *args: tuple) -> None:
+        super().__init__(*args)
+
+    def __str__(self) -> str:
+        if not self.args:
+            return 'API request failed'
+
+        return super().__str__()
+
+
+class TooManyRequestsException(RequestFailedException):
+    """Exception for API keeps throttling requests."""
+
+    def __init__(self, *args: tuple) -> None:
+        super().__init__(*args)
+
+    def __str__(self) -> str:
+        if not self.args:
+            return 'API rate limit exceeded'
+
+        return super().__str__()
+
+
+class CircuitOpenException(RequestFailedException):
+    """Exception for API is considered unavailable."""
+
+    def __init__(self, *args: tuple) -> None:
+        super().__init__(*args)
+
+    def __str__(self) -> str:
+        if not self.args:
+            return 'API is unavailable, requests are rejected'
+
+        return super().__str__()
+
+
+class AreasUnavailableException(RequestFailedException):
+    """Exception for areas directory can't be recieved."""
+
+    def __init__(self, *args: tuple) -> None:
+        super().__init__(*args)
+
+    def __str__(self) -> str:
+        if not self.args:
+            return 'areas directory is unavailable'
+
+        return super().__str__()
+
+
+class UnknownSourceException(ValueError):
+    """Exception for vacancy source isn't registered."""
+
+    def __init__(self, *args: tuple) -> None:
+        super().__init__(*args)
+
+    def __str__(self) -> str:
+        if not self.args:
+            return 'vacancy source isn\'t registered'
+
+        return super().__str__()
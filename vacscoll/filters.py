@@ -0,0 +1,82 @@
+from typing import Callable
+
+
+class VacancyFilters:
+    """
+    User filters of vacancies search.
+    Filters are pushed down to hh API query parameters,
+    the rest is checked by one precompiled predicate.
+    """
+
+    def __init__(
+        self,
+        experience: set | None = None,
+        employment: set | None = None,
+        schedule: set | None = None,
+        salary: int | None = None,
+        only_with_salary: bool = False,
+    ) -> None:
+        self.experience = frozenset(experience or ())
+        self.employment = frozenset(employment or ())
+        self.schedule = frozenset(schedule or ())
+        self.salary = salary
+        self.only_with_salary = only_with_salary
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.experience
+            or self.employment
+            or self.schedule
+            or self.salary
+            or self.only_with_salary
+        )
+
+    def to_params(self) -> dict:
+        """
+        Query parameters for hh API.
+        Multiple values are passed as repeated parameter.
+        API takes only one experience value, so several
+        experience values are checked by predicate.
+        """
+        params: dict = {}
+
+        if len(self.experience) == 1:
+            params['experience'], = self.experience
+
+        if self.employment:
+            params['employment'] = tuple(sorted(self.employment))
+
+        if self.schedule:
+            params['schedule'] = tuple(sorted(self.schedule))
+
+        if self.salary:
+            params['salary'] = str(self.salary)
+
+        if self.only_with_salary:
+            params['only_with_salary'] = 'true'
+
+        return params
+
+    def predicate_key(self) -> tuple:
+        """
+        Values of filters checked by predicate, so queries
+        with equal parameters but different predicates differ.
+        """
+        if len(self.experience) > 1:
+            return (('experience', tuple(sorted(self.experience))), )
+
+        return ()
+
+    def predicate(self) -> Callable[[dict], bool] | None:
+        """
+        Compile check of filters not expressed as query parameters.
+        Return None if API checks all of them.
+        """
+        if len(self.experience) > 1:
+            allowed_experience: frozenset = self.experience
+
+            def check_experience(item: dict) -> bool:
+                experience: dict = item.get('experience') or {}
+                return experience.get('id') in allowed_experience
+
+            return check_experience
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+from .constants import (
+    HH_RATE_BURST,
+    HH_RATE_DECREASE_FACTOR,
+    HH_RATE_INCREASE_STEP,
+    HH_RATE_LIMIT,
+    HH_RATE_MIN,
+)
+
+
+class RateLimiter:
+    """
+    Process-wide async token bucket.
+    Rate is lowered on throttling responses and
+    restored step by step on clean responses.
+    """
+
+    def __init__(
+        self,
+        rate: float | int,
+        burst: int = 1,
+        min_rate: float | int | None = None,
+        decrease_factor: float = HH_RATE_DECREASE_FACTOR,
+        increase_step: float | int = HH_RATE_INCREASE_STEP,
+    ) -> None:
+        if rate <= 0 or burst < 1:
+            raise ValueError('rate must be positive and burst at least 1')
+
+        self._max_rate = float(rate)
+        self._min_rate = float(min_rate or rate / 10)
+        self._rate = self._max_rate
+        self._burst = burst
+        self._decrease_factor = decrease_factor
+        self._increase_step = increase_step
+
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        """Current allowed requests per second."""
+        return self._rate
+
+    def _refill(self, now: float) -> None:
+        """Add tokens accumulated since last update."""
+        elapsed = now - self._updated_at
+        self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until request is allowed. Waiters are served in order."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._blocked_until:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def slow_down(self, retry_after: float | None = None) -> None:
+        """
+        Multiplicative decrease of rate after throttling.
+        If server said when to retry, hold all requests until then.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        self._rate = max(self._min_rate, self._rate * self._decrease_factor)
+        self._tokens = min(self._tokens, 0.0)
+
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, now + retry_after)
+
+    def speed_up(self) -> None:
+        """Additive increase of rate after clean response."""
+        if self._rate >= self._max_rate:
+            return
+
+        self._refill(time.monotonic())
+        self._rate = min(self._max_rate, self._rate + self._increase_step)
+
+
+hh_rate_limiter: RateLimiter = RateLimiter(
+    HH_RATE_LIMIT, HH_RATE_BURST, HH_RATE_MIN
+)
@@ -0,0 +1,211 @@
+import bisect
+import contextlib
+import functools
+import inspect
+import threading
+import time
+from collections import Counter
+from typing import Callable, ContextManager
+
+from .constants import METRICS_BUCKETS, METRICS_PREFIX
+
+
+class Histogram:
+    """Counts of observed durations by buckets upper bounds."""
+
+    def __init__(self, buckets: tuple = METRICS_BUCKETS) -> None:
+        self._buckets = tuple(sorted(buckets))
+        self._counts: list = [0] * (len(self._buckets) + 1)
+        self.count: int = 0
+        self.sum: float = 0.0
+
+    def observe(self, value: float) -> None:
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list:
+        """Pairs of bucket upper bound and count of values not above it."""
+        bounds: tuple = self._buckets + (float('inf'), )
+        total: int = 0
+        pairs: list = []
+        for bound, count in zip(bounds, self._counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+    def quantile(self, share: float) -> float:
+        """Upper bound of bucket where given share of values is reached."""
+        rank: float = share * self.count
+        for bound, total in self.cumulative():
+            if total >= rank:
+                return bound
+        return float('inf')
+
+
+class _Timer:
+    """Context manager observing duration of its block."""
+
+    __slots__ = ('_registry', '_stage', '_started')
+
+    def __init__(self, registry: 'MetricsRegistry', stage: str) -> None:
+        self._registry = registry
+        self._stage = stage
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self._registry.observe(
+            self._stage, time.perf_counter() - self._started
+        )
+
+
+class MetricsRegistry:
+    """
+    Process-wide durations of processing stages and event counters.
+    Disabled registry doesn't record anything, so instrumented
+    code costs only a flag check.
+    Stages are observed both in event loop and storage thread.
+    """
+
+    def __init__(
+        self,
+        buckets: tuple = METRICS_BUCKETS,
+        prefix: str = METRICS_PREFIX,
+    ) -> None:
+        self._buckets = buckets
+        self._prefix = prefix
+
+        self.enabled: bool = False
+        self._histograms: dict = {}
+        self._counters: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record duration of stage."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            histogram: Histogram | None = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self._buckets)
+            histogram.observe(seconds)
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """Add value to event counter."""
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._counters[name] += value
+
+    def timer(self, stage: str) -> ContextManager:
+        """Context manager recording duration of its block as stage."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+
+        return _Timer(self, stage)
+
+    def timed(self, stage: str | None = None) -> Callable:
+        """
+        Decorator recording duration of function calls as stage.
+        Stage is named by module and function by default.
+        """
+        def decorator(func: Callable) -> Callable:
+            name: str = stage or '%s.%s' % (
+                func.__module__.rsplit('.', 1)[-1], func.__name__
+            )
+
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    if not self.enabled:
+                        return await func(*args, **kwargs)
+
+                    started: float = time.perf_counter()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        self.observe(name, time.perf_counter() - started)
+
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+
+                started: float = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, time.perf_counter() - started)
+
+            return wrapper
+
+        return decorator
+
+    def _snapshot(self) -> tuple:
+        """Consistent copy of histograms and counters."""
+        with self._lock:
+            histograms: dict = {
+                stage: (histogram.cumulative(), histogram.sum)
+                for stage, histogram in self._histograms.items()
+            }
+            return histograms, dict(self._counters)
+
+    def render_prometheus(self) -> str:
+        """Metrics in Prometheus text exposition format."""
+        histograms, counters = self._snapshot()
+        name: str = self._prefix + '_stage_duration_seconds'
+        lines: list = [
+            '# HELP %s Duration of processing stages.' % name,
+            '# TYPE %s histogram' % name,
+        ]
+        for stage, (cumulative, total) in sorted(histograms.items()):
+            for bound, count in cumulative:
+                le: str = '+Inf' if bound == float('inf') else '%g' % bound
+                lines.append(
+                    '%s_bucket{stage="%s",le="%s"} %d'
+                    % (name, stage, le, count)
+                )
+            lines.append('%s_sum{stage="%s"} %r' % (name, stage, total))
+            lines.append(
+                '%s_count{stage="%s"} %d' % (name, stage, cumulative[-1][1])
+            )
+
+        for counter, value in sorted(counters.items()):
+            counter_name: str = '%s_%s_total' % (self._prefix, counter)
+            lines.append('# TYPE %s counter' % counter_name)
+            lines.append('%s %d' % (counter_name, value))
+
+        return '\n'.join(lines) + '\n'
+
+    def summary(self) -> list:
+        """Structured lines with count, total and quantiles of stages."""
+        with self._lock:
+            lines: list = [
+                'stage=%s count=%d sum=%.3f p50<=%g p95<=%g p99<=%g'
+                % (
+                    stage,
+                    histogram.count,
+                    histogram.sum,
+                    histogram.quantile(0.5),
+                    histogram.quantile(0.95),
+                    histogram.quantile(0.99),
+                )
+                for stage, histogram in sorted(self._histograms.items())
+            ]
+            lines.extend(
+                'counter=%s value=%d' % item
+                for item in sorted(self._counters.items())
+            )
+        return lines
+
+
+metrics: MetricsRegistry = MetricsRegistry()
@@ -1,92 +1,154 @@
+import datetime as dt
+import sys
+from typing import Protocol
+
+from .constants import HH_DATETIME_FORMAT, HH_VACANCY_URL
 from .exceptions import VacancyNoneTypeException
 from .processors import TextProcessor
 
 
-class VacancyHH:
-    """Model for summary hh vacancy info."""
+def parse_published_at(published_at: str | None) -> float | None:
+    """
+    Convert hh publication time to timestamp.
+    ISO parser is much faster than strptime with HH_DATETIME_FORMAT,
+    time without UTC offset is rejected as by the format.
+    Before Python 3.11 ISO parser rejects hh offset without colon
+    (+0300), then time is parsed by the format.
+    """
+    if not published_at:
+        return
+
+    try:
+        published: dt.datetime = dt.datetime.fromisoformat(published_at)
+    except ValueError:
+        try:
+            published = dt.datetime.strptime(
+                published_at, HH_DATETIME_FORMAT
+            )
+        except ValueError:
+            return
 
-    def __init__(self, item: dict) -> None:
-        if not item:
-            raise VacancyNoneTypeException()
+    if published.tzinfo is None:
+        return
 
-        self._vacancy: dict = item
+    return published.timestamp()
 
-    @property
-    def id(self) -> int | None:
-        return self._vacancy.get('id')
 
-    @property
-    def name(self) -> str | None:
-        return self._vacancy.get('name')
+class Vacancy(Protocol):
+    """
+    Common model of vacancies of all sources.
+    Bot renders and delivers vacancies only by these fields,
+    fields which source doesn't provide are None.
+    Salary is tuple of lower bound, upper bound and currency.
+    """
 
-    @property
-    def employment(self) -> str:
-        employment_info: dict = self._vacancy.get('employment')
-        if not employment_info:
-            return
+    id: int | str
+    published_at: float | None
+    url: str | None
+    name: str | None
+    employment: str | None
+    employer: str | None
+    location: str | None
+    salary: tuple | None
+    requirements: str | None
+    responsibility: str | None
 
-        return employment_info.get('name')
 
-    @property
-    def employer(self) -> str:
-        employer_info: dict = self._vacancy.get('employer')
+def _nested_name(item: dict, key: str) -> str | None:
+    """Name of nested info object, e.g. employer or area."""
+    info: dict | None = item.get(key)
+    if not info:
+        return
 
-        if not employer_info:
-            return
+    return info.get('name')
 
-        return employer_info.get('name')
 
-    @property
-    def location(self) -> str | None:
-        area: dict = self._vacancy.get('area')
-        if not area:
-            return
+def _interned(string: str | None) -> str | None:
+    """Share one copy of often repeated string, e.g. city name."""
+    if string is None:
+        return
 
-        return area.get('name')
+    return sys.intern(string)
 
-    @property
-    def requirements(self) -> str | None:
-        text_processor: TextProcessor = TextProcessor()
-
-        snippet: dict = self._vacancy.get('snippet')
-        if not snippet:
-            return
-
-        requirement = snippet.get('requirement')
-        if not requirement:
-            return
 
-        return text_processor.cleaning_data(requirement)
-
-    @property
-    def responsibility(self) -> str | None:
-        text_processor: TextProcessor = TextProcessor()
+class VacancyHH:
+    """
+    Compact immutable model for summary hh vacancy info.
+    Needed fields are extracted once, raw item isn't kept.
+    Implements Vacancy model.
+    """
+
+    __slots__ = (
+        'id',
+        'name',
+        'employment',
+        'employer',
+        'location',
+        'salary',
+        '_url',
+        'requirements',
+        'responsibility',
+        'published_at',
+    )
+
+    _text_processor: TextProcessor = TextProcessor()
 
-        snippet: dict = self._vacancy.get('snippet')
-        if not snippet:
-            return
+    def __init__(self, item: dict) -> None:
+        if not item:
+            raise VacancyNoneTypeException()
 
-        responsibilities = snippet.get('responsibility')
-        if not responsibilities:
-            return
+        set_field = object.__setattr__
+        vid = item.get('id')
+        snippet: dict = item.get('snippet') or {}
+        salary_info: dict | None = item.get('salary')
 
-        return text_processor.cleaning_data(responsibilities)
+        set_field(self, 'id', int(vid) if vid is not None else None)
+        set_field(self, 'name', item.get('name'))
+        set_field(
+            self, 'employment', _interned(_nested_name(item, 'employment'))
+        )
+        set_field(self, 'employer', _nested_name(item, 'employer'))
+        set_field(self, 'location', _interned(_nested_name(item, 'area')))
+        set_field(
+            self,
+            'salary',
+            (
+                salary_info.get('from'),
+                salary_info.get('to'),
+                _interned(salary_info.get('currency')),
+            ) if salary_info else None
+        )
+        url: str | None = item.get('alternate_url')
+        set_field(
+            self, '_url', None if url == HH_VACANCY_URL % vid else url
+        )
+        set_field(
+            self,
+            'requirements',
+            self._text_processor.cleaning_data(snippet.get('requirement'))
+        )
+        set_field(
+            self,
+            'responsibility',
+            self._text_processor.cleaning_data(snippet.get('responsibility'))
+        )
+        set_field(
+            self, 'published_at', parse_published_at(item.get('published_at'))
+        )
 
     @property
-    def salary(self) -> tuple | None:
-        salary_info: dict = self._vacancy.get('salary')
-        if not salary_info:
-            return
+    def url(self) -> str | None:
+        """Vacancy page. Usual page url isn't stored, it's made from id."""
+        if self._url is None and self.id is not None:
+            return HH_VACANCY_URL % self.id
 
-        min_bound = salary_info.get('from')
-        max_bound = salary_info.get('to')
-        currency = salary_info.get('currency')
+        return self._url
 
-        return min_bound, max_bound, currency
+    def __setattr__(self, name: str, value) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
 
-    @property
-    def url(self) -> str | None:
-        return self._vacancy.get('alternate_url')
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f'{type(self).__name__} is immutable')
 
     def __str__(self) -> str:
         summary_info: str = (
@@ -1,12 +1,23 @@
+import html
 import re
+from functools import lru_cache
 
-from .constants import TAG_PATTERN, URL_PATTERN
+from .constants import CLEANING_CACHE_SIZE, TAG_PATTERN, URL_PATTERN
 
 
 TAG_PATTERN: re.Pattern = re.compile(TAG_PATTERN)
 URL_PATTERN: re.Pattern = re.compile(URL_PATTERN)
 
 
+@lru_cache(maxsize=CLEANING_CACHE_SIZE)
+def clean_html(strings: str) -> str:
+    """
+    Remove tags in one regex pass, decode entities
+    and collapse whitespaces. Same snippets are cleaned once.
+    """
+    return ' '.join(html.unescape(TAG_PATTERN.sub('', strings)).split())
+
+
 class TextProcessor:
     """Set of text processing methods."""
 
@@ -14,27 +25,11 @@ class TextProcessor:
         pass
 
     def cleaning_data(self, strings: str) -> str:
-        """Cleaning html tags from input strings if exists."""
+        """Cleaning html tags and entities from input strings if exists."""
         if not strings:
             return
 
-        strings: list = strings.split()
-
-        for i in range(len(strings)):
-            _match: re.Match | None = re.search(TAG_PATTERN, strings[i])
-            if _match:
-                strings[i] = self._remove_tags(strings[i])
-
-        strings: list = self._remove_empty_elements(strings)
-
-        return ' '.join(strings)
-
-    def _remove_tags(self, string: str) -> list:
-        """Remove html tags from string."""
-        return re.sub(TAG_PATTERN, '', string)
-
-    def _remove_empty_elements(self, strings: list) -> list:
-        return [string for string in strings if string != '']
+        return clean_html(strings)
 
     @staticmethod
     def is_correct_url(url: str) -> bool:
@@ -0,0 +1,69 @@
+from typing import Iterator
+
+from .bases import BaseVacancyCollector
+from .constants import ALL_SOURCES
+from .exceptions import UnknownSourceException
+from .models import Vacancy
+
+
+class CollectorRegistry:
+    """
+    Collectors of vacancy sources by source name.
+    Collector class is registered by register decorator
+    and declares its source, API and model of vacancies,
+    which has fields of common Vacancy model.
+    """
+
+    def __init__(self) -> None:
+        self._collectors: dict = {}
+
+    def __len__(self) -> int:
+        return len(self._collectors)
+
+    def __iter__(self) -> Iterator[type]:
+        return iter(self._collectors.values())
+
+    def register(self, collector_cls: type) -> type:
+        """Register collector class of source, return the class."""
+        if not issubclass(collector_cls, BaseVacancyCollector):
+            raise TypeError(
+                '%s isn\'t vacancy collector' % collector_cls.__name__
+            )
+
+        if collector_cls.src_name in (None, '', ALL_SOURCES):
+            raise ValueError(
+                '%s has invalid source name %r'
+                % (collector_cls.__name__, collector_cls.src_name)
+            )
+
+        missing: list = [
+            field for field in Vacancy.__annotations__
+            if not hasattr(collector_cls.model, field)
+        ]
+        if missing:
+            raise TypeError(
+                '%s model lacks vacancy fields: %s'
+                % (collector_cls.__name__, ', '.join(missing))
+            )
+
+        self._collectors[collector_cls.src_name] = collector_cls
+        return collector_cls
+
+    def get(self, src_name: str) -> type:
+        """Collector class of source."""
+        try:
+            return self._collectors[src_name]
+        except KeyError:
+            raise UnknownSourceException(
+                'vacancy source \'%s\' isn\'t registered' % src_name
+            ) from None
+
+    def select(self, src_name: str) -> list:
+        """Collector classes of source, or of all sources."""
+        if src_name == ALL_SOURCES:
+            return list(self._collectors.values())
+
+        return [self.get(src_name)]
+
+
+collector_registry: CollectorRegistry = CollectorRegistry()
@@ -1,11 +1,57 @@
-import aiohttp
+import asyncio
+from typing import Any, AsyncIterator, Callable
 
+from .breakers import CircuitBreaker
+from .client import http_client
+from .decoding import decode_json
+from .limiters import RateLimiter
+from .metrics import metrics
 
-async def make_request(url: str) -> list:
+
+@metrics.timed('fetch')
+async def make_request(
+    url: str,
+    limiter: RateLimiter | None = None,
+    breaker: CircuitBreaker | None = None,
+    decode: Callable[[bytes], Any] = decode_json
+) -> dict:
     """
-    Making async request with session and url.
+    Making async request with shared application session.
     Rerutn decodes JSON response.
     """
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as response:
-            return await response.json()
+    return await http_client.get_json(url, limiter, breaker, decode)
+
+
+async def merge_async_iterators(iterators: list) -> AsyncIterator:
+    """
+    Consume async iterators concurrently.
+    Yield items as soon as any of iterators produces one.
+    The first error of any iterator stops all of them.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump(iterator: AsyncIterator) -> None:
+        try:
+            async for item in iterator:
+                queue.put_nowait(('item', item))
+        except Exception as error:
+            queue.put_nowait(('error', error))
+        else:
+            queue.put_nowait(('done', None))
+
+    tasks: list = [
+        asyncio.create_task(pump(iterator)) for iterator in iterators
+    ]
+    remaining: int = len(tasks)
+    try:
+        while remaining:
+            kind, value = await queue.get()
+            if kind == 'item':
+                yield value
+            elif kind == 'error':
+                raise value
+            else:
+                remaining -= 1
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -1,75 +1,296 @@
-import re
+import asyncio
+import logging
+import time
+from typing import AsyncIterator
 
-from .collectors import VacancyHHCollector
-from .constants import HH_REGION_RU, HH_URL
-from .db import VIDStorage
+from .areas import AreaIndex, AreasCache
+from .bases import BaseVacancyCollector
+# Collectors register their sources on import.
+from .collectors import VacancyHHCollector  # noqa: F401
+from .constants import ALL_SOURCES
+from .db import run_in_storage, seen_ids, vid_storage
+from .exceptions import AreasUnavailableException, RequestFailedException
+from .filters import VacancyFilters
+from .metrics import metrics
+from .registry import collector_registry
+from .utils import merge_async_iterators
+
+
+def create_collectors(
+    src_name: str,
+    keywords: str,
+    area: str | dict | None = None,
+    filters: VacancyFilters | None = None,
+    scope: str | None = None
+) -> list:
+    """
+    Create vacancy collectors of search query, one for source
+    or one for each source. Area of all sources search maps
+    source names to their area ids, sources without area
+    aren't searched.
+    """
+    collectors: list = []
+    for collector_cls in collector_registry.select(src_name):
+        source_area: str | None = area
+        if isinstance(area, dict):
+            source_area = area.get(collector_cls.src_name)
+            if source_area is None:
+                continue
+
+        collectors.append(
+            collector_cls.for_query(keywords, source_area, filters, scope)
+        )
+
+    return collectors
+
+
+async def _stream_source(
+    collector: BaseVacancyCollector,
+    failures: list
+) -> AsyncIterator[list]:
+    """Yield new vacancies of source, report its failure in failures."""
+    try:
+        async for vacancies in collector.stream():
+            yield vacancies
+    except RequestFailedException as error:
+        logging.warning(
+            'Vacancy source %s failed: %s', collector.src_name, error
+        )
+        failures.append(error)
+
+
+async def stream_collectors(collectors: list) -> AsyncIterator[list]:
+    """
+    Yield new vacancies of collectors page by page as soon as
+    any source answers, so slow source doesn't hold the others.
+    Failed source is skipped, error is raised if all sources failed.
+    """
+    if len(collectors) == 1:
+        async for vacancies in collectors[0].stream():
+            yield vacancies
+        return
+
+    failures: list = []
+    pages: AsyncIterator[list] = merge_async_iterators([
+        _stream_source(collector, failures) for collector in collectors
+    ])
+    try:
+        async for vacancies in pages:
+            yield vacancies
+    finally:
+        await pages.aclose()
+
+    if failures and len(failures) == len(collectors):
+        raise failures[0]
+
+
+async def stream_vacs(
+    src_name: str,
+    keywords: str,
+    area: str | dict | None = None,
+    filters: VacancyFilters | None = None
+) -> AsyncIterator[list]:
+    """Yield new vacancies objects from job aggregators API page by page."""
+    collectors: list = create_collectors(src_name, keywords, area, filters)
+    async for vacancies in stream_collectors(collectors):
+        yield vacancies
+
+
+def query_watermark_keys(
+    src_name: str,
+    keywords: str,
+    area: str | dict | None = None,
+    filters: VacancyFilters | None = None
+) -> list:
+    """Watermark keys of search query collectors."""
+    return [
+        collector.watermark_key()
+        for collector in create_collectors(src_name, keywords, area, filters)
+    ]
 
 
 async def get_vacs(
     src_name: str,
     keywords: str,
-    area: str | None = None
+    area: str | dict | None = None,
+    filters: VacancyFilters | None = None,
+    scope: str | None = None
 ) -> list:
     """Getting vacancies objects list from job aggregators API."""
-    if src_name == 'hh':
-        keywords: str = '+'.join(keywords.split())
-        params: dict = {
-            'text': keywords,
-            'per_page': '100',
-            'no_magic': 'true',
-        }
-        endpoint: str = 'vacancies'
-
-        if area:
-            params.update({'area': area})
-
-        vacscoll = VacancyHHCollector(HH_URL, endpoint, params)
-        return await vacscoll.run()
-
-
-async def get_areas(src_name: str, city: str) -> str | None:
-    """Return area ID if user has entered an existing one."""
-    selector: dict = {
-        'hh': recieve_hh_areas,
+    collectors: list = create_collectors(
+        src_name, keywords, area, filters, scope
+    )
+    return [
+        vacancy
+        async for vacancies in stream_collectors(collectors)
+        for vacancy in vacancies
+    ]
+
+
+async def watch_query(
+    src_name: str,
+    keywords: str,
+    area: str | dict | None = None,
+    filters: VacancyFilters | None = None,
+    scope: str | None = None
+) -> str:
+    """
+    Start watching search query: its next runs collect only
+    vacancies published from now. Return normalized query key,
+    equal for queries collected by the same requests.
+    """
+    collectors: list = create_collectors(
+        src_name, keywords, area, filters, scope
+    )
+    started_at: float = time.time()
+    for collector in collectors:
+        await collector.start_watermark(started_at)
+
+    keys: list = [collector.cache_key() for collector in collectors]
+    if len(keys) == 1:
+        return repr(keys[0])
+
+    return repr(tuple(keys))
+
+
+def get_areas_cache(src_name: str) -> AreasCache:
+    """Areas directory of source, created on first use."""
+    cache: AreasCache | None = areas_caches.get(src_name)
+    if cache is None:
+        cache = areas_caches[src_name] = AreasCache(
+            src_name, collector_registry.get(src_name).fetch_areas
+        )
+
+    return cache
+
+
+async def _find_area(src_name: str, city: str) -> tuple | None:
+    index: AreaIndex = await get_areas_cache(src_name).get_index()
+    return checking_area(city, index)
+
+
+@metrics.timed('get_areas')
+async def get_areas(src_name: str, city: str) -> tuple | None:
+    """
+    Return area ID and its name
+    if user has entered an existing one.
+    For all sources area IDs are returned by source names,
+    sources without areas directory are skipped.
+    Raise AreasUnavailableException if no areas directory
+    can be recieved.
+    """
+    if src_name != ALL_SOURCES:
+        return await _find_area(src_name, city)
+
+    names: list = [
+        collector_cls.src_name for collector_cls in collector_registry
+    ]
+    found: list = await asyncio.gather(
+        *(_find_area(name, city) for name in names),
+        return_exceptions=True
+    )
+    errors: list = []
+    for area in found:
+        if isinstance(area, AreasUnavailableException):
+            errors.append(area)
+        elif isinstance(area, BaseException):
+            raise area
+
+    if len(errors) == len(names):
+        raise errors[0]
+
+    areas: dict = {
+        name: area for name, area in zip(names, found)
+        if area is not None and not isinstance(area, BaseException)
     }
-    areas: dict = await selector[src_name]()
-    return checking_area(city.lower(), areas)
+    if not areas:
+        return
+
+    area_ids: dict = {name: area_id for name, (area_id, _) in areas.items()}
+    _, area_name = next(iter(areas.values()))
+    return area_ids, area_name
+
 
+async def load_areas() -> None:
+    """Load areas of all sources and refresh expired ones in background."""
+    for collector_cls in collector_registry:
+        cache: AreasCache = get_areas_cache(collector_cls.src_name)
+        await cache.load()
+        if cache.expired:
+            cache.refresh_in_background()
 
-async def recieve_hh_areas() -> dict:
-    """Recieve areas dict from HH API."""
-    endpoint: str = 'areas/' + HH_REGION_RU
-    vacscoll = VacancyHHCollector(HH_URL)
-    url = vacscoll.make_request_url_with_params(endpoint)
-    dataset = await vacscoll.get_response_data([url])
-    return unpacking(dict(*dataset).get('areas'))
 
+async def refresh_areas() -> None:
+    """Refresh expired areas of all sources."""
+    caches: list = [
+        get_areas_cache(collector_cls.src_name)
+        for collector_cls in collector_registry
+    ]
+    await asyncio.gather(
+        *(cache.refresh_in_background() for cache in caches if cache.expired)
+    )
 
-def unpacking(areas: list) -> dict:
-    """Get nested cities from regions."""
-    def dfs(regions: list) -> None:
-        for region in regions:
-            _id = region.get('id')
-            _name = region.get('name')
-            total_regions[_id] = _name
-            areas = region.get('areas')
-            if areas:
-                dfs(areas)
 
-    total_regions: dict = {}
-    dfs(areas)
-    return total_regions
+areas_caches: dict = {}
 
 
-def checking_area(city: str, areas: dict) -> str | None:
+def checking_area(city: str, index: AreaIndex) -> tuple | None:
     """
     Checking user entered city is exists.
-    If city is exists return its ID."""
-    for _id, area in areas.items():
-        if re.search(city, area.lower()):
-            return _id
+    If city is exists return its ID and name."""
+    return index.find(city)
+
+
+def _remove_unrecieved(vacancies: list) -> None:
+    """
+    Remove vacancies ids from db and move back
+    watermarks of queries which collected them.
+    """
+    vid_storage.clean([vac.id for vac in vacancies])
+
+    oldest: dict = {}
+    for vac in vacancies:
+        if vac.published_at is None:
+            continue
+        for watermark_key in vac.watermark_keys:
+            oldest[watermark_key] = min(
+                oldest.get(watermark_key, vac.published_at),
+                vac.published_at
+            )
+
+    for watermark_key, published_at in oldest.items():
+        vid_storage.lower_watermark(watermark_key, published_at - 1)
+
+
+async def remove_unrecieved(vacancies: list) -> None:
+    """
+    Remove unrecieved vacancies ids from db and move watermarks
+    of their queries back, so these vacancies will be collected
+    again. Vacancies have id, published_at and watermark_keys
+    of query which collected them.
+    """
+    await run_in_storage(_remove_unrecieved, vacancies)
+
+
+async def purge_expired() -> int:
+    """
+    Remove expired vacancies ids from db and rebuild seen filter
+    if too many of its ids are stale. Filter is rebuilt in
+    separate thread, so storage calls aren't held by it.
+    Return removed count.
+    """
+    removed: int = await run_in_storage(vid_storage.purge)
+    if seen_ids.needs_rebuild:
+        await asyncio.to_thread(vid_storage.warm_seen_filter)
+    return removed
+
+
+async def warm_seen_ids() -> None:
+    """Load saved vacancies ids in memory seen filter."""
+    await run_in_storage(vid_storage.prepare)
+    await asyncio.to_thread(vid_storage.warm_seen_filter)
 
 
-def remove_unrecieved(vacancies: list) -> None:
-    """Remove unrecieved vacancies ids from db."""
-    VIDStorage().clean([vac.id for vac in vacancies])
+async def close_storage() -> None:
+    """Close connection to vacancies ids db."""
+    await vid_storage.close()